@@ -0,0 +1,105 @@
+"""
+Show how much data each src.inference loader reads, using the local
+Parquet feature store backend.
+
+    python -m benchmarks.bench_feature_reads --stations 300 --days 400
+"""
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import src.config as config
+from src import inference
+from src.lag_features import build_lag_matrix
+from src.local_feature_store import LocalFeatureStore
+from src.station_matrix import StationHourMatrix
+
+
+def populate(fs: LocalFeatureStore, n_stations: int, n_days: int, seed: int = 42) -> list:
+    """
+    Fill the groups the inference loaders read, in the layouts the pipelines
+    write them: daily lag features (feature pipeline), daily forecasts
+    (inference pipeline) and hourly rides and next-hour predictions
+    (streaming pipeline), all ending at the current hour.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now(tz="UTC").floor("h") + pd.Timedelta(hours=1)
+    start = end - pd.Timedelta(days=n_days)
+    stations = [f"Station {i:04d}" for i in range(n_stations)]
+    n_hours = n_days * 24 + 1
+
+    hourly = StationHourMatrix(rng.poisson(3, size=(n_stations, n_hours)), stations, start)
+    rides = hourly.to_long()
+    fs.get_or_create_feature_group(
+        config.HOURLY_FEATURE_GROUP_NAME, config.HOURLY_FEATURE_GROUP_VERSION,
+        primary_key=["pickup_hour", "start_station_name"], event_time="pickup_hour",
+    ).insert(rides)
+
+    predictions = rides.rename(columns={"rides": "predicted_demand"})
+    fs.get_or_create_feature_group(
+        config.HOURLY_PREDICTION_GROUP_NAME, config.HOURLY_PREDICTION_GROUP_VERSION,
+        primary_key=["pickup_hour", "start_station_name"], event_time="pickup_hour",
+    ).insert(predictions)
+
+    daily_counts = (
+        rides.assign(date=rides["pickup_hour"].dt.tz_localize(None).dt.normalize())
+        .groupby(["start_station_name", "date"])["rides"].sum()
+        .rename("trip_count")
+    )
+    lagged = build_lag_matrix(daily_counts).dropna().reset_index(drop=True)
+    fs.get_or_create_feature_group(
+        config.FEATURE_GROUP_NAME, config.FEATURE_GROUP_VERSION,
+        primary_key=["date", "start_station_name"], event_time="date",
+    ).insert(lagged)
+
+    today = end.tz_localize(None).normalize()
+    forecasts = pd.DataFrame({
+        "date": np.repeat(pd.date_range(today, periods=14, freq="D").values, n_stations),
+        "start_station_name": np.tile(stations, 14),
+        "horizon": np.repeat(np.arange(1, 15, dtype=np.int32), n_stations),
+        "predicted_trip_count": rng.poisson(70, size=14 * n_stations).astype(np.float64),
+    })
+    fs.get_or_create_feature_group(
+        config.FEATURE_GROUP_PREDICTION_NAME, config.FEATURE_GROUP_PREDICTION_VERSION,
+        primary_key=["date", "start_station_name"], event_time="date",
+    ).insert(forecasts)
+    return stations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=300)
+    parser.add_argument("--days", type=int, default=400)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fs = LocalFeatureStore(tmp)
+        stations = populate(fs, args.stations, args.days)
+        now = pd.Timestamp.now(tz="UTC").floor("h")
+
+        calls = {
+            "full table read (previous loaders)": lambda: fs.get_feature_group(config.HOURLY_FEATURE_GROUP_NAME).read(),
+            "load_batch_of_features_from_store": lambda: inference.load_batch_of_features_from_store(now, fs=fs),
+            "  (one station)": lambda: inference.load_batch_of_features_from_store(now, stations=stations[:1], fs=fs),
+            "load_hourly_features_from_store": lambda: inference.load_hourly_features_from_store(now, fs=fs),
+            "fetch_next_hour_predictions": lambda: inference.fetch_next_hour_predictions(fs=fs),
+            "fetch_predictions": lambda: inference.fetch_predictions(hours=1, fs=fs),
+            "fetch_hourly_rides": lambda: inference.fetch_hourly_rides(hours=1, fs=fs),
+            "fetch_days_data": lambda: inference.fetch_days_data(days=1, fs=fs),
+            "fetch_latest_daily_predictions": lambda: inference.fetch_latest_daily_predictions(fs=fs),
+        }
+
+        print(f"{'loader':<36} {'rows read':>10} {'KB read':>9} {'files read':>11}")
+        for label, call in calls.items():
+            call()
+            scan = fs.scan_stats[-1]
+            print(
+                f"{label:<36} {scan['rows_read']:>10,} {scan['bytes_read'] / 1024:>9.0f} "
+                f"{scan['files_read']:>5,}/{scan['files_total']:<5,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
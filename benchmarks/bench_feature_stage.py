@@ -0,0 +1,88 @@
+"""
+Memory and time of the feature stage in get_pipeline: the original
+average_rides_last_4_weeks + TemporalFeatureEngineer pair (mutates the input,
+copies the frame and drops) against FeatureAssembler.
+
+    python -m benchmarks.bench_feature_stage --rows 100000 --window 672
+"""
+import argparse
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from benchmarks.profiling import measure
+from src.pipeline_utils import WEEKLY_LAG_COLUMNS, FeatureAssembler
+
+
+def legacy_average_rides_last_4_weeks(X):
+    X["average_rides_last_4_weeks"] = X[WEEKLY_LAG_COLUMNS].mean(axis=1)
+    return X
+
+
+def legacy_temporal_features(X):
+    X = X.copy()
+    X["hour"] = X["pickup_hour"].dt.hour
+    X["day_of_week"] = X["pickup_hour"].dt.dayofweek
+    return X.drop(columns=["pickup_hour", "start_station_name"])
+
+
+def legacy_stage(X):
+    return legacy_temporal_features(legacy_average_rides_last_4_weeks(X))
+
+
+def make_window_batch(n_rows: int, window: int, seed: int = 42) -> pd.DataFrame:
+    """
+    int32 lag windows shaped like transform_ts_data_info_features output.
+    """
+    rng = np.random.default_rng(seed)
+    columns = [f"rides_t-{window - i}" for i in range(window)]
+    X = pd.DataFrame(rng.poisson(3, size=(n_rows, window)).astype(np.int32), columns=columns)
+    X["start_station_name"] = "Station 0000"
+    X["pickup_hour"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(n_rows) % 8760, unit="h")
+    return X
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--window", type=int, default=24 * 28)
+    parser.add_argument("--train-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    X = make_window_batch(args.rows, args.window)
+    y = np.random.default_rng(0).poisson(3, args.train_rows)
+    print(f"batch: {len(X):,} rows x {X.shape[1]} columns, {X.memory_usage(deep=False).sum() / 2**20:.0f} MB")
+
+    legacy = make_pipeline(
+        FunctionTransformer(legacy_average_rides_last_4_weeks, validate=False),
+        FunctionTransformer(legacy_temporal_features, validate=False),
+        lgb.LGBMRegressor(n_estimators=50, verbose=-1),
+    ).fit(X.head(args.train_rows).copy(), y)
+    new = make_pipeline(FeatureAssembler(), lgb.LGBMRegressor(n_estimators=50, verbose=-1)).fit(
+        X.head(args.train_rows), y
+    )
+
+    # The legacy stage adds a column to its input, so give it a fresh copy each run
+    expected, legacy_stats = measure(lambda: legacy_stage(X.copy()))
+    result, new_stats = measure(FeatureAssembler().transform, X)
+    assert list(expected.columns) == list(result.columns)
+    assert np.array_equal(expected.to_numpy(dtype=np.float64), result.to_numpy(dtype=np.float64))
+    assert "average_rides_last_4_weeks" not in X.columns
+    del expected, result
+
+    legacy_pred, legacy_predict = measure(lambda: legacy.predict(X.copy()))
+    new_pred, new_predict = measure(new.predict, X)
+    assert np.allclose(legacy_pred, new_pred)
+
+    print(f"{'step':>22} {'legacy s':>9} {'legacy MB':>10} {'new s':>7} {'new MB':>7}")
+    for name, old, cur in (("feature stage", legacy_stats, new_stats),
+                           ("pipeline.predict", legacy_predict, new_predict)):
+        print(f"{name:>22} {old['seconds']:>9.3f} {old['peak_mb']:>10.0f} {cur['seconds']:>7.3f} {cur['peak_mb']:>7.0f}")
+    print("(legacy figures include the input copy it needs to stay side-effect free)")
+
+
+if __name__ == "__main__":
+    main()
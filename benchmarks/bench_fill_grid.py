@@ -0,0 +1,69 @@
+"""
+Compare the legacy tuple-grid + merge implementation of fill_missing_rides_full_range
+against the vectorized dense-matrix one across station counts.
+
+    python -m benchmarks.bench_fill_grid --hours 8760 --stations 10 100 800
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.profiling import measure
+from src.data_utils import fill_missing_rides_full_range
+
+
+def legacy_fill_missing_rides_full_range(df, hour_col, station_col, rides_col):
+    df[hour_col] = pd.to_datetime(df[hour_col])
+    all_hours = pd.date_range(df[hour_col].min(), df[hour_col].max(), freq="h")
+    all_stations = df[station_col].unique()
+
+    complete_grid = pd.DataFrame(
+        [(h, s) for h in all_hours for s in all_stations],
+        columns=[hour_col, station_col]
+    )
+
+    merged = complete_grid.merge(df, on=[hour_col, station_col], how="left")
+    merged[rides_col] = merged[rides_col].fillna(0).astype(int)
+    return merged
+
+
+def make_hourly_counts(n_hours: int, n_stations: int, density: float, seed: int = 42) -> pd.DataFrame:
+    """
+    Sparse long-format hourly counts: each (hour, station) cell is present with probability `density`.
+    """
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2014-01-01", periods=n_hours, freq="h")
+    stations = np.array([f"Station {i:04d}" for i in range(n_stations)], dtype=object)
+    hour_idx, station_idx = np.nonzero(rng.random((n_hours, n_stations)) < density)
+    return pd.DataFrame({
+        "pickup_hour": hours[hour_idx],
+        "start_station_name": stations[station_idx],
+        "rides": rng.integers(1, 20, size=len(hour_idx)),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, default=8760)
+    parser.add_argument("--stations", type=int, nargs="+", default=[10, 100, 800])
+    parser.add_argument("--density", type=float, default=0.4)
+    args = parser.parse_args()
+
+    print(f"{'stations':>8} {'cells':>11} {'legacy s':>9} {'legacy MB':>10} {'new s':>7} {'new MB':>7} {'speedup':>8}")
+    for n_stations in args.stations:
+        counts = make_hourly_counts(args.hours, n_stations, args.density)
+        cols = ("pickup_hour", "start_station_name", "rides")
+
+        expected, legacy = measure(legacy_fill_missing_rides_full_range, counts.copy(), *cols)
+        result, new = measure(fill_missing_rides_full_range, counts.copy(), *cols)
+        pd.testing.assert_frame_equal(expected, result, check_dtype=False)
+
+        print(
+            f"{n_stations:>8} {len(result):>11,} {legacy['seconds']:>9.2f} {legacy['peak_mb']:>10.1f} "
+            f"{new['seconds']:>7.3f} {new['peak_mb']:>7.1f} {legacy['seconds'] / new['seconds']:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
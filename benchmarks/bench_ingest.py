@@ -0,0 +1,55 @@
+"""
+Compare the full-read, streaming and warm-cache modes of load_and_process_citibike_data.
+
+    python -m benchmarks.bench_ingest --trips-per-month 500000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.profiling import measure
+from benchmarks.synthetic import write_synthetic_year
+from src.data_utils import TripCache, load_and_process_citibike_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--year", type=int, default=2014)
+    parser.add_argument("--stations", type=int, default=300)
+    parser.add_argument("--trips-per-month", type=int, default=250_000)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache_dir:
+        data_dir = Path(tmp)
+        write_synthetic_year(data_dir, args.year, args.stations, args.trips_per_month)
+        print(f"Synthetic year: 12 x {args.trips_per_month:,} trips, {args.stations} stations")
+
+        full, full_stats = measure(load_and_process_citibike_data, args.year, data_dir=data_dir)
+        streamed, stream_stats = measure(
+            load_and_process_citibike_data, args.year, chunksize=args.chunksize, data_dir=data_dir
+        )
+        cache = TripCache(cache_dir)
+        load_and_process_citibike_data(args.year, data_dir=data_dir, cache=cache)
+        cached, cache_stats = measure(
+            load_and_process_citibike_data, args.year, data_dir=data_dir, cache=cache
+        )
+
+    assert len(full) == len(streamed)
+    assert (full["start_station_name"] == streamed["start_station_name"].astype(object)).all()
+
+    runs = [
+        ("full read", full_stats, full),
+        ("streaming", stream_stats, streamed),
+        ("warm cache", cache_stats, cached),
+    ]
+    for label, stats, df in runs:
+        result_mb = df.memory_usage(deep=True).sum() / 2**20
+        print(
+            f"{label:>10}: {stats['seconds']:7.2f}s  peak {stats['peak_mb']:8.1f} MB  "
+            f"result {result_mb:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
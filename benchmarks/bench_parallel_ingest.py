@@ -0,0 +1,44 @@
+"""
+Compare the serial raw-to-hourly rebuild against load_hourly_ts at several worker counts.
+
+    python -m benchmarks.bench_parallel_ingest --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.profiling import measure
+from benchmarks.synthetic import write_synthetic_year
+from src.data_utils import load_and_process_citibike_data, load_hourly_ts, transform_to_hourly_ts
+
+
+def serial_hourly_ts(year: int, data_dir: Path) -> pd.DataFrame:
+    return transform_to_hourly_ts(load_and_process_citibike_data(year, data_dir=data_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--year", type=int, default=2014)
+    parser.add_argument("--stations", type=int, default=300)
+    parser.add_argument("--trips-per-month", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        write_synthetic_year(data_dir, args.year, args.stations, args.trips_per_month)
+
+        expected, stats = measure(serial_hourly_ts, args.year, data_dir)
+        print(f"{'serial':>10}: {stats['seconds']:7.2f}s")
+
+        for n_workers in sorted(set(args.workers)):
+            result, stats = measure(load_hourly_ts, args.year, n_workers=n_workers, data_dir=data_dir)
+            pd.testing.assert_frame_equal(expected, result)
+            print(f"{n_workers:>2} workers: {stats['seconds']:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
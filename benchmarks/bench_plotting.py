@@ -0,0 +1,95 @@
+"""
+Figure construction time and JSON payload size for station charts: the
+legacy one-figure-per-station plot_aggregated_time_series against one
+batched, LTTB-downsampled WebGL figure from plot_stations.
+
+    python -m benchmarks.bench_plotting --stations 1 10 50 --points 200
+"""
+import argparse
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from benchmarks.profiling import measure
+from src.plot_utils import StationSeries, plot_stations
+
+
+def legacy_plot_aggregated_time_series(features, targets, row_id, predictions=None):
+    station_features = features[features["start_station_name"] == row_id].iloc[0]
+    actual_target = targets[features["start_station_name"] == row_id].values[0]
+
+    lag_cols = [col for col in features.columns if col.startswith("rides_t-")]
+    lag_values = station_features[lag_cols].values.tolist()
+
+    pickup_hour = pd.to_datetime(station_features["pickup_hour"])
+    time_series_dates = pd.date_range(
+        start=pickup_hour - timedelta(hours=len(lag_cols)),
+        periods=len(lag_cols) + 1,
+        freq="h"
+    )
+    values = lag_values + [actual_target]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=time_series_dates, y=values, mode="lines+markers", name="Actual",
+        line=dict(color="green"), marker=dict(size=6)
+    ))
+    if predictions is not None:
+        predicted_value = predictions[features["start_station_name"] == row_id].values[0]
+        fig.add_trace(go.Scatter(
+            x=[pickup_hour], y=[predicted_value], mode="markers",
+            marker=dict(color="red", size=10, symbol="x"), name="Prediction"
+        ))
+    fig.update_layout(
+        title=f"⏱️ Station: {row_id} | Hour: {pickup_hour}",
+        xaxis_title="Time", yaxis_title="Ride Counts", template="plotly_white"
+    )
+    return fig
+
+
+def make_features(n_stations: int, n_lags: int = 672, seed: int = 42) -> pd.DataFrame:
+    """
+    Inference rows shaped like load_batch_of_features_from_store output.
+    """
+    rng = np.random.default_rng(seed)
+    lags = rng.poisson(4, size=(n_stations, n_lags)).astype(np.int32)
+    features = pd.DataFrame(lags, columns=[f"rides_t-{n_lags - i}" for i in range(n_lags)])
+    features["start_station_name"] = [f"Station {i:04d}" for i in range(n_stations)]
+    features["pickup_hour"] = pd.Timestamp("2025-01-01 10:00", tz="UTC")
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stations", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--total-stations", type=int, default=2_000, help="Rows in the feature frame")
+    parser.add_argument("--points", type=int, default=200, help="LTTB points per line")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    features = make_features(args.total_stations)
+    rng = np.random.default_rng(0)
+    targets = pd.Series(rng.poisson(4, len(features)))
+    predictions = pd.Series(rng.poisson(4, len(features)).astype(float))
+    series = StationSeries(features, targets, predictions)
+
+    def legacy(stations):
+        return [legacy_plot_aggregated_time_series(features, targets, s, predictions) for s in stations]
+
+    def batched(stations):
+        return [plot_stations(series, stations, max_points=args.points)]
+
+    print(f"{'stations':>8} {'path':>8} {'build s':>9} {'json s':>8} {'payload KB':>11}")
+    for n_stations in args.stations:
+        stations = list(features["start_station_name"].iloc[:n_stations])
+        for name, fn in (("legacy", legacy), ("batched", batched)):
+            figures, build = measure(fn, stations, repeat=args.repeat)
+            payloads, dump = measure(lambda figs: [fig.to_json() for fig in figs], figures, repeat=args.repeat)
+            size_kb = sum(len(p) for p in payloads) / 1024
+            print(f"{n_stations:>8} {name:>8} {build['seconds']:>9.3f} {dump['seconds']:>8.3f} {size_kb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
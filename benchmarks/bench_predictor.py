@@ -0,0 +1,70 @@
+"""
+Per-row latency and throughput of LGBMRegressor.predict on a DataFrame (what
+the pipelines do today) against FastPredictor on a DataFrame and on a
+prepared float32 array.
+
+    python -m benchmarks.bench_predictor --rows 1 1000 1000000
+"""
+import argparse
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from benchmarks.profiling import measure
+from src.fast_predictor import FastPredictor
+from src.lag_features import LAG_COLUMNS
+
+
+def make_lag_features(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Daily lag features shaped like citibike_daily_lagged (integer counts).
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        rng.poisson(120, size=(n_rows, len(LAG_COLUMNS))).astype(np.float64), columns=LAG_COLUMNS
+    )
+
+
+def train_model(n_rows: int = 50_000, n_estimators: int = 100) -> lgb.LGBMRegressor:
+    X = make_lag_features(n_rows, seed=0)
+    y = X[LAG_COLUMNS[:7]].mean(axis=1) + np.random.default_rng(1).normal(0, 5, n_rows)
+    # Same settings as pipelines/model_pipeline.py
+    model = lgb.LGBMRegressor(n_estimators=n_estimators, learning_rate=0.1, random_state=42, verbose=-1)
+    return model.fit(X, y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    model = train_model()
+    fast = FastPredictor(model, n_threads=args.threads)
+
+    print(f"{'rows':>9} {'path':>12} {'s':>9} {'us/row':>9} {'rows/s':>12} {'max diff':>9}")
+    for n_rows in args.rows:
+        X = make_lag_features(n_rows)
+        X32 = fast.to_matrix(X)
+        repeat = args.repeat if n_rows < 100_000 else 1
+
+        expected, base = measure(model.predict, X, repeat=repeat)
+        paths = [("sklearn", expected, base)]
+        for name, data in (("fast df", X), ("fast array", X32)):
+            result, stats = measure(fast.predict, data, repeat=repeat)
+            paths.append((name, result, stats))
+
+        for name, result, stats in paths:
+            diff = float(np.max(np.abs(result - expected)))
+            assert diff <= args.tolerance * max(1.0, float(np.max(np.abs(expected)))), (name, diff)
+            print(
+                f"{n_rows:>9,} {name:>12} {stats['seconds']:>9.4f} "
+                f"{stats['seconds'] / n_rows * 1e6:>9.2f} {n_rows / stats['seconds']:>12,.0f} {diff:>9.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
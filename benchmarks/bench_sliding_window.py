@@ -0,0 +1,94 @@
+"""
+Compare the legacy per-station loop of sliding_window_features against the
+stride-tricks engine (long format and StationHourMatrix input).
+
+    python -m benchmarks.bench_sliding_window --stations 1 100 1000 --window 672
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.profiling import measure
+from src.data_utils import sliding_window_features
+from src.station_matrix import StationHourMatrix
+
+
+def legacy_sliding_window_features(df, feature_col="rides", window_size=12, step_size=1):
+    stations = df["start_station_name"].unique()
+    all_data = []
+
+    for station in stations:
+        station_df = df[df["start_station_name"] == station].reset_index(drop=True)
+        values = station_df[feature_col].values
+        timestamps = station_df["pickup_hour"].values
+
+        if len(values) <= window_size:
+            continue
+
+        rows = []
+        for i in range(0, len(values) - window_size, step_size):
+            features = values[i:i + window_size]
+            target = values[i + window_size]
+            time = timestamps[i + window_size]
+            rows.append(np.append(features, [target, station, time]))
+
+        if rows:
+            columns = [f"{feature_col}_t-{window_size - i}" for i in range(window_size)]
+            df_transformed = pd.DataFrame(rows, columns=columns + ["target", "start_station_name", "pickup_hour"])
+            all_data.append(df_transformed)
+
+    return pd.concat(all_data, ignore_index=True)
+
+
+def make_hourly_ts(n_stations: int, n_hours: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Dense hourly counts in the long format produced by transform_to_hourly_ts.
+    """
+    rng = np.random.default_rng(seed)
+    matrix = StationHourMatrix(
+        rng.poisson(3, size=(n_stations, n_hours)),
+        [f"Station {i:04d}" for i in range(n_stations)],
+        pd.Timestamp("2014-01-01"),
+    )
+    return matrix.to_long()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--hours", type=int, default=24 * 35)
+    parser.add_argument("--window", type=int, default=24 * 28)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--skip-legacy-above", type=int, default=1000,
+                        help="Skip the legacy engine for larger station counts")
+    args = parser.parse_args()
+    kwargs = dict(feature_col="rides", window_size=args.window, step_size=args.step)
+
+    print(f"{'stations':>8} {'rows':>9} {'legacy s':>9} {'legacy MB':>10} {'new s':>7} {'new MB':>7} {'matrix s':>9} {'speedup':>8}")
+    for n_stations in args.stations:
+        ts = make_hourly_ts(n_stations, args.hours)
+        matrix = StationHourMatrix.from_long(ts)
+
+        result, new = measure(sliding_window_features, ts, **kwargs)
+        from_matrix, wide = measure(sliding_window_features, matrix, **kwargs)
+        pd.testing.assert_frame_equal(result, from_matrix)
+
+        if n_stations <= args.skip_legacy_above:
+            expected, legacy = measure(legacy_sliding_window_features, ts, **kwargs)
+            assert list(expected.columns) == list(result.columns)
+            assert np.array_equal(expected.iloc[:, :args.window + 1].to_numpy(dtype=np.int64),
+                                  result.iloc[:, :args.window + 1].to_numpy(dtype=np.int64))
+            legacy_s, legacy_mb = f"{legacy['seconds']:.2f}", f"{legacy['peak_mb']:.1f}"
+            speedup = f"{legacy['seconds'] / new['seconds']:.0f}x"
+        else:
+            legacy_s = legacy_mb = speedup = "-"
+
+        print(
+            f"{n_stations:>8} {len(result):>9,} {legacy_s:>9} {legacy_mb:>10} "
+            f"{new['seconds']:>7.3f} {new['peak_mb']:>7.1f} {wide['seconds']:>9.3f} {speedup:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
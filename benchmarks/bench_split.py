@@ -0,0 +1,73 @@
+"""
+Peak memory and time of splitting a wide sliding-window dataset: the original
+split_ts_data (mutate, mask, reset_index, drop), the current split_ts_data,
+and TimeSeriesDataset building once and slicing several rolling folds.
+
+    python -m benchmarks.bench_split --stations 50 --hours 2700 --window 672
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.profiling import measure
+from src.data_utils import TimeSeriesDataset, sliding_window_features, split_ts_data
+from src.station_matrix import StationHourMatrix
+
+
+def legacy_split_ts_data(df, cutoff, target_col="target"):
+    df["pickup_hour"] = pd.to_datetime(df["pickup_hour"])
+    train = df[df["pickup_hour"] < cutoff].reset_index(drop=True)
+    test = df[df["pickup_hour"] >= cutoff].reset_index(drop=True)
+
+    X_train = train.drop(columns=[target_col])
+    y_train = train[target_col]
+    X_test = test.drop(columns=[target_col])
+    y_test = test[target_col]
+
+    return X_train, y_train, X_test, y_test
+
+
+def dataset_folds(df, cutoffs, horizon):
+    dataset = TimeSeriesDataset.from_frame(df)
+    return dataset, dataset.rolling_folds(cutoffs, horizon)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=2700)
+    parser.add_argument("--window", type=int, default=24 * 28)
+    parser.add_argument("--folds", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    matrix = StationHourMatrix(
+        rng.poisson(3, size=(args.stations, args.hours)),
+        [f"Station {i:04d}" for i in range(args.stations)],
+        pd.Timestamp("2014-01-01"),
+    )
+    df = sliding_window_features(matrix, "rides", args.window, 1)
+    print(f"dataset: {len(df):,} rows x {df.shape[1]} columns, {df.memory_usage().sum() / 2**20:.0f} MB")
+
+    last = df["pickup_hour"].max()
+    horizon = pd.Timedelta(days=7)
+    cutoffs = [last - horizon * k for k in range(args.folds, 0, -1)]
+
+    rows = []
+    _, legacy = measure(lambda: [legacy_split_ts_data(df.copy(), c) for c in cutoffs])
+    rows.append(("legacy split_ts_data", legacy))
+    _, current = measure(lambda: [split_ts_data(df, c) for c in cutoffs])
+    rows.append(("split_ts_data", current))
+    _, dataset = measure(dataset_folds, df, cutoffs, horizon)
+    rows.append(("TimeSeriesDataset", dataset))
+
+    print(f"{args.folds} cutoffs")
+    print(f"{'path':>22} {'s':>7} {'peak MB':>8}")
+    for name, stats in rows:
+        print(f"{name:>22} {stats['seconds']:>7.2f} {stats['peak_mb']:>8.0f}")
+    print("(legacy figures include the input copy it needs to stay side-effect free)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Demand-map build time against trip volume: deriving stations from the raw
+trips on every render (what a map would need without the station table)
+against the cached GeoJSON layer built from the station table.
+
+    python -m benchmarks.bench_station_map --trips-per-month 10000 100000 1000000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.profiling import measure
+from benchmarks.synthetic import write_synthetic_year
+from src.data_utils import extract_station_metadata
+from src.map_utils import demand_map
+from src.stations import read_stations, stations_geojson
+
+
+def stations_from_trips(raw_dir: Path) -> pd.DataFrame:
+    trips = pd.concat(pd.read_csv(file) for file in sorted(raw_dir.glob("*.csv")))
+    stations = trips.drop_duplicates("start station id")
+    return pd.DataFrame({
+        "station_id": stations["start station id"].to_numpy(),
+        "station_name": stations["start station name"].to_numpy(),
+        "latitude": stations["start station latitude"].to_numpy(),
+        "longitude": stations["start station longitude"].to_numpy(),
+    })
+
+
+def render(layer: str, predictions: pd.DataFrame) -> str:
+    return demand_map(layer, predictions).get_root().render()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trips-per-month", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--stations", type=int, default=330)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'trips':>10} {'extract s':>10} {'from trips s':>13} {'cached layer s':>15} {'html KB':>8}")
+    for n_trips in args.trips_per_month:
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_dir = Path(tmp) / "raw"
+            write_synthetic_year(raw_dir, 2014, args.stations, n_trips, months=[1])
+
+            table, extract = measure(extract_station_metadata, 2014, raw_dir, Path(tmp) / "stations.parquet", repeat=1)
+            predictions = pd.DataFrame({
+                "start_station_name": table["station_name"],
+                "predicted_demand": np.random.default_rng(0).poisson(20, len(table)).astype(float),
+            })
+
+            _, legacy = measure(
+                lambda: render(stations_geojson(stations_from_trips(raw_dir)), predictions), repeat=args.repeat
+            )
+            layer = stations_geojson(read_stations(Path(tmp) / "stations.parquet"))
+            html, cached = measure(render, layer, predictions, repeat=args.repeat)
+
+        print(
+            f"{n_trips:>10,} {extract['seconds']:>10.3f} {legacy['seconds']:>13.3f} "
+            f"{cached['seconds']:>15.3f} {len(html) / 1024:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput of the streaming trip-event consumer (src/streaming.py) on the
+in-process broker: decode, hourly counting, hour closes with next-hour
+predictions, and batched writes to a local feature store.
+
+    python -m benchmarks.bench_streaming --days 14 --stations 300
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_month_trips, make_stations
+from src.data_utils import sliding_window_features
+from src.feature_sink import FeatureGroupSink
+from src.local_feature_store import LocalFeatureStore
+from src.pipeline_utils import get_pipeline
+from src.station_matrix import StationHourMatrix
+from src.streaming import N_LAGS, InProcessBroker, TripStreamProcessor, publish_trips
+
+TOPIC = "trip-starts"
+
+
+def make_trips(n_stations: int, trips_per_day: int, seed: int = 42) -> pd.DataFrame:
+    """
+    One month of cleaned trips (['starttime', 'start_station_name']).
+    """
+    stations = make_stations(n_stations, seed)
+    month = make_month_trips(2014, 1, stations, trips_per_day * 31, seed)
+    return month[["starttime", "start station name"]].rename(
+        columns={"start station name": "start_station_name"}
+    )
+
+
+def train_hourly_model(trips: pd.DataFrame, n_estimators: int):
+    """
+    Small hourly model on N_LAGS-hour windows (needs more than 28 days of
+    trips), so predictions cost what they would in production.
+    """
+    windows = sliding_window_features(StationHourMatrix.from_trips(trips), "rides", N_LAGS, step_size=24)
+    return get_pipeline(n_estimators=n_estimators, verbose=-1).fit(
+        windows.drop(columns=["target"]), windows["target"]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=14, help="Days of events streamed (at most 31)")
+    parser.add_argument("--stations", type=int, default=300)
+    parser.add_argument("--trips-per-day", type=int, default=30_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--trees", type=int, default=20)
+    parser.add_argument("--no-model", action="store_true", help="Only count and write hours")
+    parser.add_argument("--target", type=float, default=10_000, help="Required events/sec")
+    args = parser.parse_args()
+
+    month = make_trips(args.stations, args.trips_per_day)
+    model = None if args.no_model else train_hourly_model(month, args.trees)
+    trips = month[month["starttime"] < pd.Timestamp("2014-01-01") + pd.Timedelta(days=args.days)]
+
+    broker = InProcessBroker()
+    start = time.perf_counter()
+    publish_trips(broker, trips, TOPIC)
+    print(f"Published {len(trips):,} events in {time.perf_counter() - start:.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fs = LocalFeatureStore(tmp)
+        key = ["pickup_hour", "start_station_name"]
+        fg_hourly = fs.get_or_create_feature_group("hourly_rides", 1, key, "pickup_hour")
+        fg_pred = fs.get_or_create_feature_group("hourly_predictions", 1, key, "pickup_hour")
+
+        consumer = broker.consumer("bench")
+        consumer.subscribe([TOPIC])
+        processor = TripStreamProcessor(
+            consumer,
+            model=model,
+            hourly_sink=FeatureGroupSink(fg_hourly),
+            prediction_sink=FeatureGroupSink(fg_pred),
+            batch_size=args.batch_size,
+            poll_timeout=0,
+        )
+        start = time.perf_counter()
+        processor.run(max_idle_polls=1)
+        processor.close()
+        elapsed = time.perf_counter() - start
+        metrics = processor.metrics()
+        rows_written = len(fg_hourly.read())
+
+    rate = metrics["events"] / elapsed
+    print(
+        f"Consumed {metrics['events']:,} events in {elapsed:.2f} s ({rate:,.0f} events/s, "
+        f"{metrics['events_per_second']:,.0f} events/s in the consume loop)"
+    )
+    print(
+        f"Hours closed {metrics['hours_closed']}, predictions {metrics['predictions']:,}, "
+        f"hourly rows written {rows_written:,}, late {metrics['late_events']}, open hours {metrics['open_hours']}"
+    )
+    print(f"{'✅' if rate >= args.target else '❌'} target {args.target:,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
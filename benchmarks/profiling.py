@@ -0,0 +1,30 @@
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+
+def measure(fn: Callable, *args, repeat: int = 1, **kwargs) -> Tuple[Any, Dict[str, float]]:
+    """
+    Time a call and record its peak Python/NumPy heap usage.
+
+    Wall time is the best of `repeat` untraced runs; peak memory comes from a
+    separate run under tracemalloc so tracing overhead does not skew timings.
+
+    Returns:
+        (result of the last call, {"seconds": ..., "peak_mb": ...})
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    tracemalloc.start()
+    try:
+        result = fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, {"seconds": best, "peak_mb": peak / 2**20}
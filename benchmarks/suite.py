@@ -0,0 +1,160 @@
+"""
+End-to-end benchmark of the training/inference hot paths on synthetic trips.
+
+Every stage is timed (best of --repeat) and memory-profiled, and the results
+are written as JSON. With --compare, stages that got slower or hungrier than
+a stored baseline are flagged and the exit code is 1.
+
+    python -m benchmarks.suite --out baseline.json
+    python -m benchmarks.suite --out current.json --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.profiling import measure
+from benchmarks.synthetic import write_synthetic_year
+from src.data_utils import (
+    fill_missing_rides_full_range,
+    load_and_process_citibike_data,
+    sliding_window_features,
+    split_ts_data,
+    transform_to_hourly_ts,
+)
+from src.pipeline_utils import FeatureAssembler, get_pipeline
+
+STAGES = [
+    "load_and_process_citibike_data",
+    "transform_to_hourly_ts",
+    "fill_missing_rides_full_range",
+    "sliding_window_features",
+    "split_ts_data",
+    "pipeline_utils.FeatureAssembler",
+    "model.predict",
+]
+
+
+def run_suite(args) -> Dict[str, object]:
+    results: Dict[str, dict] = {}
+
+    def stage(name: str, fn, *fn_args, **fn_kwargs):
+        result, stats = measure(fn, *fn_args, repeat=args.repeat, **fn_kwargs)
+        rows = len(result[0]) if isinstance(result, tuple) else len(result)
+        results[name] = {"seconds": stats["seconds"], "peak_mb": stats["peak_mb"], "rows": rows}
+        print(f"{name:>34} {stats['seconds']:>8.3f} s {stats['peak_mb']:>8.1f} MB {rows:>11,} rows")
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_year(
+            Path(tmp), args.year, args.stations, args.trips_per_month,
+            months=list(range(1, args.months + 1)), seed=args.seed,
+        )
+        trips = stage("load_and_process_citibike_data", load_and_process_citibike_data, args.year, data_dir=Path(tmp))
+
+    hourly = stage("transform_to_hourly_ts", transform_to_hourly_ts, trips)
+    del trips
+    filled = stage(
+        "fill_missing_rides_full_range", fill_missing_rides_full_range,
+        hourly, "pickup_hour", "start_station_name", "rides",
+    )
+    windows = stage(
+        "sliding_window_features", sliding_window_features,
+        filled, "rides", window_size=args.window, step_size=args.step,
+    )
+    cutoff = windows["pickup_hour"].max() - pd.Timedelta(days=7)
+    X_train, y_train, X_test, _ = stage("split_ts_data", split_ts_data, windows, cutoff)
+    stage("pipeline_utils.FeatureAssembler", FeatureAssembler().transform, X_test)
+
+    model = get_pipeline(n_estimators=args.trees, verbose=-1).fit(X_train, y_train)
+    stage("model.predict", lambda X: pd.Series(model.predict(X)), X_test)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "lightgbm": lgb.__version__,
+            "sklearn": sklearn.__version__,
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "time_threshold", "memory_threshold")},
+        },
+        "stages": results,
+    }
+
+
+def compare(current: dict, baseline: dict, time_threshold: float, memory_threshold: float) -> List[str]:
+    """
+    Print current vs baseline per stage and return the regressions found.
+    """
+    if current["meta"]["params"] != baseline["meta"]["params"]:
+        print("⚠️  Benchmark parameters differ from the baseline; ratios may not be comparable")
+
+    regressions = []
+    print(f"\n{'stage':>34} {'time x':>8} {'memory x':>9}")
+    for name in STAGES:
+        if name not in current["stages"] or name not in baseline["stages"]:
+            continue
+        cur, base = current["stages"][name], baseline["stages"][name]
+        time_ratio = cur["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        memory_ratio = cur["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+
+        flags = []
+        if time_ratio > 1 + time_threshold:
+            flags.append("SLOWER")
+        if memory_ratio > 1 + memory_threshold:
+            flags.append("MORE MEMORY")
+        if flags:
+            regressions.append(f"{name}: {', '.join(flags)} (time x{time_ratio:.2f}, memory x{memory_ratio:.2f})")
+        print(f"{name:>34} {time_ratio:>8.2f} {memory_ratio:>9.2f} {' '.join(flags)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--year", type=int, default=2014)
+    parser.add_argument("--months", type=int, default=2)
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--trips-per-month", type=int, default=100_000)
+    parser.add_argument("--window", type=int, default=24 * 28)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=Path, help="Write results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to check for regressions")
+    parser.add_argument("--time-threshold", type=float, default=0.25,
+                        help="Flag stages slower than baseline by more than this fraction")
+    parser.add_argument("--memory-threshold", type=float, default=0.10,
+                        help="Flag stages whose peak memory grew by more than this fraction")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.time_threshold, args.memory_threshold
+        )
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
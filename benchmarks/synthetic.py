@@ -0,0 +1,117 @@
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Header of the 2014 Citi Bike monthly trip files
+CITIBIKE_COLUMNS = [
+    "tripduration",
+    "starttime",
+    "stoptime",
+    "start station id",
+    "start station name",
+    "start station latitude",
+    "start station longitude",
+    "end station id",
+    "end station name",
+    "end station latitude",
+    "end station longitude",
+    "bikeid",
+    "usertype",
+    "birth year",
+    "gender",
+]
+
+
+def make_stations(n_stations: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a deterministic station dimension laid out on a Manhattan-like grid.
+
+    Returns:
+        pd.DataFrame with ['station_id', 'station_name', 'latitude', 'longitude']
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(72, 72 + n_stations)
+    names = [f"E {i // 12 + 1} St & {i % 12 + 1} Av" for i in range(n_stations)]
+    return pd.DataFrame({
+        "station_id": ids,
+        "station_name": names,
+        "latitude": 40.70 + rng.random(n_stations) * 0.10,
+        "longitude": -74.02 + rng.random(n_stations) * 0.07,
+    })
+
+
+def make_month_trips(
+    year: int,
+    month: int,
+    stations: pd.DataFrame,
+    n_trips: int,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Generate one month of trips in the raw Citi Bike schema.
+
+    Station popularity follows a Zipf-like curve so a few stations dominate,
+    as in the real data.
+    """
+    rng = np.random.default_rng([seed, year, month])
+    month_start = pd.Timestamp(year=year, month=month, day=1)
+    month_seconds = int((month_start + pd.offsets.MonthBegin(1) - month_start).total_seconds())
+
+    weights = 1.0 / np.arange(1, len(stations) + 1)
+    weights /= weights.sum()
+    start_idx = rng.choice(len(stations), size=n_trips, p=weights)
+    end_idx = rng.choice(len(stations), size=n_trips, p=weights)
+
+    offsets = np.sort(rng.integers(0, month_seconds, size=n_trips))
+    starttime = month_start + pd.to_timedelta(offsets, unit="s")
+    duration = rng.integers(60, 3600, size=n_trips)
+    stoptime = starttime + pd.to_timedelta(duration, unit="s")
+
+    start = stations.iloc[start_idx]
+    end = stations.iloc[end_idx]
+    return pd.DataFrame({
+        "tripduration": duration,
+        "starttime": starttime,
+        "stoptime": stoptime,
+        "start station id": start["station_id"].to_numpy(),
+        "start station name": start["station_name"].to_numpy(),
+        "start station latitude": start["latitude"].to_numpy(),
+        "start station longitude": start["longitude"].to_numpy(),
+        "end station id": end["station_id"].to_numpy(),
+        "end station name": end["station_name"].to_numpy(),
+        "end station latitude": end["latitude"].to_numpy(),
+        "end station longitude": end["longitude"].to_numpy(),
+        "bikeid": rng.integers(14529, 21690, size=n_trips),
+        "usertype": np.where(rng.random(n_trips) < 0.9, "Subscriber", "Customer"),
+        "birth year": rng.integers(1940, 2000, size=n_trips),
+        "gender": rng.integers(0, 3, size=n_trips),
+    }, columns=CITIBIKE_COLUMNS)
+
+
+def write_synthetic_year(
+    out_dir: Path,
+    year: int = 2014,
+    n_stations: int = 300,
+    trips_per_month: int = 250_000,
+    months: Optional[List[int]] = None,
+    seed: int = 42,
+) -> List[Path]:
+    """
+    Write monthly `{year}-{MM}.csv` files that load_and_process_citibike_data can read.
+
+    Returns:
+        List of written CSV paths
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stations = make_stations(n_stations, seed)
+
+    paths = []
+    for month in months or range(1, 13):
+        trips = make_month_trips(year, month, stations, trips_per_month, seed)
+        path = out_dir / f"{year}-{month:02d}.csv"
+        trips.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        paths.append(path)
+    return paths
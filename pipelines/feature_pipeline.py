@@ -1,61 +1,132 @@
+import argparse
+import sys
+from pathlib import Path
+
 import pandas as pd
-import hopsworks
 
-# -----------------------------
-# Step 1: Connect to Hopsworks
-# -----------------------------
-import os
-project = hopsworks.login(
-    project=os.getenv("CDA500FINAL"),
-    api_key_value=os.getenv("HB0zAW5eEzl4iuNq.KJX5bZAdAnGaRJrIFVFVB30exr8wMMql5TZUuNMVeMUbcOVqRXg0fW3OWz2aRzOi")
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import src.config as config
+from src.feature_sink import FeatureGroupSink
+from src.feature_store import get_feature_store, per_station_since
+from src.instrumentation import frame_bytes, stage, start_run
+from src.lag_features import (
+    advance_watermarks,
+    build_lag_matrix,
+    daily_trip_counts,
+    incremental_lag_rows,
+    station_watermarks,
 )
 
-fs = project.get_feature_store()
+parser = argparse.ArgumentParser(description="Build daily lag features for Citi Bike stations.")
+parser.add_argument(
+    "--full", action="store_true",
+    help="Recompute lag features for all history instead of only the new days",
+)
+args = parser.parse_args()
+start_run("feature_pipeline")
 
 # -----------------------------
-# Step 2: Load top 3 station data
+# Step 1: Connect to the feature store (Hopsworks or local, see FEATURE_STORE_BACKEND)
 # -----------------------------
-fg_raw = fs.get_feature_group("citibike_2014_top3", version=1)
-df = fg_raw.read()
+with stage("connect"):
+    fs = get_feature_store()
+    fg_raw = fs.get_feature_group("citibike_2014_top3", version=1)
 
 # -----------------------------
-# Step 3: Prepare daily trip counts
+# Step 2: Find the last processed date per station
 # -----------------------------
-df['starttime'] = pd.to_datetime(df['starttime'])
-df['date'] = df['starttime'].dt.date
-
-daily_counts = (
-    df.groupby(['start_station_name', 'date'])
-    .size()
-    .reset_index(name='trip_count')
-    .sort_values(['start_station_name', 'date'])
-)
+watermarks = pd.Series(dtype="datetime64[ns]")
+if not args.full:
+    with stage("read_watermarks") as s:
+        try:
+            fg_existing = fs.get_feature_group(config.FEATURE_GROUP_NAME, version=config.FEATURE_GROUP_VERSION)
+        except LookupError as e:
+            print(f"⚠️ No existing lag features found ({e}), running a full rebuild.")
+        else:
+            try:
+                fg_watermarks = fs.get_feature_group(config.WATERMARK_GROUP_NAME, config.WATERMARK_GROUP_VERSION)
+                keys = fg_watermarks.read()
+            except LookupError:
+                # Lag features written before the watermark group existed: derive it from the keys once
+                print("⚠️ No watermark group yet, reading the lag feature keys.")
+                keys = fg_existing.select(["start_station_name", "date"]).read()
+            watermarks = station_watermarks(keys)
+            s.rows, s.bytes_read = len(keys), frame_bytes(keys)
 
-# -----------------------------
-# Step 4: Create 28-day lag features
-# -----------------------------
-for lag in range(1, 29):
-    daily_counts[f'lag_{lag}'] = (
-        daily_counts.groupby('start_station_name')['trip_count'].shift(lag)
-    )
+if watermarks.empty:
+    # -----------------------------
+    # Step 3a: Full rebuild from all raw trips
+    # -----------------------------
+    with stage("read_trips", mode="full") as s:
+        df = fg_raw.read()
+        s.rows, s.bytes_read = len(df), frame_bytes(df)
+
+    with stage("build_lags", mode="full") as s:
+        daily_counts = daily_trip_counts(df)
 
-# Drop rows with incomplete lag history
-daily_lagged = daily_counts.dropna().reset_index(drop=True)
+        # Create 28-day lag features, dropping rows with incomplete lag history
+        daily_lagged = build_lag_matrix(daily_counts).dropna().reset_index(drop=True)
+        s.rows = len(daily_lagged)
+else:
+    # -----------------------------
+    # Step 3b: Incremental update from the watermarks on
+    # -----------------------------
+    latest = watermarks.max()
+    behind = watermarks[watermarks < latest]
+    print(f"🔁 Incremental update from {latest.date()} for {len(watermarks)} stations ({len(behind)} behind)")
 
-# Add timestamp column for Hopsworks event_time
-daily_lagged['date'] = pd.to_datetime(daily_lagged['date'])
+    with stage("read_trips", mode="incremental") as s:
+        # 28 days of state per station: the lag columns of its watermark row
+        state = fg_existing.filter(per_station_since(fg_existing, "date", watermarks, exact=True)).read()
+
+        # Trips from each station's own watermark on; stations that are up to date
+        # (and stations not seen before) share the latest watermark
+        trips_filter = fg_raw.starttime >= latest
+        if not behind.empty:
+            trips_filter = trips_filter | per_station_since(fg_raw, "starttime", behind)
+        new_trips = fg_raw.filter(trips_filter).read()
+        s.rows, s.bytes_read = len(new_trips), frame_bytes(state) + frame_bytes(new_trips)
+
+    with stage("build_lags", mode="incremental") as s:
+        daily_lagged = incremental_lag_rows(daily_trip_counts(new_trips), state, watermarks)
+
+        # Stations seen for the first time need their full history
+        new_stations = sorted(set(new_trips["start_station_name"]) - set(watermarks.index))
+        if new_stations:
+            history = fg_raw.filter(fg_raw.start_station_name.isin(new_stations)).read()
+            new_lagged = build_lag_matrix(daily_trip_counts(history)).dropna()
+            daily_lagged = pd.concat([daily_lagged, new_lagged], ignore_index=True)
+        s.rows = len(daily_lagged)
+
+print(f"📦 {len(daily_lagged)} lagged rows to upsert")
 
 # -----------------------------
-# Step 5: Write to Hopsworks Feature Store
+# Step 4: Write to Hopsworks Feature Store
 # -----------------------------
-fg_lagged = fs.get_or_create_feature_group(
-    name="citibike_daily_lagged",
-    version=1,
-    primary_key=["date", "start_station_name"],
-    event_time="date",
-    description="Daily trip counts with 28 lag features for top 3 stations"
-)
+with stage("write_features") as s:
+    fg_lagged = fs.get_or_create_feature_group(
+        name=config.FEATURE_GROUP_NAME,
+        version=config.FEATURE_GROUP_VERSION,
+        primary_key=["date", "start_station_name"],
+        event_time="date",
+        description="Daily trip counts with 28 lag features for top 3 stations"
+    )
 
-fg_lagged.insert(daily_lagged, write_options={"wait_for_job": True})
+    # Buffered, deduplicated batches; returns once uploaded, without waiting on the materialization job
+    with FeatureGroupSink(fg_lagged) as sink:
+        sink.write(daily_lagged)
+    s.rows, s.bytes_written = sink.metrics()["rows_written"], frame_bytes(daily_lagged)
+
+with stage("write_watermarks") as s:
+    fg_watermarks = fs.get_or_create_feature_group(
+        name=config.WATERMARK_GROUP_NAME,
+        version=config.WATERMARK_GROUP_VERSION,
+        primary_key=["start_station_name"],
+        description="Last lag-feature date per station, read by incremental feature runs"
+    )
+    new_watermarks = advance_watermarks(watermarks, daily_lagged)
+    if not new_watermarks.empty:
+        fg_watermarks.insert(new_watermarks, write_options={"wait_for_job": True})
+    s.rows = len(new_watermarks)
 
-print("✅ Feature engineering complete and stored in Hopsworks.")
+print(f"✅ Feature engineering complete and stored in the feature store. {sink.metrics()}")
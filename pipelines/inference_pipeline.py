@@ -1,58 +1,120 @@
+import argparse
+import sys
+from pathlib import Path
+
 import pandas as pd
-import hopsworks
 import joblib
-from datetime import timedelta
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import src.config as config
+from src.feature_store import HopsworksFeatureStore, get_feature_store
+from src.fast_predictor import FastPredictor
+from src.feature_sink import FeatureGroupSink
+from src.forecasting import MAX_DAILY_HORIZON, MAX_HOURLY_HORIZON, forecast_daily, forecast_hourly
+from src.inference import load_hourly_features_from_store
+from src.instrumentation import frame_bytes, stage, start_run
+from src.model_cache import ModelCache
+
+parser = argparse.ArgumentParser(description="Forecast daily Citi Bike trips per station.")
+parser.add_argument(
+    "--horizon", type=int, default=MAX_DAILY_HORIZON,
+    help=f"Days ahead to forecast (1-{MAX_DAILY_HORIZON})",
+)
+parser.add_argument(
+    "--fast", action="store_true",
+    help="Predict with the raw LightGBM booster on float32 arrays (see src/fast_predictor.py)",
+)
+parser.add_argument(
+    "--hourly-model", type=Path, default=None,
+    help="Pickled hourly model (see src/pipeline_utils.get_pipeline); also forecasts the next hours from the hourly rides",
+)
+parser.add_argument(
+    "--hourly-horizon", type=int, default=MAX_HOURLY_HORIZON,
+    help=f"Hours ahead to forecast with --hourly-model (1-{MAX_HOURLY_HORIZON})",
+)
+args = parser.parse_args()
+start_run("inference_pipeline")
 
 # -----------------------------
-# Step 1: Connect to Hopsworks
+# Step 1: Connect to the feature store (Hopsworks or local, see FEATURE_STORE_BACKEND)
 # -----------------------------
-project = hopsworks.login(project="CDA500FINAL")
-fs = project.get_feature_store()
-mr = project.get_model_registry()
+with stage("connect"):
+    fs = get_feature_store()
 
 # -----------------------------
 # Step 2: Load latest lag features
 # -----------------------------
-fg_lagged = fs.get_feature_group("citibike_daily_lagged", version=1)
-df = fg_lagged.read()
-df['date'] = pd.to_datetime(df['date'])
-
-# Get the most recent day's features
-latest_date = df['date'].max()
-today_data = df[df['date'] == latest_date]
+with stage("read_features") as s:
+    fg_lagged = fs.get_feature_group(config.FEATURE_GROUP_NAME, version=config.FEATURE_GROUP_VERSION)
+    df = fg_lagged.read()
+    df['date'] = pd.to_datetime(df['date'])
+    s.rows, s.bytes_read = len(df), frame_bytes(df)
 
 # -----------------------------
 # Step 3: Load registered model
 # -----------------------------
-model = mr.get_model("citibike_predictor", version=1)
-model_dir = model.download()
-model = joblib.load(f"{model_dir}/best_model.pkl")
+with stage("load_model"):
+    if isinstance(fs, HopsworksFeatureStore):
+        # Latest registered version; reuses the artifact already under models/registry_cache when it was fetched before
+        cache = ModelCache(registry=fs.get_model_registry)
+        model = cache.load(config.MODEL_NAME, artifact=config.MODEL_ARTIFACT)
+    else:
+        model = joblib.load(config.MODELS_DIR / config.MODEL_ARTIFACT)
+
+    if args.fast:
+        model = FastPredictor(model)
 
 # -----------------------------
-# Step 4: Predict next-day trip counts
+# Step 4: Forecast the next `horizon` days for all stations from the latest date
 # -----------------------------
-feature_cols = [f'lag_{i}' for i in range(1, 29)]
-X_today = today_data[feature_cols]
-predictions = model.predict(X_today)
-
-# Create prediction DataFrame
-next_day = latest_date + timedelta(days=1)
-prediction_df = pd.DataFrame({
-    "date": next_day,
-    "start_station_name": today_data["start_station_name"].values,
-    "predicted_trip_count": predictions
-})
+with stage("forecast", horizon=args.horizon) as s:
+    prediction_df = forecast_daily(model, df, horizon=args.horizon)
+    s.rows = len(prediction_df)
 
 # -----------------------------
-# Step 5: Insert predictions into Hopsworks
+# Step 5: Insert predictions into the feature store in one batch
 # -----------------------------
-fg_pred = fs.get_or_create_feature_group(
-    name="citibike_predictions",
-    version=1,
-    primary_key=["date", "start_station_name"],
-    event_time="date",
-    description="Predicted trip counts for next day using LightGBM"
-)
+with stage("write_predictions") as s:
+    fg_pred = fs.get_or_create_feature_group(
+        name=config.FEATURE_GROUP_PREDICTION_NAME,
+        version=config.FEATURE_GROUP_PREDICTION_VERSION,
+        primary_key=["date", "start_station_name"],
+        event_time="date",
+        description="Recursive 1-14 day trip count forecasts using LightGBM"
+    )
+
+    # Buffered, deduplicated batches; returns once uploaded, without waiting on the materialization job
+    with FeatureGroupSink(fg_pred) as sink:
+        sink.write(prediction_df)
+    s.rows, s.bytes_written = sink.metrics()["rows_written"], frame_bytes(prediction_df)
+print(f"📤 Insert: {sink.metrics()}")
+print(f"✅ Inference complete. {len(prediction_df)} predictions ({args.horizon} days) saved to the feature store.")
+
+if args.hourly_model:
+    # -----------------------------
+    # Step 6: Forecast the next `hourly_horizon` hours from the last 4 weeks of hourly rides
+    # -----------------------------
+    with stage("read_hourly_features") as s:
+        hourly_features = load_hourly_features_from_store(pd.Timestamp.now(tz="UTC"), fs=fs)
+        hourly_model = joblib.load(args.hourly_model)
+        s.rows, s.bytes_read = len(hourly_features), frame_bytes(hourly_features)
+
+    if hourly_features.empty:
+        print("⚠️ No hourly rides in the last 4 weeks, skipping the hourly forecast.")
+    else:
+        with stage("forecast_hourly", horizon=args.hourly_horizon) as s:
+            hourly_df = forecast_hourly(hourly_model, hourly_features, horizon=args.hourly_horizon)
+            s.rows = len(hourly_df)
 
-fg_pred.insert(prediction_df, write_options={"wait_for_job": True})
-print("✅ Inference complete. Predictions saved to Hopsworks.")
\ No newline at end of file
+        with stage("write_hourly_forecasts") as s:
+            fg_hourly = fs.get_or_create_feature_group(
+                name=config.HOURLY_FORECAST_GROUP_NAME,
+                version=config.HOURLY_FORECAST_GROUP_VERSION,
+                primary_key=["pickup_hour", "start_station_name"],
+                event_time="pickup_hour",
+                description="Recursive 1-48 hour ride forecasts from the hourly model"
+            )
+            with FeatureGroupSink(fg_hourly) as hourly_sink:
+                hourly_sink.write(hourly_df)
+            s.rows, s.bytes_written = hourly_sink.metrics()["rows_written"], frame_bytes(hourly_df)
+        print(f"✅ {len(hourly_df)} hourly predictions ({args.hourly_horizon} hours) saved to the feature store.")
\ No newline at end of file
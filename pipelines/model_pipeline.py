@@ -1,74 +1,191 @@
+import argparse
+import sys
+from pathlib import Path
+
 import pandas as pd
 import lightgbm as lgb
 from sklearn.metrics import mean_absolute_error
 import joblib
-import hopsworks
 import mlflow
 import dagshub
 
-# -----------------------------
-# Step 1: Connect to Hopsworks & MLflow
-# -----------------------------
-project = hopsworks.login(project="CDA500FINAL")
-fs = project.get_feature_store()
-mr = project.get_model_registry()
-
-# DagsHub + MLflow
-dagshub.init(repo_owner="dsapthavarni", repo_name="CDA500BIKE", mlflow=True)
-mlflow.set_tracking_uri("https://dagshub.com/dsapthavarni/CDA500BIKE.mlflow")
-mlflow.set_experiment("citi-bike-trip-prediction")
-
-# -----------------------------
-# Step 2: Load lagged features
-# -----------------------------
-fg = fs.get_feature_group("citibike_daily_lagged", version=1)
-df = fg.read()
-df['date'] = pd.to_datetime(df['date'])
-
-# -----------------------------
-# Step 3: Prepare data
-# -----------------------------
-feature_cols = [f'lag_{i}' for i in range(1, 29)]
-target_col = 'trip_count'
-
-X = df[feature_cols]
-y = df[target_col]
-cutoff = df['date'].max() - pd.Timedelta(days=14)
-
-X_train = X[df['date'] <= cutoff]
-X_test = X[df['date'] > cutoff]
-y_train = y[df['date'] <= cutoff]
-y_test = y[df['date'] > cutoff]
-
-# -----------------------------
-# Step 4: Train and log model
-# -----------------------------
-with mlflow.start_run(run_name="lightgbm_28lags_final"):
-    model = lgb.LGBMRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
-    model.fit(X_train, y_train)
-
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-
-    # Log to MLflow
-    mlflow.log_param("model_type", "LightGBM")
-    mlflow.log_param("features_used", 28)
-    mlflow.log_metric("mae", mae)
-
-    print(f"✅ Model trained. MAE: {mae:.3f}")
-
-    # Save model locally
-    joblib.dump(model, "best_model.pkl")
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import src.config as config
+from src.experiment_utils import log_trials_to_mlflow
+from src.feature_store import HopsworksFeatureStore, get_feature_store
+from src.instrumentation import frame_bytes, stage, start_run
+from src.model_cache import ModelCache
+from src.model_selection import search_hyperparameters
+from src.retraining import (
+    WINDOW_DAYS,
+    load_training_state,
+    retrain,
+    save_training_state,
+    state_from_metrics,
+    state_to_metrics,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the Citi Bike trip-count model.")
+    parser.add_argument(
+        "--search", action="store_true",
+        help="Tune LightGBM with rolling-origin CV and successive halving before the final fit",
+    )
+    parser.add_argument("--trials", type=int, default=27, help="Configurations sampled for --search")
+    parser.add_argument("--folds", type=int, default=3, help="Rolling-origin folds for --search")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --search")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Continue boosting the current model on the days since it was trained "
+             "(falls back to a full retrain on drift or degradation, see src/retraining.py)",
+    )
+    args = parser.parse_args()
+    start_run("model_pipeline")
 
     # -----------------------------
-    # Step 5: Register model in Hopsworks
+    # Step 1: Connect to the feature store (Hopsworks or local) & MLflow
     # -----------------------------
-    model_obj = mr.python.create_model(
-        name="citibike_predictor",
-        metrics={"mae": float(mae)},
-        description="LightGBM with 28 lag features for Citi Bike trip prediction",
-        input_example=X_test.head(1)
-    )
+    with stage("connect"):
+        fs = get_feature_store()
+
+    # DagsHub + MLflow
+    dagshub.init(repo_owner="dsapthavarni", repo_name="CDA500BIKE", mlflow=True)
+    mlflow.set_tracking_uri("https://dagshub.com/dsapthavarni/CDA500BIKE.mlflow")
+    mlflow.set_experiment(config.MLFLOW_EXPERIMENT_NAME)
+
+    feature_cols = [f'lag_{i}' for i in range(1, 29)]
+    target_col = 'trip_count'
+    hyper_params = {"n_estimators": 100, "learning_rate": 0.1}
+
+    if args.incremental:
+        # -----------------------------
+        # Step 2: Load the current model and only the recent window of features
+        # -----------------------------
+        with stage("load_model"):
+            current_model, current_state = None, None
+            if isinstance(fs, HopsworksFeatureStore):
+                cache = ModelCache(registry=fs.get_model_registry)
+                try:
+                    current_model = cache.load(config.MODEL_NAME, artifact=config.MODEL_ARTIFACT)
+                    current_state = state_from_metrics(cache.training_metrics(config.MODEL_NAME))
+                except ValueError:
+                    print("ℹ️ No registered model yet, training from scratch.")
+            elif (config.MODELS_DIR / config.MODEL_ARTIFACT).exists():
+                current_model = joblib.load(config.MODELS_DIR / config.MODEL_ARTIFACT)
+                current_state = load_training_state()
+
+        with stage("read_features", mode="incremental") as s:
+            start = None
+            if current_state is not None:
+                start = pd.Timestamp(current_state["trained_through"]) - pd.Timedelta(days=WINDOW_DAYS)
+            df = fs.read_range(config.FEATURE_GROUP_NAME, config.FEATURE_GROUP_VERSION, start=start, time_col="date")
+            df['date'] = pd.to_datetime(df['date'])
+            s.rows, s.bytes_read = len(df), frame_bytes(df)
+
+        # -----------------------------
+        # Step 3: Warm-start or fall back to a full retrain
+        # -----------------------------
+        with stage("train", mode="incremental") as s:
+            model, state, decision = retrain(current_model, current_state, df, feature_cols, target_col)
+            s.rows = len(df)
+        print(f"🔁 Retrain mode: {decision['mode']} ({decision['reason']})")
+        if decision["mode"] == "none":
+            return
+
+        mae = state.get("last_mae", state["mae"]) if decision["mode"] == "incremental" else state["mae"]
+        X_example = df[feature_cols].head(1)
+        run_params = {"retrain_mode": decision["mode"], "retrain_reason": decision["reason"]}
+    else:
+        # -----------------------------
+        # Step 2: Load lagged features
+        # -----------------------------
+        with stage("read_features", mode="full") as s:
+            fg = fs.get_feature_group(config.FEATURE_GROUP_NAME, version=config.FEATURE_GROUP_VERSION)
+            df = fg.read()
+            df['date'] = pd.to_datetime(df['date'])
+            s.rows, s.bytes_read = len(df), frame_bytes(df)
+
+        # -----------------------------
+        # Step 3: Prepare data
+        # -----------------------------
+        X = df[feature_cols]
+        y = df[target_col]
+        cutoff = df['date'].max() - pd.Timedelta(days=14)
+
+        X_train = X[df['date'] <= cutoff]
+        X_test = X[df['date'] > cutoff]
+        y_train = y[df['date'] <= cutoff]
+        y_test = y[df['date'] > cutoff]
+
+        if args.search:
+            with stage("search", trials=args.trials):
+                # Tune on the training period only; the last 14 days stay held out for the MAE below
+                search = search_hyperparameters(
+                    df[df['date'] <= cutoff],
+                    feature_cols,
+                    target_col=target_col,
+                    time_col="date",
+                    n_folds=args.folds,
+                    horizon=pd.Timedelta(days=14),
+                    n_trials=args.trials,
+                    n_workers=args.workers,
+                )
+                log_trials_to_mlflow(search["trials"], experiment_name=config.MLFLOW_EXPERIMENT_NAME)
+                best = search["best"]
+                hyper_params = {**best["params"], "n_estimators": best["best_iteration"], "subsample_freq": 1}
+                print(f"✅ Search done. CV MAE: {best['mae']:.3f} with {hyper_params}")
+
+        with stage("train", mode="full") as s:
+            model = lgb.LGBMRegressor(random_state=42, **hyper_params)
+            model.fit(X_train, y_train)
+            s.rows = len(X_train)
+
+        with stage("evaluate") as s:
+            y_pred = model.predict(X_test)
+            mae = mean_absolute_error(y_test, y_pred)
+            s.rows = len(X_test)
+        state = {"mae": float(mae), "trained_through": str(cutoff.date()), "n_trees": model.booster_.num_trees()}
+        X_example = X_test.head(1)
+        run_params = {"retrain_mode": "full", **hyper_params}
+
+    # -----------------------------
+    # Step 4: Log model
+    # -----------------------------
+    with mlflow.start_run(run_name="lightgbm_28lags_final"):
+        # Log to MLflow
+        mlflow.log_param("model_type", "LightGBM")
+        mlflow.log_param("features_used", 28)
+        mlflow.log_params(run_params)
+        mlflow.log_metric("mae", mae)
+
+        print(f"✅ Model trained. MAE: {mae:.3f}")
+
+        with stage("save_model"):
+            # Save model locally, with what it was trained on for the next --incremental run
+            joblib.dump(model, config.MODEL_ARTIFACT)
+            joblib.dump(model, config.MODELS_DIR / config.MODEL_ARTIFACT)
+            save_training_state(state)
+
+        # -----------------------------
+        # Step 5: Register model in Hopsworks
+        # -----------------------------
+        if isinstance(fs, HopsworksFeatureStore):
+            with stage("register_model"):
+                mr = fs.get_model_registry()
+                model_obj = mr.python.create_model(
+                    name=config.MODEL_NAME,
+                    metrics={**state_to_metrics(state), "mae": float(mae)},
+                    description="LightGBM with 28 lag features for Citi Bike trip prediction",
+                    input_example=X_example
+                )
+
+                model_obj.save(config.MODEL_ARTIFACT)
+                print("✅ Model registered and saved to Hopsworks.")
+        else:
+            print(f"✅ Model saved to {config.MODELS_DIR / config.MODEL_ARTIFACT}.")
+
 
-    model_obj.save("best_model.pkl")
-    print("✅ Model registered and saved to Hopsworks.")
\ No newline at end of file
+# Guarded: the --search worker processes re-import this module under spawn/forkserver
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+import joblib
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import src.config as config
+from src.data_utils import iter_citibike_data
+from src.feature_sink import FeatureGroupSink
+from src.feature_store import get_feature_store
+from src.instrumentation import stage, start_run
+from src.streaming import (
+    N_LAGS,
+    InProcessBroker,
+    LiveHourlyCounts,
+    TripStreamProcessor,
+    create_consumer,
+    publish_trips,
+)
+
+parser = argparse.ArgumentParser(
+    description="Count trip-start events into live hourly counts and predict each next hour."
+)
+parser.add_argument("--group-id", default="citibike-hourly-counts", help="Kafka consumer group")
+parser.add_argument(
+    "--model", type=Path, default=None,
+    help="Pickled hourly model (see src/pipeline_utils.get_pipeline); without it only counts are written",
+)
+parser.add_argument(
+    "--replay", type=int, default=None, metavar="YEAR",
+    help="Publish that year's raw trips to an in-process broker and consume them instead of Kafka",
+)
+parser.add_argument("--max-events", type=int, default=None, help="Stop after this many events")
+args = parser.parse_args()
+start_run("streaming_pipeline")
+
+# -----------------------------
+# Step 1: Connect to the feature store and the hourly feature groups
+# -----------------------------
+with stage("connect"):
+    fs = get_feature_store()
+    fg_hourly = fs.get_or_create_feature_group(
+        name=config.HOURLY_FEATURE_GROUP_NAME,
+        version=config.HOURLY_FEATURE_GROUP_VERSION,
+        primary_key=["pickup_hour", "start_station_name"],
+        event_time="pickup_hour",
+        description="Hourly trip starts per station, counted from the trip event stream",
+    )
+    fg_pred = fs.get_or_create_feature_group(
+        name=config.HOURLY_PREDICTION_GROUP_NAME,
+        version=config.HOURLY_PREDICTION_GROUP_VERSION,
+        primary_key=["pickup_hour", "start_station_name"],
+        event_time="pickup_hour",
+        description="Next-hour demand predicted as each hour of the trip event stream closes",
+    )
+
+# -----------------------------
+# Step 2: Seed the rolling lags with the hours already written
+# -----------------------------
+with stage("seed_state") as s:
+    if args.replay:
+        # Replayed events are from the past, so start from an empty state
+        state = LiveHourlyCounts()
+    else:
+        since = pd.Timestamp.now().floor("h") - pd.Timedelta(hours=N_LAGS)
+        history = fs.read_range(
+            config.HOURLY_FEATURE_GROUP_NAME,
+            config.HOURLY_FEATURE_GROUP_VERSION,
+            start=since,
+            columns=["pickup_hour", "start_station_name", "rides"],
+        )
+        state = LiveHourlyCounts.from_history(history)
+        s.rows = len(history)
+
+model = joblib.load(args.model) if args.model else None
+
+# -----------------------------
+# Step 3: Consume; closed hours and predictions are written in batches
+# -----------------------------
+if args.replay:
+    broker = InProcessBroker()
+    consumer = broker.consumer(args.group_id)
+    consumer.subscribe([config.TRIP_EVENTS_TOPIC])
+else:
+    consumer = create_consumer(args.group_id)
+
+processor = TripStreamProcessor(
+    consumer,
+    state,
+    model=model,
+    hourly_sink=FeatureGroupSink(fg_hourly),
+    prediction_sink=FeatureGroupSink(fg_pred),
+)
+with stage("consume") as s:
+    try:
+        if args.replay:
+            for chunk in iter_citibike_data(args.replay, chunksize=200_000):
+                publish_trips(broker, chunk)
+                metrics = processor.run(max_events=args.max_events, max_idle_polls=1)
+                broker.trim(config.TRIP_EVENTS_TOPIC)
+                if args.max_events and metrics["events"] >= args.max_events:
+                    break
+        else:
+            processor.run(max_events=args.max_events)
+    except KeyboardInterrupt:
+        print("🛑 Stopping; the hours still open are not written.")
+    finally:
+        processor.close()
+    s.rows = processor.metrics()["events"]
+
+print(f"📥 Stream: {processor.metrics()}")
+print(f"✅ Streaming ingest stopped. {processor.metrics()['hours_closed']} hours written to the feature store.")
@@ -6,12 +6,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Define project directory structure
-PARENT_DIR = Path(_file_).resolve().parent.parent
+PARENT_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = PARENT_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 TRANSFORMED_DATA_DIR = DATA_DIR / "transformed"
+TRIP_CACHE_DIR = PROCESSED_DATA_DIR / "trip_cache"
+LOCAL_FEATURE_STORE_DIR = DATA_DIR / "feature_store"
+STATIONS_PATH = PROCESSED_DATA_DIR / "stations.parquet"
 MODELS_DIR = PARENT_DIR / "models"
+MODEL_CACHE_DIR = MODELS_DIR / "registry_cache"
 
 # Create directories if they don't exist
 for directory in [
@@ -19,7 +23,10 @@ for directory in [
     RAW_DATA_DIR,
     PROCESSED_DATA_DIR,
     TRANSFORMED_DATA_DIR,
+    TRIP_CACHE_DIR,
+    LOCAL_FEATURE_STORE_DIR,
     MODELS_DIR,
+    MODEL_CACHE_DIR,
 ]:
     directory.mkdir(parents=True, exist_ok=True)
 
@@ -29,17 +36,51 @@ for directory in [
 HOPSWORKS_API_KEY = os.getenv("HOPSWORKS_API_KEY")
 HOPSWORKS_PROJECT_NAME = os.getenv("HOPSWORKS_PROJECT_NAME", "CDA500FINAL")
 
+# Seconds to reuse feature store / feature group / model registry handles
+HOPSWORKS_HANDLE_TTL_SECONDS = int(os.getenv("HOPSWORKS_HANDLE_TTL_SECONDS", "3600"))
+
+# Feature store backend: "hopsworks", or "local" for Parquet files under LOCAL_FEATURE_STORE_DIR
+FEATURE_STORE_BACKEND = os.getenv("FEATURE_STORE_BACKEND", "hopsworks")
+
+# Directory for per-stage run metrics (runs.jsonl + <pipeline>.prom); empty disables them
+PIPELINE_METRICS_DIR = os.getenv("PIPELINE_METRICS_DIR", "")
+
 # Feature group for lag features
 FEATURE_GROUP_NAME = "citibike_daily_lagged"
 FEATURE_GROUP_VERSION = 1
 
+# Last processed date per station, so incremental feature runs skip re-reading the lag keys
+WATERMARK_GROUP_NAME = "citibike_daily_watermarks"
+WATERMARK_GROUP_VERSION = 1
+
 # Feature group to store predictions
 FEATURE_GROUP_PREDICTION_NAME = "citibike_predictions"
-FEATURE_GROUP_PREDICTION_VERSION = 1
+# v2 adds the forecast `horizon` column
+FEATURE_GROUP_PREDICTION_VERSION = 2
+
+# Live hourly counts and next-hour predictions written by the streaming consumer
+HOURLY_FEATURE_GROUP_NAME = "citibike_hourly_rides"
+HOURLY_FEATURE_GROUP_VERSION = 1
+HOURLY_PREDICTION_GROUP_NAME = "citibike_hourly_predictions"
+HOURLY_PREDICTION_GROUP_VERSION = 1
+
+# Multi-hour forecasts written by the inference pipeline (--hourly-model)
+HOURLY_FORECAST_GROUP_NAME = "citibike_hourly_forecasts"
+HOURLY_FORECAST_GROUP_VERSION = 1
+
+# Kafka topic of trip-start events (JSON with starttime and start_station_name)
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+TRIP_EVENTS_TOPIC = os.getenv("TRIP_EVENTS_TOPIC", "citibike-trip-starts")
 
 # Model registry info
 MODEL_NAME = "citibike_predictor"
 MODEL_VERSION = 1
+# File the model is saved as, under MODELS_DIR and in each registry version
+MODEL_ARTIFACT = "best_model.pkl"
+
+# Loaded models kept in memory, and how often to ask the registry for a newer version
+MODEL_MEMORY_CACHE_SIZE = 2
+MODEL_VERSION_CHECK_SECONDS = int(os.getenv("MODEL_VERSION_CHECK_SECONDS", "300"))
 
 # MLflow experiment name
 MLFLOW_EXPERIMENT_NAME = "citi-bike-trip-prediction"
\ No newline at end of file
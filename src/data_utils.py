@@ -1,40 +1,389 @@
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Optional, Tuple, Union
+from functools import partial
+from typing import Callable, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas.api.types import union_categoricals
 
-from src.config import RAW_DATA_DIR
+from src.config import RAW_DATA_DIR, STATIONS_PATH, TRIP_CACHE_DIR
+from src.station_matrix import StationHourMatrix, dense_rides_matrix
+from src.stations import RAW_STATION_COLUMNS, StationCollector
 
 
-def load_and_process_citibike_data(year: int) -> pd.DataFrame:
+RAW_TRIP_COLUMNS = ["starttime", "start_station_name"]
+
+
+def _normalize_column_name(name: str) -> str:
+    return name.strip().lower().replace(" ", "_")
+
+
+def _list_month_files(year: int, data_dir: Optional[Path] = None) -> List[Path]:
+    """
+    List the monthly raw CSVs for a year, raising if there are none.
+    """
+    all_files = sorted(Path(data_dir or RAW_DATA_DIR).glob(f"{year}-*.csv"))
+    if not all_files:
+        raise FileNotFoundError("No CSV files found for the specified year.")
+    return all_files
+
+
+def _resolve_raw_columns(file: Path, columns: List[str] = RAW_TRIP_COLUMNS) -> dict:
+    """
+    Map the raw header names in `file` to the normalized `columns`.
+
+    Citi Bike changed header casing between releases ("start station name",
+    "Start Station Name", ...), so the header is read once and matched after
+    normalization instead of hard-coding the raw names.
+    """
+    header = pd.read_csv(file, nrows=0).columns
+    raw_columns = {_normalize_column_name(col): col for col in header}
+    missing = [col for col in columns if col not in raw_columns]
+    if missing:
+        raise ValueError(f"{file.name} is missing required columns: {missing}")
+    return {raw_columns[col]: col for col in columns}
+
+
+def _station_source_columns() -> List[str]:
+    return RAW_TRIP_COLUMNS + [col for col in RAW_STATION_COLUMNS if col not in RAW_TRIP_COLUMNS]
+
+
+def iter_citibike_chunks(
+    file: Path,
+    chunksize: int = 1_000_000,
+    datetime_format: Optional[str] = None,
+    stations: Optional[StationCollector] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream one raw Citi Bike CSV as cleaned, column-pruned chunks.
+
+    Only `starttime` and `start_station_name` are read; station names are
+    parsed straight into a categorical and start times with a single format
+    per chunk.
+
+    Args:
+        file: Path to a monthly CSV
+        chunksize: Number of CSV rows per chunk
+        datetime_format: strftime format of `starttime`. When None, pandas
+            infers it from the first row of each chunk (the 2014 files switch
+            format in September, so a fixed format is not always safe).
+        stations: When given, the station id and coordinates are read as well
+            and each chunk's stations are added to it
+
+    Yields:
+        pd.DataFrame with ['starttime', 'start_station_name']
+    """
+    rename = _resolve_raw_columns(file, _station_source_columns() if stations is not None else RAW_TRIP_COLUMNS)
+    station_col = next(raw for raw, col in rename.items() if col == "start_station_name")
+
+    reader = pd.read_csv(
+        file,
+        usecols=list(rename),
+        dtype={station_col: "category"},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)
+        if stations is not None:
+            stations.update(chunk)
+        chunk["starttime"] = pd.to_datetime(
+            chunk["starttime"], format=datetime_format, errors="coerce"
+        )
+        chunk = chunk.dropna(subset=RAW_TRIP_COLUMNS)
+        yield chunk[RAW_TRIP_COLUMNS]
+
+
+def iter_citibike_data(
+    year: int,
+    chunksize: int = 1_000_000,
+    data_dir: Optional[Path] = None,
+    datetime_format: Optional[str] = None,
+    stations: Optional[StationCollector] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream every monthly CSV of a year as cleaned chunks (see iter_citibike_chunks).
+    """
+    for file in _list_month_files(year, data_dir):
+        yield from iter_citibike_chunks(file, chunksize, datetime_format, stations)
+
+
+def _concat_trip_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate cleaned chunks, keeping `start_station_name` categorical.
+
+    A plain pd.concat falls back to object dtype as soon as two chunks have
+    different categories, which would undo the memory savings.
+    """
+    if not chunks:
+        return pd.DataFrame({
+            "starttime": pd.Series(dtype="datetime64[ns]"),
+            "start_station_name": pd.Series(dtype="category"),
+        })
+
+    stations = union_categoricals([chunk["start_station_name"] for chunk in chunks])
+    starttime = np.concatenate([chunk["starttime"].to_numpy() for chunk in chunks])
+    return pd.DataFrame({"starttime": starttime, "start_station_name": stations})
+
+
+def load_and_process_citibike_data(
+    year: int,
+    chunksize: Optional[int] = None,
+    data_dir: Optional[Path] = None,
+    datetime_format: Optional[str] = None,
+    cache: Optional["TripCache"] = None,
+    stations: Optional[StationCollector] = None,
+) -> pd.DataFrame:
     """
     Load and preprocess raw Citi Bike data (from CSVs saved in RAW_DATA_DIR).
 
     Args:
         year: int (e.g., 2014)
+        chunksize: When set, stream each CSV in chunks of this many rows,
+            reading only the two needed columns (see iter_citibike_chunks).
+            `start_station_name` is then returned as a categorical.
+        data_dir: Directory holding the monthly CSVs (defaults to RAW_DATA_DIR)
+        datetime_format: Optional `starttime` format for the streaming mode
+        cache: Optional TripCache; unchanged months are read back from
+            Parquet and only new or modified CSVs are parsed.
+            `start_station_name` is then returned as a categorical.
+        stations: Optional StationCollector that receives the id, name and
+            coordinates of every station in the parsed CSVs (months served
+            from `cache` are not parsed); save it with `stations.save()`.
+            `extract_station_metadata` rebuilds the table from all CSVs.
 
     Returns:
         pd.DataFrame with cleaned trip start time and start station name
     """
-    all_files = sorted(Path(RAW_DATA_DIR).glob(f"{year}-*.csv"))
-    if not all_files:
-        raise FileNotFoundError("No CSV files found for the specified year.")
+    if cache is not None:
+        loader = partial(
+            _load_cleaned_month, chunksize=chunksize, datetime_format=datetime_format, stations=stations
+        )
+        chunks = [cache.load(file, loader) for file in _list_month_files(year, data_dir)]
+        return _concat_trip_chunks(chunks)
+
+    if chunksize:
+        chunks = list(iter_citibike_data(year, chunksize, data_dir, datetime_format, stations))
+        return _concat_trip_chunks(chunks)
+
+    all_files = _list_month_files(year, data_dir)
 
-    df_list = []
-    for file in all_files:
-        df = pd.read_csv(file)
-        df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-        df['starttime'] = pd.to_datetime(df['starttime'], errors='coerce')
-        df = df.dropna(subset=['starttime', 'start_station_name'])
-        df_list.append(df[['starttime', 'start_station_name']])
+    df_list = [_load_month_file(file, stations) for file in all_files]
 
     df_combined = pd.concat(df_list).reset_index(drop=True)
     return df_combined
 
 
+def _load_month_file(file: Path, stations: Optional[StationCollector] = None) -> pd.DataFrame:
+    df = pd.read_csv(file)
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    if stations is not None:
+        stations.update(df)
+    df['starttime'] = pd.to_datetime(df['starttime'], errors='coerce')
+    df = df.dropna(subset=['starttime', 'start_station_name'])
+    return df[['starttime', 'start_station_name']]
+
+
+def _load_cleaned_month(
+    file: Path,
+    chunksize: Optional[int] = None,
+    datetime_format: Optional[str] = None,
+    stations: Optional[StationCollector] = None,
+) -> pd.DataFrame:
+    if chunksize:
+        return _concat_trip_chunks(list(iter_citibike_chunks(file, chunksize, datetime_format, stations)))
+    return _load_month_file(file, stations)
+
+
+def extract_station_metadata(
+    year: int,
+    data_dir: Optional[Path] = None,
+    path: Path = STATIONS_PATH,
+    chunksize: int = 1_000_000,
+) -> pd.DataFrame:
+    """
+    Rebuild the station table (see src/stations.py) from a year of raw CSVs,
+    reading only the four station columns.
+
+    Returns:
+        The station table as written to `path`
+    """
+    stations = StationCollector()
+    for file in _list_month_files(year, data_dir):
+        rename = _resolve_raw_columns(file, list(RAW_STATION_COLUMNS))
+        for chunk in pd.read_csv(file, usecols=list(rename), chunksize=chunksize):
+            stations.update(chunk.rename(columns=rename))
+    return stations.save(path, replace=True)
+
+
+# -----------------------------
+# Parquet cache of cleaned monthly trips
+# -----------------------------
+def _file_digest(file: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TripCache:
+    """
+    Parquet cache of cleaned monthly trips, stored under PROCESSED_DATA_DIR.
+
+    Each raw CSV maps to one Parquet file holding its cleaned
+    ['starttime', 'start_station_name'] frame. A manifest records the source
+    file's size, mtime and content hash: when size and mtime are unchanged the
+    entry is used as is, when only the mtime moved the file is re-hashed and
+    the entry is kept if the content still matches, and anything else is
+    re-parsed. Hit/miss counters cover the lifetime of the instance.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir or TRIP_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.hits = 0
+        self.misses = 0
+
+    def _read_manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {}
+        manifest = json.loads(self.manifest_path.read_text())
+        if manifest.get("schema_version") != self.SCHEMA_VERSION:
+            return {}
+        return manifest["entries"]
+
+    def _write_manifest(self, entries: dict) -> None:
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(
+            {"schema_version": self.SCHEMA_VERSION, "entries": entries}, indent=2
+        ))
+        tmp.replace(self.manifest_path)
+
+    def _is_fresh(self, entry: dict, file: Path) -> bool:
+        """
+        Check an entry against its source file, re-hashing only if the mtime moved.
+        """
+        if not file.exists() or not (self.cache_dir / entry["parquet"]).exists():
+            return False
+        stat = file.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if _file_digest(file) != entry["digest"]:
+                return False
+            entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def load(self, file: Path, loader: Callable[[Path], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the cleaned trips of `file`, calling `loader(file)` only on a miss.
+
+        Cached frames are read with memory-mapped Arrow I/O and
+        `start_station_name` always comes back as a categorical.
+        """
+        file = Path(file).resolve()
+        entries = self._read_manifest()
+        entry = entries.get(str(file))
+
+        if entry is not None and self._is_fresh(entry, file):
+            self.hits += 1
+            entry["hits"] += 1
+            table = pq.read_table(self.cache_dir / entry["parquet"], memory_map=True)
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+        else:
+            self.misses += 1
+            if entry is not None:
+                (self.cache_dir / entry["parquet"]).unlink(missing_ok=True)
+
+            df = loader(file).astype({"start_station_name": "category"}).reset_index(drop=True)
+            stat = file.stat()
+            digest = _file_digest(file)
+            entry = {
+                "parquet": f"{file.stem}-{digest[:16]}.parquet",
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "digest": digest,
+                "rows": len(df),
+                "created": time.time(),
+                "hits": 0,
+            }
+            tmp = self.cache_dir / (entry["parquet"] + ".tmp")
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+            tmp.replace(self.cache_dir / entry["parquet"])
+
+        entry["last_used"] = time.time()
+        entries[str(file)] = entry
+        self._write_manifest(entries)
+        return df
+
+    def entries(self) -> pd.DataFrame:
+        """
+        Describe every cache entry, one row per source file.
+        """
+        rows = []
+        for source, entry in self._read_manifest().items():
+            path = self.cache_dir / entry["parquet"]
+            rows.append({
+                "source": source,
+                "parquet": entry["parquet"],
+                "rows": entry["rows"],
+                "cache_mb": path.stat().st_size / 2**20 if path.exists() else 0.0,
+                "hits": entry["hits"],
+                "last_used": pd.to_datetime(entry["last_used"], unit="s"),
+                "fresh": self._is_fresh(dict(entry), Path(source)),
+            })
+        return pd.DataFrame(rows, columns=[
+            "source", "parquet", "rows", "cache_mb", "hits", "last_used", "fresh"
+        ])
+
+    def prune(self, older_than_days: Optional[float] = None, clear: bool = False) -> List[str]:
+        """
+        Delete stale entries (source gone or changed) and orphaned Parquet files.
+
+        Args:
+            older_than_days: Also delete entries not used for this many days
+            clear: Delete every entry
+
+        Returns:
+            Names of the deleted Parquet files
+        """
+        entries = self._read_manifest()
+        cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+
+        keep, removed = {}, []
+        for source, entry in entries.items():
+            expired = cutoff is not None and entry["last_used"] < cutoff
+            if clear or expired or not self._is_fresh(entry, Path(source)):
+                (self.cache_dir / entry["parquet"]).unlink(missing_ok=True)
+                removed.append(entry["parquet"])
+            else:
+                keep[source] = entry
+
+        referenced = {entry["parquet"] for entry in keep.values()}
+        for path in self.cache_dir.glob("*.parquet*"):
+            if path.name not in referenced and path.name not in removed:
+                path.unlink()
+                removed.append(path.name)
+
+        self._write_manifest(keep)
+        return removed
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
 def transform_to_hourly_ts(df: pd.DataFrame) -> pd.DataFrame:
     """
     Transform raw start times into hourly trip counts per station.
@@ -46,7 +395,83 @@ def transform_to_hourly_ts(df: pd.DataFrame) -> pd.DataFrame:
         Hourly aggregated time-series DataFrame
     """
     df['pickup_hour'] = df['starttime'].dt.floor('h')
-    grouped = df.groupby(['pickup_hour', 'start_station_name']).size().reset_index(name='rides')
+    grouped = df.groupby(['pickup_hour', 'start_station_name'], observed=True).size().reset_index(name='rides')
+    return fill_missing_rides_full_range(grouped, 'pickup_hour', 'start_station_name', 'rides')
+
+
+def _count_hourly_rides(df: pd.DataFrame) -> pd.Series:
+    """
+    Count trips per (pickup_hour, start_station_name) without touching `df`.
+
+    Station names come back as plain strings so partial counts from different
+    chunks or processes (each with its own categories) can be summed together.
+    """
+    pickup_hour = df['starttime'].dt.floor('h').rename('pickup_hour')
+    counts = df.groupby([pickup_hour, 'start_station_name'], observed=True).size()
+    counts.index = counts.index.set_levels(counts.index.levels[1].astype(object), level=1)
+    return counts
+
+
+def _hourly_counts_for_file(
+    file: Path, chunksize: Optional[int] = None, datetime_format: Optional[str] = None
+) -> pd.Series:
+    """
+    Parse one monthly CSV and reduce it to hourly ride counts (process-pool worker).
+    """
+    if not chunksize:
+        return _count_hourly_rides(_load_month_file(file))
+
+    partials = [
+        _count_hourly_rides(chunk)
+        for chunk in iter_citibike_chunks(file, chunksize, datetime_format)
+    ]
+    return pd.concat(partials).groupby(level=[0, 1]).sum()
+
+
+def load_hourly_ts(
+    year: int,
+    n_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    data_dir: Optional[Path] = None,
+    datetime_format: Optional[str] = None,
+    as_matrix: bool = False,
+) -> Union[pd.DataFrame, StationHourMatrix]:
+    """
+    Build the hourly ride time series for a year, one month per worker process.
+
+    Each worker parses a single monthly CSV and returns its already aggregated
+    (pickup_hour, start_station_name) -> rides counts, so only those small
+    partial results travel back to the parent to be merged. The output is
+    identical to transform_to_hourly_ts(load_and_process_citibike_data(year)).
+
+    Args:
+        year: int (e.g., 2014)
+        n_workers: Number of worker processes (defaults to os.cpu_count()).
+            With 1 worker the months are processed in-process.
+        chunksize: Stream each CSV in chunks of this many rows inside the
+            worker (see iter_citibike_chunks). By default each worker reads
+            its file the same way as load_and_process_citibike_data.
+        data_dir: Directory holding the monthly CSVs (defaults to RAW_DATA_DIR)
+        datetime_format: Optional `starttime` format for the streaming mode
+        as_matrix: Return a StationHourMatrix instead of the long DataFrame
+
+    Returns:
+        Hourly aggregated time-series DataFrame (or StationHourMatrix)
+    """
+    all_files = _list_month_files(year, data_dir)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(all_files))
+    worker = partial(_hourly_counts_for_file, chunksize=chunksize, datetime_format=datetime_format)
+
+    if n_workers == 1:
+        partials = [worker(file) for file in all_files]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            partials = list(pool.map(worker, all_files))
+
+    counts = pd.concat(partials).groupby(level=[0, 1]).sum()
+    grouped = counts.reset_index(name='rides')
+    if as_matrix:
+        return StationHourMatrix.from_long(grouped)
     return fill_missing_rides_full_range(grouped, 'pickup_hour', 'start_station_name', 'rides')
 
 
@@ -54,76 +479,313 @@ def fill_missing_rides_full_range(df, hour_col, station_col, rides_col):
     """
     Fills in missing hours and station entries with 0 rides.
 
+    The grid is built as a dense int32 matrix (see dense_rides_matrix) and
+    flattened back to long format, hours outermost and stations in order of
+    first appearance.
+
     Returns:
         DataFrame with all combinations filled
     """
     df[hour_col] = pd.to_datetime(df[hour_col])
-    all_hours = pd.date_range(df[hour_col].min(), df[hour_col].max(), freq="h")
-    all_stations = df[station_col].unique()
+    matrix, all_hours, stations = dense_rides_matrix(df, hour_col, station_col, rides_col)
+    n_hours, n_stations = matrix.shape
 
-    complete_grid = pd.DataFrame(
-        [(h, s) for h in all_hours for s in all_stations],
-        columns=[hour_col, station_col]
-    )
+    return pd.DataFrame({
+        hour_col: all_hours.repeat(n_stations),
+        station_col: stations.take(np.tile(np.arange(n_stations), n_hours)),
+        rides_col: matrix.ravel(),
+    })
 
-    merged = complete_grid.merge(df, on=[hour_col, station_col], how="left")
-    merged[rides_col] = merged[rides_col].fillna(0).astype(int)
-    return merged
+
+def _window_starts(group_sizes: np.ndarray, window_size: int, step_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions of every sliding window in a concatenation of groups.
+
+    Group g occupies [offset_g, offset_g + size_g) and yields windows starting
+    at offset_g + i for i in range(0, size_g - window_size, step_size), i.e.
+    every window still has a target value right after it.
+
+    Returns:
+        (window start positions, number of windows per group)
+    """
+    n_windows = np.maximum(0, -(-(group_sizes - window_size) // step_size))
+    offsets = np.cumsum(group_sizes) - group_sizes
+    first_window = np.cumsum(n_windows) - n_windows
+
+    group_of_window = np.repeat(np.arange(len(group_sizes)), n_windows)
+    rank = np.arange(n_windows.sum()) - first_window[group_of_window]
+    return offsets[group_of_window] + rank * step_size, n_windows
+
+
+def _lag_dtype(values: np.ndarray) -> type:
+    return np.int32 if np.issubdtype(values.dtype, np.integer) else np.float32
 
 
 def sliding_window_features(
-    df: pd.DataFrame, feature_col="rides", window_size=12, step_size=1
+    df: Union[pd.DataFrame, StationHourMatrix], feature_col="rides", window_size=12, step_size=1
 ) -> pd.DataFrame:
     """
     Create lag features per station using sliding windows.
 
+    Rows are stably sorted by station once, and every window is a strided
+    view (numpy sliding_window_view) over the sorted values, so the selected
+    windows are gathered into one contiguous block without Python loops.
+    Lag and target columns are int32 for integer counts and float32 otherwise.
+
+    Args:
+        df: Long-format DataFrame with ['pickup_hour', 'start_station_name',
+            feature_col], in time order within each station, or a
+            StationHourMatrix (then no grouping is needed at all)
+        feature_col: Column to build lags from
+        window_size: Number of lag features
+        step_size: Distance between consecutive window starts
+
     Returns:
         DataFrame with time-lagged features, target, station, and timestamp
     """
-    stations = df["start_station_name"].unique()
-    all_data = []
+    if isinstance(df, StationHourMatrix):
+        values = df.values
+        group_sizes = np.full(values.shape[0], values.shape[1])
+        station_names = df.stations
+        timestamps = np.tile(df.hours.to_numpy(), values.shape[0])
+        values = values.ravel()
+    else:
+        codes, station_names = pd.factorize(df["start_station_name"])
+        order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        group_sizes = np.bincount(codes[order], minlength=len(station_names))
+        values = df[feature_col].to_numpy()[order]
+        timestamps = df["pickup_hour"].to_numpy()[order]
 
-    for station in stations:
-        station_df = df[df["start_station_name"] == station].reset_index(drop=True)
-        values = station_df[feature_col].values
-        timestamps = station_df["pickup_hour"].values
+    values = values.astype(_lag_dtype(values), copy=False)
+    starts, n_windows = _window_starts(group_sizes, window_size, step_size)
 
-        if len(values) <= window_size:
-            continue
+    columns = [f"{feature_col}_t-{window_size - i}" for i in range(window_size)]
+    if len(starts):
+        windows = sliding_window_view(values, window_size)[starts]
+    else:
+        windows = np.empty((0, window_size), dtype=values.dtype)
 
-        rows = []
-        for i in range(0, len(values) - window_size, step_size):
-            features = values[i:i + window_size]
-            target = values[i + window_size]
-            time = timestamps[i + window_size]
-            rows.append(np.append(features, [target, station, time]))
+    features = pd.DataFrame(windows, columns=columns)
+    features["target"] = values[starts + window_size]
+    features["start_station_name"] = station_names.take(
+        np.repeat(np.arange(len(station_names)), n_windows)
+    ).to_numpy()
+    features["pickup_hour"] = timestamps[starts + window_size]
+    return features
 
-        if rows:
-            columns = [f"{feature_col}_t-{window_size - i}" for i in range(window_size)]
-            df_transformed = pd.DataFrame(rows, columns=columns + ["target", "start_station_name", "pickup_hour"])
-            all_data.append(df_transformed)
 
-    return pd.concat(all_data, ignore_index=True)
+def transform_ts_data_info_features(
+    df: Union[pd.DataFrame, StationHourMatrix], feature_col="rides", window_size=12, step_size=1
+) -> pd.DataFrame:
+    """
+    Create lag features per station for inference, i.e. sliding_window_features
+    without the target column.
+
+    Returns:
+        DataFrame with time-lagged features, station, and timestamp
+    """
+    features = sliding_window_features(df, feature_col, window_size, step_size)
+    return features.drop(columns=["target"])
 
 
 def split_ts_data(
     df: pd.DataFrame,
     cutoff: datetime,
-    target_col="target"
+    target_col="target",
+    time_col="pickup_hour",
 ) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
     """
     Split time-series dataset into train/test using a date cutoff.
 
+    The caller's frame is left untouched and each side is materialised once
+    (rows and feature columns are taken in a single step). For several
+    cutoffs or LightGBM training, use TimeSeriesDataset instead.
+
     Returns:
         X_train, y_train, X_test, y_test
     """
-    df["pickup_hour"] = pd.to_datetime(df["pickup_hour"])
-    train = df[df["pickup_hour"] < cutoff].reset_index(drop=True)
-    test = df[df["pickup_hour"] >= cutoff].reset_index(drop=True)
+    is_train = (pd.to_datetime(df[time_col]) < cutoff).to_numpy()
+    feature_cols = df.columns.drop(target_col)
+
+    def take(mask: np.ndarray):
+        X = df.loc[mask, feature_cols]
+        y = df.loc[mask, target_col]
+        # Assigning a RangeIndex is free, unlike reset_index which copies the data
+        X.index = y.index = pd.RangeIndex(len(X))
+        if X[time_col].dtype.kind != "M":
+            X[time_col] = pd.to_datetime(X[time_col])
+        return X, y
+
+    X_train, y_train = take(is_train)
+    X_test, y_test = take(~is_train)
+    return X_train, y_train, X_test, y_test
+
+
+class TimeSeriesDataset:
+    """
+    Features, target and timestamps sorted by time once and held as
+    contiguous float32 arrays.
+
+    Splits are positional: `searchsorted` finds a cutoff and every split or
+    fold is a row slice, i.e. a view into the same arrays. The feature block
+    of any slice is C-contiguous float32 and can go straight to LightGBM.
+
+    Args:
+        X: (rows, features) float32, sorted by `times`
+        y: (rows,) float32
+        times: (rows,) datetime64, ascending
+        feature_names: Column names of X
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, times: np.ndarray, feature_names: List[str]):
+        self.X = X
+        self.y = y
+        self.times = times
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        target_col: str = "target",
+        time_col: str = "pickup_hour",
+        feature_cols: Optional[List[str]] = None,
+        chunk_rows: int = 8192,
+    ) -> "TimeSeriesDataset":
+        """
+        Build from a frame such as the sliding_window_features output.
+
+        Args:
+            feature_cols: Defaults to every numeric column except target and time
+            chunk_rows: Rows copied per step; the only temporary is one chunk
+        """
+        if feature_cols is None:
+            feature_cols = [
+                col for col in df.columns
+                if col not in (target_col, time_col) and pd.api.types.is_numeric_dtype(df[col])
+            ]
+
+        times = pd.to_datetime(df[time_col])
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert(None)
+        times = times.to_numpy()
+        order = np.argsort(times, kind="stable")
+
+        X = np.empty((len(df), len(feature_cols)), dtype=np.float32)
+        for start in range(0, len(df), chunk_rows):
+            rows = order[start:start + chunk_rows]
+            X[start:start + len(rows)] = df.iloc[rows][feature_cols].to_numpy()
+
+        y = df[target_col].to_numpy(dtype=np.float32)[order]
+        return cls(X, y, times[order], feature_cols)
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    def position(self, cutoff: datetime) -> int:
+        """
+        Number of rows strictly before `cutoff`.
+        """
+        cutoff = pd.Timestamp(cutoff)
+        if cutoff.tz is not None:
+            cutoff = cutoff.tz_convert(None)
+        return int(np.searchsorted(self.times, cutoff.to_datetime64(), side="left"))
+
+    def rows(self, start: int, stop: int) -> "TimeSeriesDataset":
+        return TimeSeriesDataset(
+            self.X[start:stop], self.y[start:stop], self.times[start:stop], self.feature_names
+        )
+
+    def split(self, cutoff: datetime, end: Optional[datetime] = None) -> Tuple["TimeSeriesDataset", "TimeSeriesDataset"]:
+        """
+        Views of the rows before `cutoff` and of [cutoff, end) (to the last row by default).
+        """
+        split_at = self.position(cutoff)
+        stop = self.position(end) if end is not None else len(self)
+        return self.rows(0, split_at), self.rows(split_at, stop)
+
+    def rolling_folds(
+        self, cutoffs: List[datetime], horizon: Optional[timedelta] = None
+    ) -> List[Tuple["TimeSeriesDataset", "TimeSeriesDataset"]]:
+        """
+        Rolling-origin (expanding window) folds, each validating on
+        [cutoff, cutoff + horizon) or on everything after the cutoff.
+        """
+        return [
+            self.split(cutoff, pd.Timestamp(cutoff) + horizon if horizon is not None else None)
+            for cutoff in cutoffs
+        ]
+
+    def lgb_dataset(self, reference=None, **params):
+        """
+        A lightgbm.Dataset over this block without another conversion.
+        """
+        import lightgbm as lgb  # only needed by callers that train
+
+        return lgb.Dataset(
+            self.X, label=self.y, feature_name=self.feature_names, reference=reference, params=params or None
+        )
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the arrays as .npy so other processes can memory-map them with `load`.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "X.npy", self.X)
+        np.save(directory / "y.npy", self.y)
+        np.save(directory / "times.npy", self.times)
+        (directory / "features.json").write_text(json.dumps(self.feature_names))
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = "r") -> "TimeSeriesDataset":
+        directory = Path(directory)
+        return cls(
+            np.load(directory / "X.npy", mmap_mode=mmap_mode),
+            np.load(directory / "y.npy", mmap_mode=mmap_mode),
+            np.load(directory / "times.npy", mmap_mode=mmap_mode),
+            json.loads((directory / "features.json").read_text()),
+        )
+
+
+def _cache_cli(argv: Optional[List[str]] = None) -> None:
+    """
+    python -m src.data_utils cache-info
+    python -m src.data_utils cache-prune [--older-than DAYS] [--all]
+    python -m src.data_utils stations --year 2014
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Inspect or prune the cleaned-trip Parquet cache, or rebuild the station table."
+    )
+    parser.add_argument("--cache-dir", type=Path, default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("cache-info", help="List cache entries")
+    prune = commands.add_parser("cache-prune", help="Delete stale, unused or all entries")
+    prune.add_argument("--older-than", type=float, metavar="DAYS", default=None)
+    prune.add_argument("--all", action="store_true", help="Delete every entry")
+    stations = commands.add_parser("stations", help="Rebuild the station table from the raw CSVs")
+    stations.add_argument("--year", type=int, required=True)
+    stations.add_argument("--data-dir", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "stations":
+        table = extract_station_metadata(args.year, args.data_dir)
+        print(f"Wrote {len(table)} stations to {STATIONS_PATH}")
+        return
+
+    cache = TripCache(args.cache_dir)
+    if args.command == "cache-info":
+        entries = cache.entries()
+        print(f"{cache.cache_dir}: {len(entries)} entries, {entries['cache_mb'].sum():.1f} MB")
+        if not entries.empty:
+            print(entries.drop(columns=["source"]).to_string(index=False))
+    else:
+        removed = cache.prune(older_than_days=args.older_than, clear=args.all)
+        print(f"Removed {len(removed)} cache files from {cache.cache_dir}")
 
-    X_train = train.drop(columns=[target_col])
-    y_train = train[target_col]
-    X_test = test.drop(columns=[target_col])
-    y_test = test[target_col]
 
-    return X_train, y_train, X_test, y_test
\ No newline at end of file
+if __name__ == "__main__":
+    _cache_cli()
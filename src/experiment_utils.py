@@ -1,6 +1,9 @@
 import logging
 import os
+import time
+
 import mlflow
+from mlflow.entities import Metric, Param
 from mlflow.models import infer_signature
 from dotenv import load_dotenv
 
@@ -8,7 +11,7 @@ from dotenv import load_dotenv
 # Logging Setup
 # -----------------------------
 logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(_name_)
+logger = logging.getLogger(__name__)
 
 # -----------------------------
 # Load environment variables
@@ -77,6 +80,67 @@ def log_model_to_mlflow(
             logger.info(f"✅ Model registered as: {model_name}")
             return model_info
 
+    except Exception as e:
+        logger.error(f"❌ MLflow logging failed: {e}")
+        raise
+
+
+def log_trials_to_mlflow(
+    trials,
+    experiment_name="citi-bike-trip-prediction",
+    metric_name="mae",
+    run_name="hyperparameter_search",
+):
+    """
+    Log hyperparameter-search trials as nested runs under one parent run.
+
+    Each trial's params and metrics go out in a single `log_batch` request
+    instead of one request per value, and no model artifacts are logged;
+    use `log_model_to_mlflow` for the model that is finally refit.
+
+    Parameters:
+    - trials: Dicts with "params", metric_name and optionally "fold_mae",
+      "n_estimators", "best_iteration", "rung", "seconds"
+    - experiment_name: MLflow experiment name
+    - metric_name: Name of the cross-validated metric
+    - run_name: Name of the parent run
+
+    Returns:
+    - Parent run id
+    """
+    try:
+        mlflow.set_experiment(experiment_name)
+        client = mlflow.tracking.MlflowClient()
+
+        with mlflow.start_run(run_name=run_name) as parent:
+            for i, trial in enumerate(trials):
+                with mlflow.start_run(run_name=f"trial_{i}", nested=True) as run:
+                    timestamp = int(time.time() * 1000)
+                    params = dict(trial["params"])
+                    for key in ("n_estimators", "rung"):
+                        if key in trial:
+                            params[key] = trial[key]
+
+                    metrics = [Metric(metric_name, trial[metric_name], timestamp, 0)]
+                    metrics += [
+                        Metric(f"{metric_name}_fold", value, timestamp, fold)
+                        for fold, value in enumerate(trial.get("fold_mae", []))
+                    ]
+                    for key in ("best_iteration", "seconds"):
+                        if key in trial:
+                            metrics.append(Metric(key, trial[key], timestamp, 0))
+
+                    client.log_batch(
+                        run.info.run_id,
+                        metrics=metrics,
+                        params=[Param(k, str(v)) for k, v in params.items()],
+                    )
+
+            best = min(trials, key=lambda t: t[metric_name])
+            mlflow.log_metric(f"best_{metric_name}", best[metric_name])
+            logger.info(f"✅ Logged {len(trials)} trials; best {metric_name}: {best[metric_name]:.4f}")
+            return parent.info.run_id
+
     except Exception as e:
         logger.error(f"❌ MLflow logging failed: {e}")
         raise
\ No newline at end of file
@@ -1,6 +1,11 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import hopsworks
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.lag_features import build_lag_matrix, daily_trip_counts
+
 # -----------------------------
 # Step 1: Connect to Hopsworks
 # -----------------------------
@@ -22,29 +27,13 @@ df = fg_raw.read()
 # -----------------------------
 # Step 3: Prepare daily trip counts
 # -----------------------------
-df['starttime'] = pd.to_datetime(df['starttime'])
-df['date'] = df['starttime'].dt.date
-
-daily_counts = (
-    df.groupby(['start_station_name', 'date'])
-    .size()
-    .reset_index(name='trip_count')
-    .sort_values(['start_station_name', 'date'])
-)
+daily_counts = daily_trip_counts(df)
 
 # -----------------------------
 # Step 4: Create 28-day lag features
 # -----------------------------
-for lag in range(1, 29):
-    daily_counts[f'lag_{lag}'] = (
-        daily_counts.groupby('start_station_name')['trip_count'].shift(lag)
-    )
-
-# Drop rows with incomplete lag history
-daily_lagged = daily_counts.dropna().reset_index(drop=True)
-
-# Add timestamp column for Hopsworks event_time
-daily_lagged['date'] = pd.to_datetime(daily_lagged['date'])
+# Missing days are filled with 0 trips; drop rows with incomplete lag history
+daily_lagged = build_lag_matrix(daily_counts).dropna().reset_index(drop=True)
 
 # -----------------------------
 # Step 5: Write to Hopsworks Feature Store
@@ -0,0 +1,205 @@
+"""
+Write-behind sink for feature group inserts.
+
+Rows handed to `write` are buffered, deduplicated on the primary key and
+flushed in sized batches by a background thread. Hopsworks inserts are issued
+with wait_for_job=False, so a flush returns once the batch is uploaded and
+the materialization job runs on the cluster while the pipeline goes on.
+The same sink works against the local Parquet backend (src/local_feature_store.py).
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rows per insert call
+BATCH_ROWS = 50_000
+# Batches waiting for the writer thread before `write` blocks
+MAX_PENDING_BATCHES = 4
+
+
+class FeatureGroupSink:
+    """
+    Args:
+        fg: Feature group handle with `insert(df, write_options=...)`
+        primary_key: Dedupe key (defaults to fg.primary_key); the last row per key wins
+        batch_rows: Rows per insert
+        max_retries: Retries per batch before the sink gives up
+        backoff_seconds: First retry delay, doubled (with jitter) on every retry
+        wait_for_job: Block each insert on the materialization job (Hopsworks only)
+    """
+
+    def __init__(
+        self,
+        fg,
+        primary_key: Optional[List[str]] = None,
+        batch_rows: int = BATCH_ROWS,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        wait_for_job: bool = False,
+        max_pending_batches: int = MAX_PENDING_BATCHES,
+    ):
+        self.fg = fg
+        self.primary_key = list(primary_key or getattr(fg, "primary_key", []) or [])
+        self.batch_rows = batch_rows
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.write_options = {"wait_for_job": wait_for_job}
+
+        self._buffer: List[pd.DataFrame] = []
+        self._buffered_rows = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[pd.DataFrame]]" = queue.Queue(maxsize=max_pending_batches)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._metrics = {
+            "rows_in": 0,
+            "rows_written": 0,
+            "duplicates_dropped": 0,
+            "batches": 0,
+            "retries": 0,
+            "flush_seconds": [],
+        }
+        self._started = time.perf_counter()
+        self._worker = threading.Thread(target=self._run, name="feature-sink", daemon=True)
+        self._worker.start()
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Buffer rows; a batch is handed to the writer once batch_rows are buffered.
+        """
+        self._raise_if_failed()
+        if self._closed:
+            raise RuntimeError("FeatureGroupSink is closed")
+        if df.empty:
+            return
+
+        with self._lock:
+            self._buffer.append(df)
+            self._buffered_rows += len(df)
+            self._metrics["rows_in"] += len(df)
+            batches = self._take_batches(final=False)
+        for batch in batches:
+            self._queue.put(batch)
+
+    def flush(self) -> None:
+        """
+        Hand everything buffered to the writer and wait until it is written.
+        """
+        with self._lock:
+            batches = self._take_batches(final=True)
+        for batch in batches:
+            self._queue.put(batch)
+        self._queue.join()
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't hide the original error behind a failing flush
+            try:
+                self.close()
+            except Exception:
+                logger.exception("Flushing feature sink failed")
+        return False
+
+    def _take_batches(self, final: bool) -> List[pd.DataFrame]:
+        """
+        Cut the buffer into deduplicated batches (caller holds the lock).
+        """
+        if not self._buffer or (not final and self._buffered_rows < self.batch_rows):
+            return []
+
+        rows = pd.concat(self._buffer, ignore_index=True) if len(self._buffer) > 1 else self._buffer[0]
+        self._buffer, self._buffered_rows = [], 0
+        if self.primary_key:
+            deduped = rows.drop_duplicates(subset=self.primary_key, keep="last")
+            self._metrics["duplicates_dropped"] += len(rows) - len(deduped)
+            rows = deduped
+
+        n_full = len(rows) if final else len(rows) - len(rows) % self.batch_rows
+        batches = [rows.iloc[i:i + self.batch_rows] for i in range(0, n_full, self.batch_rows)]
+        if n_full < len(rows):
+            self._buffer, self._buffered_rows = [rows.iloc[n_full:]], len(rows) - n_full
+        return batches
+
+    # -----------------------------
+    # Writer thread
+    # -----------------------------
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is None:
+                    self._write_with_retry(batch)
+            except BaseException as e:  # surfaced to the producer on its next call
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write_with_retry(self, batch: pd.DataFrame) -> None:
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self.fg.insert(batch, write_options=self.write_options)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * 2 ** attempt * (0.5 + random.random())
+                logger.warning(f"Insert of {len(batch)} rows failed ({e}); retrying in {delay:.1f}s")
+                self._metrics["retries"] += 1
+                time.sleep(delay)
+                continue
+
+            self._metrics["flush_seconds"].append(time.perf_counter() - start)
+            self._metrics["rows_written"] += len(batch)
+            self._metrics["batches"] += 1
+            return
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Feature group insert failed after retries") from self._error
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def metrics(self) -> dict:
+        flushes = list(self._metrics["flush_seconds"])
+        elapsed = time.perf_counter() - self._started
+        write_seconds = sum(flushes)
+        return {
+            "rows_in": self._metrics["rows_in"],
+            "rows_written": self._metrics["rows_written"],
+            "duplicates_dropped": self._metrics["duplicates_dropped"],
+            "batches": self._metrics["batches"],
+            "retries": self._metrics["retries"],
+            "flush_latency_mean_s": write_seconds / len(flushes) if flushes else 0.0,
+            "flush_latency_max_s": max(flushes, default=0.0),
+            "rows_per_second": self._metrics["rows_written"] / write_seconds if write_seconds else 0.0,
+            "elapsed_s": elapsed,
+        }
@@ -0,0 +1,167 @@
+"""
+Backend-agnostic access to feature groups.
+
+Both backends hand out feature-group objects with the Hopsworks query API
+(select/select_all/filter/read/insert), so callers do not change when the
+backend does. The backend is chosen with FEATURE_STORE_BACKEND ("hopsworks"
+or "local").
+"""
+import operator
+from abc import ABC, abstractmethod
+from datetime import datetime
+from functools import reduce
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+import src.config as config
+from src.hopsworks_session import HopsworksSession, get_session
+
+
+def time_range_query(
+    fg,
+    time_col: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[List[str]] = None,
+    stations: Optional[Iterable[str]] = None,
+):
+    """
+    Build a feature-group query with the time range (both ends inclusive),
+    station filter and column selection pushed down to the feature store.
+    """
+    query = fg.select(columns) if columns else fg.select_all()
+
+    conditions = []
+    if start is not None:
+        conditions.append(getattr(fg, time_col) >= start)
+    if end is not None:
+        conditions.append(getattr(fg, time_col) <= end)
+    if stations is not None:
+        conditions.append(fg.start_station_name.isin(list(stations)))
+
+    if not conditions:
+        return query
+    return query.filter(reduce(operator.and_, conditions))
+
+
+def per_station_since(fg, time_col: str, starts: pd.Series, exact: bool = False):
+    """
+    Predicate selecting each station's rows from its own start time on.
+
+    Stations that share a start time share one isin term, so the predicate
+    grows with the number of distinct starts, not with the number of stations.
+
+    Args:
+        fg: Feature group the predicate is built from
+        time_col: Time column compared with the starts
+        starts: Start time per station, indexed by start_station_name
+        exact: Select only the rows at the start time itself
+
+    Returns:
+        Filter for fg.filter(...), or None when `starts` is empty
+    """
+    op = operator.eq if exact else operator.ge
+    terms = [
+        op(getattr(fg, time_col), start) & fg.start_station_name.isin(list(stations))
+        for start, stations in starts.groupby(starts.to_numpy()).groups.items()
+    ]
+    return reduce(operator.or_, terms) if terms else None
+
+
+class FeatureStore(ABC):
+    @abstractmethod
+    def get_feature_group(self, name: str, version: int = 1):
+        """
+        Return an existing feature group; raises if it does not exist.
+        """
+
+    @abstractmethod
+    def get_or_create_feature_group(
+        self,
+        name: str,
+        version: int = 1,
+        primary_key: Optional[List[str]] = None,
+        event_time: Optional[str] = None,
+        description: str = "",
+    ):
+        """
+        Return a feature group, creating its metadata on first use.
+        """
+
+    def read_range(
+        self,
+        name: str,
+        version: int = 1,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        stations: Optional[Iterable[str]] = None,
+        time_col: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Read an event-time range (both ends inclusive) of a feature group.
+        """
+        fg = self.get_feature_group(name, version)
+        return time_range_query(fg, time_col or fg.event_time, start, end, columns, stations).read()
+
+
+class HopsworksFeatureStore(FeatureStore):
+    """
+    Thin adapter over a Hopsworks project's feature store.
+
+    Feature store, feature group and model registry handles come from a
+    HopsworksSession, so they are shared by every store created in the process.
+
+    Args:
+        session: Session to use (defaults to the process-wide one)
+    """
+
+    def __init__(self, session: Optional[HopsworksSession] = None):
+        self.session = session or get_session()
+
+    @property
+    def project(self):
+        return self.session.project()
+
+    def get_feature_group(self, name: str, version: int = 1):
+        fg = self.session.feature_group(name, version)
+        if fg is None:
+            raise LookupError(f"Feature group {name} v{version} not found")
+        return fg
+
+    def get_or_create_feature_group(
+        self,
+        name: str,
+        version: int = 1,
+        primary_key: Optional[List[str]] = None,
+        event_time: Optional[str] = None,
+        description: str = "",
+    ):
+        return self.session.call(lambda: self.session.feature_store().get_or_create_feature_group(
+            name=name,
+            version=version,
+            primary_key=primary_key,
+            event_time=event_time,
+            description=description,
+        ))
+
+    def get_model_registry(self):
+        return self.session.model_registry()
+
+
+def get_feature_store(backend: Optional[str] = None) -> FeatureStore:
+    """
+    Create the configured feature store backend.
+
+    Args:
+        backend: "hopsworks" or "local" (defaults to config.FEATURE_STORE_BACKEND)
+    """
+    backend = backend or config.FEATURE_STORE_BACKEND
+    if backend == "local":
+        from src.local_feature_store import LocalFeatureStore
+
+        return LocalFeatureStore(config.LOCAL_FEATURE_STORE_DIR)
+    if backend == "hopsworks":
+        return HopsworksFeatureStore()
+    raise ValueError(f"Unknown feature store backend: {backend}")
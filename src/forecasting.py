@@ -0,0 +1,136 @@
+"""
+Multi-step recursive forecasts for all stations at once.
+
+Each step predicts one period ahead for the whole station batch with a single
+`model.predict` call, then feeds the predictions back in as the newest lag.
+"""
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from src.lag_features import LAG_COLUMNS, N_LAGS
+
+# Longest horizons we forecast for rebalancing
+MAX_DAILY_HORIZON = 14
+MAX_HOURLY_HORIZON = 48
+
+
+def recursive_predict(
+    model,
+    history: np.ndarray,
+    horizon: int,
+    step_features: Callable[[np.ndarray, int], object],
+) -> np.ndarray:
+    """
+    Roll a one-step model forward `horizon` steps.
+
+    The lag buffer is a single (stations, n_lags + horizon) array ordered
+    oldest to newest; step h reads the window buffer[:, h:h + n_lags] as a
+    view and writes its prediction into the next free column, so nothing is
+    shifted or copied between steps.
+
+    Args:
+        model: Anything with a `predict` method
+        history: (stations, n_lags) observed values, oldest first
+        horizon: Number of steps to forecast
+        step_features: Builds the model input from the window (oldest first)
+            and the 0-based step
+
+    Returns:
+        (horizon, stations) array of predictions, clipped at 0
+    """
+    n_stations, n_lags = history.shape
+    buffer = np.empty((n_stations, n_lags + horizon), dtype=np.float64)
+    buffer[:, :n_lags] = history
+
+    predictions = np.empty((horizon, n_stations), dtype=np.float64)
+    for step in range(horizon):
+        window = buffer[:, step:step + n_lags]
+        step_pred = np.maximum(np.asarray(model.predict(step_features(window, step))), 0)
+        predictions[step] = step_pred
+        buffer[:, n_lags + step] = step_pred
+    return predictions
+
+
+def _tidy(stations: np.ndarray, times, predictions: np.ndarray, time_col: str) -> pd.DataFrame:
+    """
+    `times` is either one DatetimeIndex of `horizon` steps shared by all
+    stations, or a (horizon, stations) array when each station has its own origin.
+    """
+    horizon, n_stations = predictions.shape
+    times = np.repeat(times.values, n_stations) if isinstance(times, pd.DatetimeIndex) else times.ravel()
+    return pd.DataFrame({
+        time_col: times,
+        "start_station_name": np.tile(stations, horizon),
+        "horizon": np.repeat(np.arange(1, horizon + 1, dtype=np.int32), n_stations),
+        "predicted_trip_count": predictions.ravel(),
+    })
+
+
+def forecast_daily(model, lagged: pd.DataFrame, horizon: int = MAX_DAILY_HORIZON) -> pd.DataFrame:
+    """
+    Forecast daily trip counts 1..horizon days after each station's latest date.
+
+    Args:
+        model: Estimator trained on lag_1..lag_28 (as in the model pipeline)
+        lagged: Rows in the citibike_daily_lagged layout; each station's
+            newest row is its forecast origin, so stations whose data ends
+            earlier than the others are still forecast (from their own last day)
+
+    Returns:
+        Tidy DataFrame [date, start_station_name, horizon, predicted_trip_count]
+    """
+    if not 1 <= horizon <= MAX_DAILY_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_DAILY_HORIZON} days")
+
+    lagged = lagged.assign(date=pd.to_datetime(lagged["date"]))
+    latest = lagged.sort_values(["start_station_name", "date"]).drop_duplicates("start_station_name", keep="last")
+    origins = latest["date"].to_numpy()
+
+    # The origin row holds the origin day's count plus the 27 days before it
+    # inside lag_1..lag_27; that is the full lag window for origin + 1 day
+    newest_first = latest[["trip_count"] + LAG_COLUMNS[:N_LAGS - 1]].to_numpy(dtype=np.float64)
+    history = newest_first[:, ::-1]
+
+    predictions = recursive_predict(
+        model,
+        history,
+        horizon,
+        lambda window, step: pd.DataFrame(window[:, ::-1], columns=LAG_COLUMNS),
+    )
+    times = origins[None, :] + np.arange(1, horizon + 1)[:, None] * np.timedelta64(1, "D")
+    return _tidy(latest["start_station_name"].to_numpy(), times, predictions, "date")
+
+
+def forecast_hourly(model, features: pd.DataFrame, horizon: int = MAX_HOURLY_HORIZON) -> pd.DataFrame:
+    """
+    Forecast hourly rides for the 1..horizon hours starting at each station's
+    latest feature row.
+
+    Args:
+        model: Pipeline trained on the rides_t-N windows (see pipeline_utils.get_pipeline)
+        features: Output of `inference.load_hourly_features_from_store`
+
+    Returns:
+        Tidy DataFrame [pickup_hour, start_station_name, horizon, predicted_trip_count]
+    """
+    if not 1 <= horizon <= MAX_HOURLY_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HOURLY_HORIZON} hours")
+
+    lag_columns: List[str] = [c for c in features.columns if c.startswith("rides_t-")]
+    origin = features["pickup_hour"].max()
+    latest = features[features["pickup_hour"] == origin]
+    stations = latest["start_station_name"].to_numpy()
+    times = pd.date_range(origin, periods=horizon, freq="h")
+
+    def step_features(window: np.ndarray, step: int) -> pd.DataFrame:
+        frame = pd.DataFrame(window, columns=lag_columns)
+        frame["pickup_hour"] = times[step]
+        frame["start_station_name"] = stations
+        return frame
+
+    predictions = recursive_predict(
+        model, latest[lag_columns].to_numpy(dtype=np.float64), horizon, step_features
+    )
+    return _tidy(stations, times, predictions, "pickup_hour")
@@ -1,16 +1,105 @@
-import os
 import sys
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit_folium import st_folium
 
-from config import DATA_DIR
-from inference import (
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.config import MODEL_MEMORY_CACHE_SIZE, STATIONS_PATH
+from src.inference import (
+    current_model_version,
+    fetch_latest_daily_predictions,
+    get_feature_store,
     get_model_predictions,
     load_batch_of_features_from_store,
     load_model_from_registry,
 )
+from src.map_utils import demand_map
+from src.plot_utils import StationSeries, plot_stations
+from src.stations import read_stations, stations_geojson
+
+# Features and predictions only change once an hour
+CACHE_TTL_SECONDS = 3600
+
+
+# -----------------------------
+# Cached loaders
+# -----------------------------
+@st.cache_resource(show_spinner=False)
+def get_store():
+    # One feature store connection per server process, shared by all sessions
+    return get_feature_store()
+
+
+@st.cache_resource(max_entries=MODEL_MEMORY_CACHE_SIZE, show_spinner=False)
+def get_model(version: int):
+    # Keyed on the current version, so a newly registered model replaces the cached one
+    return load_model_from_registry(version=version)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def get_features(hour_key: str) -> pd.DataFrame:
+    return load_batch_of_features_from_store(pd.Timestamp(hour_key), fs=get_store())
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def get_predictions(hour_key: str, model_version: str, _model, _features: pd.DataFrame) -> pd.DataFrame:
+    # Model and features are already cached, so only the hour and model version are hashed;
+    # a newly registered model gets its own entry instead of the old model's predictions
+    return get_model_predictions(_model, _features)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def get_precomputed_predictions(hour_key: str) -> pd.DataFrame:
+    return fetch_latest_daily_predictions(fs=get_store())
+
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def get_station_series(hour_key: str, _features: pd.DataFrame, _predictions: pd.DataFrame) -> StationSeries:
+    # Lag block and station lookup are built once per hour and shared by every chart
+    return StationSeries(_features, predictions=_predictions["predicted_demand"])
+
+
+def station_table_version() -> Optional[int]:
+    # None until the station table is built (not cached, so a new table shows up
+    # without a restart); changes whenever the table is rebuilt
+    return STATIONS_PATH.stat().st_mtime_ns if STATIONS_PATH.exists() else None
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_station_layer(table_version: int) -> str:
+    # GeoJSON of the station table, serialized once per version of the table
+    return stations_geojson(read_stations())
+
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def get_demand_map(hour_key: str, source: str, table_version: int, _predictions: pd.DataFrame):
+    # Only re-colored when the predictions change (new hour or source) or the table is rebuilt
+    return demand_map(get_station_layer(table_version), _predictions)
+
+
+def load_concurrently(hour_key: str):
+    """
+    Load features and model side by side; each worker is attached to this
+    script run so Streamlit's caches work from the pool threads.
+
+    Returns:
+        (features, model, model version)
+    """
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=2, initializer=lambda: add_script_run_ctx(ctx=ctx)
+    ) as executor:
+        features = executor.submit(get_features, hour_key)
+        version = executor.submit(current_model_version)
+        model_version = version.result()
+        model = executor.submit(get_model, model_version)
+        return features.result(), model.result(), model_version
+
 
 # -----------------------------
 # Streamlit Layout
@@ -18,41 +107,50 @@ from inference import (
 st.set_page_config(layout="wide")
 st.title("🚲 Citi Bike Trip Demand Forecast")
 current_date = pd.Timestamp.now(tz="UTC")
+current_hour = current_date.floor("h")
 st.subheader(f"Prediction for {current_date.strftime('%Y-%m-%d %H:%M:%S')} UTC")
 
+use_precomputed = st.sidebar.checkbox(
+    "Serve precomputed predictions",
+    value=False,
+    help="Read the rows written by the inference pipeline instead of running the model here.",
+)
+
 # -----------------------------
 # Progress bar setup
 # -----------------------------
 progress_bar = st.sidebar.header("Progress")
 progress_bar = st.sidebar.progress(0)
-N_STEPS = 4
+N_STEPS = 3
 
 # -----------------------------
-# Step 1: Load features
+# Step 1: Load features and model / precomputed predictions
 # -----------------------------
-with st.spinner("📦 Fetching batch of features..."):
-    features = load_batch_of_features_from_store(current_date)
-    st.sidebar.success("✅ Features loaded")
-    progress_bar.progress(1 / N_STEPS)
+if use_precomputed:
+    with st.spinner("📦 Fetching precomputed predictions..."):
+        predictions = get_precomputed_predictions(current_hour.isoformat())
+        st.sidebar.success("✅ Predictions loaded")
+        progress_bar.progress(2 / N_STEPS)
+else:
+    with st.spinner("📦 Fetching features and loading model..."):
+        features, model, model_version = load_concurrently(current_hour.isoformat())
+        st.sidebar.success("✅ Features and model loaded")
+        progress_bar.progress(1 / N_STEPS)
 
-# -----------------------------
-# Step 2: Load model
-# -----------------------------
-with st.spinner("🧠 Loading model from Hopsworks..."):
-    model = load_model_from_registry()
-    st.sidebar.success("✅ Model loaded")
-    progress_bar.progress(2 / N_STEPS)
+    # -----------------------------
+    # Step 2: Run inference
+    # -----------------------------
+    with st.spinner("🔮 Predicting demand..."):
+        predictions = get_predictions(current_hour.isoformat(), str(model_version), model, features)
+        st.sidebar.success("✅ Predictions computed")
+        progress_bar.progress(2 / N_STEPS)
 
-# -----------------------------
-# Step 3: Run inference
-# -----------------------------
-with st.spinner("🔮 Predicting demand..."):
-    predictions = get_model_predictions(model, features)
-    st.sidebar.success("✅ Predictions computed")
-    progress_bar.progress(3 / N_STEPS)
+if predictions.empty:
+    st.warning("No predictions available for this hour yet.")
+    st.stop()
 
 # -----------------------------
-# Step 4: Display predictions
+# Step 3: Display predictions
 # -----------------------------
 with st.spinner("📊 Displaying results..."):
     st.subheader("🔢 Top 10 Stations by Predicted Demand")
@@ -65,5 +163,29 @@ with st.spinner("📊 Displaying results..."):
     col2.metric("Max Rides", f"{predictions['predicted_demand'].max():.0f}")
     col3.metric("Min Rides", f"{predictions['predicted_demand'].min():.0f}")
 
+    if not use_precomputed:
+        st.subheader("📉 Last 4 Weeks and Next-Day Prediction")
+        stations = st.multiselect(
+            "Stations",
+            options=sorted(predictions["start_station_name"].unique()),
+            default=list(top10["start_station_name"]),
+        )
+        if stations:
+            series = get_station_series(current_hour.isoformat(), features, predictions)
+            st.plotly_chart(plot_stations(series, stations), use_container_width=True)
+
+    st.subheader("🗺️ Predicted Demand by Station")
+    table_version = station_table_version()
+    if table_version is None:
+        st.info("No station table yet; build it with `python -m src.data_utils stations --year 2014`.")
+    else:
+        source = "precomputed" if use_precomputed else "model"
+        st_folium(
+            get_demand_map(current_hour.isoformat(), source, table_version, predictions),
+            height=520,
+            use_container_width=True,
+            returned_objects=[],
+        )
+
     st.sidebar.success("✅ Visualization done")
-    progress_bar.progress(4 / N_STEPS)
\ No newline at end of file
+    progress_bar.progress(3 / N_STEPS)
\ No newline at end of file
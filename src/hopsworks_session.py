@@ -0,0 +1,178 @@
+"""
+Process-wide Hopsworks connection with cached metadata handles.
+
+`hopsworks.login` and every get_feature_store / get_feature_group /
+get_feature_view / get_model_registry call is a REST round trip. The session
+logs in once per process, keeps those handles for `ttl_seconds`, and logs in
+again when the server reports that the session has expired.
+"""
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import src.config as config
+
+AUTH_ERROR_STATUS = (401, 403)
+
+
+def _default_login():
+    import hopsworks
+
+    return hopsworks.login(
+        project=config.HOPSWORKS_PROJECT_NAME,
+        api_key_value=config.HOPSWORKS_API_KEY,
+    )
+
+
+def is_auth_error(error: Exception) -> bool:
+    """
+    True for errors caused by an expired or rejected Hopsworks session.
+    """
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) in AUTH_ERROR_STATUS
+
+
+class HopsworksSession:
+    """
+    Thread-safe cache of a Hopsworks login and its metadata handles.
+
+    Args:
+        login: Callable returning a logged-in project (defaults to
+            hopsworks.login with the credentials from src.config)
+        ttl_seconds: How long feature store, feature group, feature view and
+            model registry handles are reused before being fetched again
+    """
+
+    def __init__(self, login: Optional[Callable[[], Any]] = None,
+                 ttl_seconds: float = config.HOPSWORKS_HANDLE_TTL_SECONDS):
+        self._login = login or _default_login
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._project = None
+        self._handles: Dict[Hashable, Tuple[Any, float]] = {}
+        self._fetch_locks: Dict[Hashable, threading.Lock] = {}
+        # Bumped by reset(), so a fetch that straddles a reset is not cached
+        self._generation = 0
+        self._stats = {
+            "logins": 0,
+            "reconnects": 0,
+            "metadata_calls": 0,
+            "metadata_calls_avoided": 0,
+        }
+
+    def project(self):
+        with self._lock:
+            if self._project is None:
+                self._project = self._login()
+                self._stats["logins"] += 1
+            return self._project
+
+    def _cached(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            cached = self._handles.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                self._stats["metadata_calls_avoided"] += 1
+                return cached
+            return None
+
+    def _handle(self, key: Hashable, fetch: Callable[[], Any]):
+        """
+        Cached handle for `key`, fetched with `fetch` when missing or expired.
+
+        The fetch runs outside the session lock, under a lock of its own key:
+        concurrent requests for the same handle wait for one fetch, while
+        other handles are served or fetched in parallel. A None handle (not
+        found) is returned but not cached.
+        """
+        cached = self._cached(key)
+        if cached is not None:
+            return cached[0]
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            # Another thread may have fetched it while this one waited
+            cached = self._cached(key)
+            if cached is not None:
+                return cached[0]
+
+            with self._lock:
+                generation = self._generation
+            handle = self.call(fetch)
+            with self._lock:
+                self._stats["metadata_calls"] += 1
+                if handle is not None and generation == self._generation:
+                    self._handles[key] = (handle, time.monotonic() + self.ttl_seconds)
+            return handle
+
+    def feature_store(self):
+        return self._handle("feature_store", lambda: self.project().get_feature_store())
+
+    def feature_group(self, name: str, version: int = 1):
+        return self._handle(
+            ("feature_group", name, version),
+            lambda: self.feature_store().get_feature_group(name=name, version=version),
+        )
+
+    def feature_view(self, name: str, version: int = 1):
+        return self._handle(
+            ("feature_view", name, version),
+            lambda: self.feature_store().get_feature_view(name=name, version=version),
+        )
+
+    def model_registry(self):
+        return self._handle("model_registry", lambda: self.project().get_model_registry())
+
+    def call(self, fn: Callable[[], Any]):
+        """
+        Run `fn`, logging in again and retrying once if the session expired.
+        """
+        try:
+            return fn()
+        except Exception as e:
+            if not is_auth_error(e):
+                raise
+            self.reset()
+            with self._lock:
+                self._stats["reconnects"] += 1
+            return fn()
+
+    def reset(self) -> None:
+        """
+        Drop the login and every cached handle.
+        """
+        with self._lock:
+            self._project = None
+            self._handles.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_session: Optional[HopsworksSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> HopsworksSession:
+    """
+    The process-wide session, created on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = HopsworksSession()
+        return _session
+
+
+def reconnect_on_auth_error(fn: Callable) -> Callable:
+    """
+    Decorator: retry `fn` once on a fresh login if Hopsworks rejects the session.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return get_session().call(lambda: fn(*args, **kwargs))
+
+    return wrapper
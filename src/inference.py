@@ -1,117 +1,252 @@
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
+from typing import Iterable, List, Optional
 
-import hopsworks
 import joblib
 import pandas as pd
 
 import src.config as config
-from src.data_utils import transform_ts_data_info_features
+from src import feature_store
+from src.fast_predictor import FastPredictor
+from src.feature_store import FeatureStore, time_range_query
+from src.hopsworks_session import get_session, reconnect_on_auth_error
+from src.instrumentation import instrumented
+from src.lag_features import LAG_COLUMNS, N_LAGS, next_day_lag_rows
+from src.model_cache import get_model_cache
+from src.station_matrix import StationHourMatrix
+from src.retraining import load_training_state, state_to_metrics
 
+# Where the model pipeline saves the model when FEATURE_STORE_BACKEND=local
+LOCAL_MODEL_PATH = config.MODELS_DIR / config.MODEL_ARTIFACT
+
+# Hours of history per hourly model input row (rides_t-672 .. rides_t-1)
+HOURLY_WINDOW = 24 * 28
 
-def get_hopsworks_project() -> hopsworks.project.Project:
-    return hopsworks.login(
-        project=config.HOPSWORKS_PROJECT_NAME,
-        api_key_value=config.HOPSWORKS_API_KEY,
-    )
 
+def get_hopsworks_project() -> "hopsworks.project.Project":
+    """
+    The project of the process-wide Hopsworks session (logs in on first use).
+    """
+    return get_session().project()
 
-def get_feature_store():
-    project = get_hopsworks_project()
-    return project.get_feature_store()
 
+def get_feature_store() -> FeatureStore:
+    """
+    Feature store for the configured backend (see config.FEATURE_STORE_BACKEND).
+    """
+    return feature_store.get_feature_store()
 
+
+@instrumented()
 def get_model_predictions(model, features: pd.DataFrame) -> pd.DataFrame:
-    predictions = model.predict(features)
+    # A bare LGBMRegressor (the daily model) only takes the columns it was fit on;
+    # pipelines and FastPredictor pick their own columns
+    columns = getattr(model, "feature_name_", None)
+    predictions = model.predict(features[columns] if columns is not None else features)
     return pd.DataFrame({
         "start_station_name": features["start_station_name"].values,
         "predicted_demand": predictions.round(0)
     })
 
 
-def load_batch_of_features_from_store(current_date: datetime) -> pd.DataFrame:
-    fs = get_feature_store()
-
-    fetch_to = current_date - timedelta(hours=1)
-    fetch_from = current_date - timedelta(days=29)
-
-    feature_view = fs.get_feature_view(
-        name=config.FEATURE_VIEW_NAME,
-        version=config.FEATURE_VIEW_VERSION,
-    )
-
-    ts_data = feature_view.get_batch_data(
-        start_time=(fetch_from - timedelta(days=1)),
-        end_time=(fetch_to + timedelta(days=1)),
-    )
-
-    ts_data = ts_data[ts_data.pickup_hour.between(fetch_from, fetch_to)]
-    ts_data.sort_values(by=["start_station_name", "pickup_hour"], inplace=True)
-
-    features = transform_ts_data_info_features(
-        ts_data, feature_col="rides", window_size=24 * 28, step_size=23
-    )
-    return features
-
-
-def load_model_from_registry(version=None):
-    project = get_hopsworks_project()
-    model_registry = project.get_model_registry()
-
-    models = model_registry.get_models(name=config.MODEL_NAME)
-    best_model = max(models, key=lambda m: m.version)
-    model_dir = best_model.download()
-
-    return joblib.load(Path(model_dir) / "lgb_model.pkl")
-
-
+@instrumented()
+@reconnect_on_auth_error
+def load_batch_of_features_from_store(
+    current_date: datetime, stations: Optional[Iterable[str]] = None, fs=None
+) -> pd.DataFrame:
+    """
+    Daily model input for the day of `current_date`.
+
+    Reads the citibike_daily_lagged rows of the N_LAGS days before that day
+    and turns each station's newest one into the lags of the day after it
+    (see lag_features.next_day_lag_rows). Stations without a row in that
+    range are left out.
+
+    Returns:
+        ['start_station_name', 'date', 'lag_1', ..., 'lag_28'], one row per station
+    """
+    fs = fs or get_feature_store()
+
+    day = pd.Timestamp(current_date)
+    if day.tz is not None:
+        day = day.tz_convert("UTC").tz_localize(None)
+    day = day.normalize()
+
+    fg = fs.get_feature_group(name=config.FEATURE_GROUP_NAME, version=config.FEATURE_GROUP_VERSION)
+    lagged = time_range_query(
+        fg,
+        "date",
+        day - timedelta(days=N_LAGS),
+        day - timedelta(days=1),
+        columns=["date", "start_station_name", "trip_count"] + LAG_COLUMNS[:-1],
+        stations=stations,
+    ).read()
+    return next_day_lag_rows(lagged)
+
+
+@instrumented()
+@reconnect_on_auth_error
+def load_hourly_features_from_store(
+    current_hour: datetime, stations: Optional[Iterable[str]] = None, fs=None
+) -> pd.DataFrame:
+    """
+    Hourly model input for the hour of `current_hour`.
+
+    Reads the HOURLY_WINDOW hours before it from citibike_hourly_rides into a
+    StationHourMatrix, so hours a station has no row for count as 0 rides
+    instead of shifting its window. Stations without any row in that range
+    are left out.
+
+    Returns:
+        ['rides_t-672', ..., 'rides_t-1', 'start_station_name', 'pickup_hour'],
+        one row per station
+    """
+    fs = fs or get_feature_store()
+
+    hour = pd.Timestamp(current_hour)
+    if hour.tz is not None:
+        hour = hour.tz_convert("UTC").tz_localize(None)
+    end = hour.floor("h") - timedelta(hours=1)
+    start = end - timedelta(hours=HOURLY_WINDOW - 1)
+
+    fg = fs.get_feature_group(name=config.HOURLY_FEATURE_GROUP_NAME, version=config.HOURLY_FEATURE_GROUP_VERSION)
+    rides = time_range_query(
+        fg, "pickup_hour", start, end, columns=["pickup_hour", "start_station_name", "rides"], stations=stations
+    ).read()
+    pickup_hour = pd.to_datetime(rides["pickup_hour"])
+    if pickup_hour.dt.tz is not None:
+        rides["pickup_hour"] = pickup_hour.dt.tz_convert("UTC").dt.tz_localize(None)
+
+    matrix = StationHourMatrix.from_long(rides, start=start, end=end)
+    return matrix.next_hour_features()
+
+
+@instrumented()
+@reconnect_on_auth_error
+def load_model_from_registry(version=None, fast: bool = False):
+    if config.FEATURE_STORE_BACKEND == "local":
+        # No registry offline: the model pipeline's local save (`version` is ignored)
+        model = joblib.load(LOCAL_MODEL_PATH)
+    else:
+        # Served from the local model cache; the registry is only asked for the
+        # latest version (throttled) and downloads a version it has not seen
+        model = get_model_cache().load(config.MODEL_NAME, version=version, artifact=config.MODEL_ARTIFACT)
+    return FastPredictor(model) if fast else model
+
+
+@reconnect_on_auth_error
+def current_model_version() -> int:
+    """
+    Version load_model_from_registry() loads by default: the latest registry
+    version (looked up at most once per MODEL_VERSION_CHECK_SECONDS), or the
+    local model file's modification time with the local backend.
+    """
+    if config.FEATURE_STORE_BACKEND == "local":
+        return LOCAL_MODEL_PATH.stat().st_mtime_ns
+    return get_model_cache().latest_version(config.MODEL_NAME)
+
+
+@instrumented()
+@reconnect_on_auth_error
 def load_metrics_from_registry(version=None):
-    project = get_hopsworks_project()
-    model_registry = project.get_model_registry()
-
-    models = model_registry.get_models(name=config.MODEL_NAME)
-    best_model = max(models, key=lambda m: m.version)
-
-    return best_model.training_metrics
-
-
-def fetch_next_hour_predictions():
+    if config.FEATURE_STORE_BACKEND == "local":
+        # The metrics the model pipeline would have registered, from its training state
+        state = load_training_state()
+        if state is None:
+            return None
+        return {**state_to_metrics(state), "mae": float(state.get("last_mae", state["mae"]))}
+    return get_model_cache().training_metrics(config.MODEL_NAME, version=version)
+
+
+@instrumented()
+@reconnect_on_auth_error
+def fetch_next_hour_predictions(stations: Optional[Iterable[str]] = None, fs=None):
     now = datetime.now(timezone.utc)
     next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
 
-    fs = get_feature_store()
-    fg = fs.get_feature_group(name=config.FEATURE_GROUP_PREDICTION_NAME, version=1)
-    df = fg.read()
-    return df[df["pickup_hour"] == next_hour]
+    fs = fs or get_feature_store()
+    fg = fs.get_feature_group(
+        name=config.HOURLY_PREDICTION_GROUP_NAME, version=config.HOURLY_PREDICTION_GROUP_VERSION
+    )
+    return time_range_query(fg, "pickup_hour", next_hour, next_hour, stations=stations).read()
 
 
-def fetch_predictions(hours=1):
+@instrumented()
+@reconnect_on_auth_error
+def fetch_predictions(hours=1, stations: Optional[Iterable[str]] = None, fs=None):
     current_hour = (pd.Timestamp.now(tz="UTC") - timedelta(hours=hours)).floor("h")
 
-    fs = get_feature_store()
-    fg = fs.get_feature_group(name=config.FEATURE_GROUP_PREDICTION_NAME, version=1)
-
-    df = fg.filter((fg.pickup_hour >= current_hour)).read()
-    return df
+    fs = fs or get_feature_store()
+    fg = fs.get_feature_group(
+        name=config.HOURLY_PREDICTION_GROUP_NAME, version=config.HOURLY_PREDICTION_GROUP_VERSION
+    )
+    return time_range_query(fg, "pickup_hour", current_hour, stations=stations).read()
 
 
-def fetch_hourly_rides(hours=1):
+@instrumented()
+@reconnect_on_auth_error
+def fetch_hourly_rides(
+    hours=1,
+    stations: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+    fs=None,
+):
     current_hour = (pd.Timestamp.now(tz="UTC") - timedelta(hours=hours)).floor("h")
 
-    fs = get_feature_store()
-    fg = fs.get_feature_group(name=config.FEATURE_GROUP_NAME, version=1)
+    fs = fs or get_feature_store()
+    fg = fs.get_feature_group(name=config.HOURLY_FEATURE_GROUP_NAME, version=config.HOURLY_FEATURE_GROUP_VERSION)
 
-    query = fg.select_all().filter(fg.pickup_hour >= current_hour)
+    query = time_range_query(fg, "pickup_hour", current_hour, columns=columns, stations=stations)
     return query.read()
 
 
-def fetch_days_data(days=1):
+@instrumented()
+@reconnect_on_auth_error
+def fetch_days_data(
+    days=1,
+    stations: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+    fs=None,
+):
     current_date = pd.to_datetime(datetime.now(timezone.utc))
     fetch_from = current_date - timedelta(days=(365 + days))
     fetch_to = current_date - timedelta(days=365)
 
-    fs = get_feature_store()
-    fg = fs.get_feature_group(name=config.FEATURE_GROUP_NAME, version=1)
+    fs = fs or get_feature_store()
+    fg = fs.get_feature_group(name=config.HOURLY_FEATURE_GROUP_NAME, version=config.HOURLY_FEATURE_GROUP_VERSION)
 
-    df = fg.select_all().read()
-    return df[(df["pickup_hour"] >= fetch_from) & (df["pickup_hour"] <= fetch_to)]
\ No newline at end of file
+    query = time_range_query(
+        fg, "pickup_hour", fetch_from, fetch_to, columns=columns, stations=stations
+    )
+    return query.read()
+
+
+@instrumented()
+@reconnect_on_auth_error
+def fetch_latest_daily_predictions(
+    since: Optional[datetime] = None, stations: Optional[Iterable[str]] = None, fs=None
+) -> pd.DataFrame:
+    """
+    Predictions for the nearest forecast day written by the inference
+    pipeline, renamed to the `get_model_predictions` layout
+    (start_station_name, predicted_demand).
+
+    Args:
+        since: Earliest forecast day to consider (defaults to today, UTC)
+    """
+    since = since or pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+
+    fs = fs or get_feature_store()
+    fg = fs.get_feature_group(
+        name=config.FEATURE_GROUP_PREDICTION_NAME, version=config.FEATURE_GROUP_PREDICTION_VERSION
+    )
+    df = time_range_query(
+        fg, "date", since, columns=["date", "start_station_name", "predicted_trip_count"], stations=stations
+    ).read()
+    if df.empty:
+        return pd.DataFrame(columns=["start_station_name", "predicted_demand"])
+
+    nearest = df[df["date"] == df["date"].min()]
+    return pd.DataFrame({
+        "start_station_name": nearest["start_station_name"].values,
+        "predicted_demand": nearest["predicted_trip_count"].round(0).values,
+    })
\ No newline at end of file
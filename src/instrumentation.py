@@ -0,0 +1,251 @@
+"""
+Per-stage run metrics for the pipelines and inference loaders.
+
+    with stage("read_features") as s:
+        df = fg.read()
+        s.rows, s.bytes_read = len(df), frame_bytes(df)
+
+    @instrumented("load_model")
+    def load_model(...): ...
+
+Each stage records wall time, CPU time, memory, rows and bytes read/written.
+The OS only tracks the process's peak RSS (a high-water mark), so a stage
+records that peak as `process_peak_rss_bytes` and how far the stage raised it
+as `peak_rss_growth_bytes`; a stage that stayed below an earlier stage's
+peak shows 0 growth. Records are appended to `runs.jsonl`, and
+`<pipeline>.prom` is rewritten in Prometheus text format (for
+node_exporter's textfile collector) with the stage's labels, both under
+config.PIPELINE_METRICS_DIR. When that setting is empty,
+instrumentation is off and a stage costs one flag check.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import src.config as config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+_METRICS = (
+    "wall_seconds",
+    "cpu_seconds",
+    "process_peak_rss_bytes",
+    "peak_rss_growth_bytes",
+    "rows",
+    "bytes_read",
+    "bytes_written",
+)
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+def frame_bytes(df) -> int:
+    """
+    In-memory size of a DataFrame's columns (cheap; object columns are not inspected).
+    """
+    return int(df.memory_usage(index=False, deep=False).sum()) if isinstance(df, pd.DataFrame) else 0
+
+
+class _NullStage:
+    """
+    Stand-in used when instrumentation is off; attribute writes are dropped.
+    """
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    def __init__(self, run: "Run", name: str, labels: Dict[str, str]):
+        self.run = run
+        self.name = name
+        self.labels = labels
+        self.rows: Optional[int] = None
+        self.bytes_read: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._peak_rss = _peak_rss_bytes()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        peak_rss = _peak_rss_bytes()
+        record = {
+            "run_id": self.run.run_id,
+            "pipeline": self.run.pipeline,
+            "stage": self.name,
+            "labels": self.labels,
+            "finished": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "status": "error" if exc_type else "ok",
+            "error": f"{exc_type.__name__}: {exc}" if exc_type else None,
+            "wall_seconds": time.perf_counter() - self._wall,
+            "cpu_seconds": time.process_time() - self._cpu,
+            "process_peak_rss_bytes": peak_rss,
+            "peak_rss_growth_bytes": None if peak_rss is None else peak_rss - self._peak_rss,
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+        self.run.record(record)
+        return False
+
+
+def _prometheus_labels(labels: Dict[str, str]) -> str:
+    """
+    `name="value",...` with values escaped as the text format requires.
+    """
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    )
+    return ",".join(f'{name}="{value}"' for name, value in escaped)
+
+
+class Run:
+    """
+    One pipeline run: collects stage records and writes the run log and
+    Prometheus file under `metrics_dir`.
+    """
+
+    def __init__(self, pipeline: str, metrics_dir: Path):
+        self.pipeline = pipeline
+        self.run_id = uuid.uuid4().hex[:12]
+        self.metrics_dir = Path(metrics_dir)
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        self.records: List[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, record: dict) -> None:
+        with self._lock:
+            self.records.append(record)
+            with open(self.metrics_dir / "runs.jsonl", "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def write_prometheus(self) -> Path:
+        """
+        Latest value of every metric per stage and label set (the last call
+        wins for stages run more than once), written atomically.
+        """
+        latest: Dict[str, dict] = {}
+        with self._lock:
+            for record in self.records:
+                labels = {"pipeline": self.pipeline, **record["labels"], "stage": record["stage"]}
+                latest[_prometheus_labels(labels)] = record
+
+        lines = []
+        for metric in _METRICS:
+            name = f"citibike_stage_{metric}"
+            lines.append(f"# TYPE {name} gauge")
+            for labels, record in latest.items():
+                if record[metric] is not None:
+                    lines.append(f"{name}{{{labels}}} {record[metric]}")
+        lines.append("# TYPE citibike_stage_failed gauge")
+        for labels, record in latest.items():
+            failed = int(record["status"] == "error")
+            lines.append(f"citibike_stage_failed{{{labels}}} {failed}")
+        lines.append("# TYPE citibike_run_finished_timestamp_seconds gauge")
+        lines.append(
+            f"citibike_run_finished_timestamp_seconds{{{_prometheus_labels({'pipeline': self.pipeline})}}} {time.time():.0f}"
+        )
+
+        path = self.metrics_dir / f"{self.pipeline}.prom"
+        tmp = path.with_suffix(".prom.tmp")
+        tmp.write_text("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+        return path
+
+
+_run: Optional[Run] = None
+_run_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(config.PIPELINE_METRICS_DIR)
+
+
+def start_run(pipeline: str) -> Optional[Run]:
+    """
+    Name the current process's run; the Prometheus file is written at exit.
+    Returns None when instrumentation is off.
+    """
+    global _run
+    if not enabled():
+        return None
+    with _run_lock:
+        _run = Run(pipeline, Path(config.PIPELINE_METRICS_DIR))
+        atexit.register(_run.write_prometheus)
+        return _run
+
+
+def _current_run() -> Run:
+    global _run
+    with _run_lock:
+        if _run is None:
+            _run = Run(Path(sys.argv[0]).stem or "python", Path(config.PIPELINE_METRICS_DIR))
+            atexit.register(_run.write_prometheus)
+        return _run
+
+
+def stage(name: str, **labels):
+    """
+    Context manager timing one stage; set `.rows`, `.bytes_read` and
+    `.bytes_written` on the yielded object to record volumes.
+    """
+    if not enabled():
+        return _NULL_STAGE
+    return Stage(_current_run(), name, {k: str(v) for k, v in labels.items()})
+
+
+def instrumented(name: Optional[str] = None):
+    """
+    Decorator form of `stage`. Rows and bytes read are filled in from a
+    DataFrame result.
+    """
+
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            with stage(stage_name) as s:
+                result = fn(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    s.rows, s.bytes_read = len(result), frame_bytes(result)
+                return result
+
+        return wrapper
+
+    return decorator
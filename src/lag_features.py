@@ -0,0 +1,204 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+N_LAGS = 28
+LAG_COLUMNS = [f"lag_{lag}" for lag in range(1, N_LAGS + 1)]
+
+
+def _as_naive_dates(dates: pd.Series) -> pd.Series:
+    dates = pd.to_datetime(pd.Series(dates))
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize()
+
+
+def daily_trip_counts(df: pd.DataFrame) -> pd.Series:
+    """
+    Count trips per station and calendar day.
+
+    Args:
+        df: Raw trips with ['starttime', 'start_station_name']
+
+    Returns:
+        pd.Series `trip_count` indexed by (start_station_name, date), sorted
+    """
+    dates = _as_naive_dates(df["starttime"]).rename("date")
+    return df.groupby(["start_station_name", dates]).size().rename("trip_count")
+
+
+def build_lag_matrix(
+    series_by_station: pd.Series,
+    lags: Iterable[int] = range(1, N_LAGS + 1),
+    fill_gaps: bool = True,
+) -> pd.DataFrame:
+    """
+    Build all lag columns for every station in one vectorized pass.
+
+    Counts are laid out as one array sorted by station and date. Every lag
+    is read from a single sliding-window view over that array and gathered
+    into one contiguous float64 block, so there is no per-lag groupby and
+    no column-by-column insertion. Lags that would reach back before a
+    station's first day are NaN.
+
+    Args:
+        series_by_station: Daily counts indexed by (start_station_name, date),
+            e.g. daily_trip_counts output
+        lags: Lags in days (default 1..28), one `lag_<k>` column each
+        fill_gaps: Insert missing calendar days with 0 trips so that lag_k is
+            always the count k days earlier. When False, consecutive rows of a
+            station are treated as adjacent days (the historical behaviour).
+
+    Returns:
+        DataFrame with ['start_station_name', 'date', 'trip_count', 'lag_1', ...]
+    """
+    lags = np.asarray(list(lags), dtype=np.int64)
+    lag_columns = [f"lag_{lag}" for lag in lags]
+    series = series_by_station
+    if not series.index.is_monotonic_increasing:
+        series = series.sort_index()
+
+    codes, stations = pd.factorize(series.index.get_level_values(0))
+    dates = _as_naive_dates(series.index.get_level_values(1)).to_numpy()
+    counts = series.to_numpy()
+    group_sizes = np.bincount(codes, minlength=len(stations))
+
+    if fill_gaps:
+        days = dates.astype("datetime64[D]").astype(np.int64)
+        ends = np.cumsum(group_sizes)
+        first_day = days[ends - group_sizes]
+        group_sizes = days[ends - 1] - first_day + 1
+
+        offsets = np.cumsum(group_sizes) - group_sizes
+        values = np.zeros(group_sizes.sum(), dtype=counts.dtype)
+        values[offsets[codes] + days - first_day[codes]] = counts
+
+        group = np.repeat(np.arange(len(stations)), group_sizes)
+        position = np.arange(len(values)) - offsets[group]
+        dates = (first_day[group] + position).astype("datetime64[D]").astype("datetime64[ns]")
+    else:
+        offsets = np.cumsum(group_sizes) - group_sizes
+        values = counts
+        group = codes
+        position = np.arange(len(values)) - offsets[group]
+
+    if len(lags):
+        max_lag = int(lags.max())
+        padded = np.concatenate([np.full(max_lag, np.nan), values.astype(np.float64)])
+        block = sliding_window_view(padded, max_lag + 1)[:, max_lag - lags]
+        block[position[:, None] < lags] = np.nan
+    else:
+        block = np.empty((len(values), 0))
+
+    lagged = pd.DataFrame(block, columns=lag_columns)
+    lagged.insert(0, "trip_count", values)
+    lagged.insert(0, "date", dates)
+    lagged.insert(0, "start_station_name", stations.take(group))
+    return lagged
+
+
+def station_watermarks(keys: pd.DataFrame) -> pd.Series:
+    """
+    Last processed date per station.
+
+    Args:
+        keys: ['start_station_name', 'date'] rows already in the lagged feature group
+
+    Returns:
+        pd.Series indexed by start_station_name
+    """
+    dates = _as_naive_dates(keys["date"]).to_numpy()
+    return pd.Series(dates).groupby(keys["start_station_name"].to_numpy()).max().rename("watermark")
+
+
+def advance_watermarks(watermarks: pd.Series, lagged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Move the watermarks up to the newest lag row written per station.
+
+    Args:
+        watermarks: Current watermarks (see station_watermarks), may be empty
+        lagged: Lag rows just written
+
+    Returns:
+        ['start_station_name', 'date'] with one row per station, the layout
+        of the watermark feature group (read back with station_watermarks)
+    """
+    merged = pd.concat([watermarks, station_watermarks(lagged)]).groupby(level=0).max()
+    return pd.DataFrame({"start_station_name": merged.index.to_numpy(), "date": merged.to_numpy()})
+
+
+def next_day_lag_rows(lagged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Model input for the day after each station's newest lagged row.
+
+    That row's trip_count becomes lag_1 and its lag_k becomes lag_(k+1), so
+    only trip_count and lag_1..lag_27 need to be read.
+
+    Args:
+        lagged: Rows in the citibike_daily_lagged layout, with at least
+            ['start_station_name', 'date', 'trip_count', 'lag_1', ..., 'lag_27']
+
+    Returns:
+        ['start_station_name', 'date', 'lag_1', ..., 'lag_28'], one row per
+        station, `date` being the day that is predicted
+    """
+    latest = (
+        lagged.assign(date=_as_naive_dates(lagged["date"]).to_numpy())
+        .sort_values(["start_station_name", "date"])
+        .drop_duplicates("start_station_name", keep="last")
+    )
+    features = pd.DataFrame(
+        latest[["trip_count"] + LAG_COLUMNS[:-1]].to_numpy(dtype=np.float64), columns=LAG_COLUMNS
+    )
+    features.insert(0, "date", (latest["date"] + pd.Timedelta(days=1)).to_numpy())
+    features.insert(0, "start_station_name", latest["start_station_name"].to_numpy())
+    return features
+
+
+def incremental_lag_rows(
+    new_counts: pd.Series,
+    state: pd.DataFrame,
+    watermarks: pd.Series,
+    lags: Iterable[int] = range(1, N_LAGS + 1),
+) -> pd.DataFrame:
+    """
+    Compute lag rows only for each station's watermark day and the days after it.
+
+    The lagged row stored at a station's watermark already holds the counts
+    of the preceding days in its lag columns, so it is the only history
+    needed. The watermark day itself is recomputed in case it was still
+    partial when it was last processed.
+
+    Args:
+        new_counts: daily_trip_counts of the raw trips from the earliest watermark on
+        state: Lagged rows of the known stations, including the watermark rows
+        watermarks: Last processed date per station (see station_watermarks)
+        lags: Lags in days, as used to build `state`
+
+    Returns:
+        Lagged rows with the same columns as a full rebuild
+    """
+    lags = list(lags)
+    lag_columns = [f"lag_{lag}" for lag in lags]
+
+    state = state.assign(date=_as_naive_dates(state["date"]).to_numpy())
+    state = state[state["date"] == state["start_station_name"].map(watermarks)]
+
+    new_stations = new_counts.index.get_level_values(0)
+    new_dates = new_counts.index.get_level_values(1)
+    new_counts = new_counts[new_dates >= new_stations.map(watermarks)]
+
+    # Turn the lag columns of each watermark row back into the preceding days' counts
+    history = state[["start_station_name", "date"] + lag_columns].melt(
+        id_vars=["start_station_name", "date"], var_name="lag", value_name="trip_count"
+    )
+    lag_days = history.pop("lag").str.removeprefix("lag_").astype(int)
+    history["date"] = history["date"] - pd.to_timedelta(lag_days, unit="D")
+    history = history.set_index(["start_station_name", "date"])["trip_count"]
+
+    series = pd.concat([history.astype(new_counts.dtype), new_counts])
+    lagged = build_lag_matrix(series, lags)
+    lagged = lagged[lagged["date"] >= lagged["start_station_name"].map(watermarks)]
+    return lagged.dropna().reset_index(drop=True)
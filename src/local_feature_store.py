@@ -0,0 +1,311 @@
+"""
+Local, file-backed implementation of FeatureStore.
+
+Each feature group is a directory of Parquet files partitioned by the day of
+its event time (`event_date=YYYY-MM-DD/part-0.parquet`), with rows sorted by
+station inside a partition. Feature groups expose the same query API as
+Hopsworks (select/filter/read/insert): predicates built from feature
+attributes (`fg.pickup_hour >= start`, `fg.start_station_name.isin([...])`)
+prune partitions and Parquet row groups, and inserts upsert by primary key,
+rewriting only the partitions they touch. Every read is recorded in
+`scan_stats` so the amount of data a loader moves can be checked offline.
+"""
+import json
+import operator
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.feature_store import FeatureStore
+
+PARTITION_COLUMN = "event_date"
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.date32())]), flavor="hive")
+
+# Bound on the event day implied by a comparison on the event time column
+_PARTITION_OPS = {
+    operator.ge: operator.ge,
+    operator.gt: operator.ge,
+    operator.le: operator.le,
+    operator.lt: operator.le,
+    operator.eq: operator.eq,
+}
+
+
+def _arrow_scalar(value, arrow_type: pa.DataType) -> pa.Scalar:
+    """
+    Convert a Python/pandas value to a scalar of the column's Arrow type,
+    reconciling naive and tz-aware timestamps (naive columns are taken as UTC).
+    """
+    if pa.types.is_timestamp(arrow_type):
+        value = pd.Timestamp(value)
+        if arrow_type.tz is None and value.tz is not None:
+            value = value.tz_convert("UTC").tz_localize(None)
+        elif arrow_type.tz is not None and value.tz is None:
+            value = value.tz_localize("UTC")
+    return pa.scalar(value, type=arrow_type)
+
+
+def _event_dates(times: pd.Series) -> pd.Series:
+    times = pd.to_datetime(times)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC")
+    return times.dt.date
+
+
+class Filter:
+    """
+    A predicate tree that is turned into a pyarrow expression at scan time,
+    once the column types and the feature group's event time are known.
+    """
+
+    def __init__(self, build):
+        self._build = build
+
+    def to_expression(self, schema: pa.Schema, event_time: Optional[str]) -> pc.Expression:
+        return self._build(schema, event_time)
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return Filter(lambda schema, event_time: (
+            self.to_expression(schema, event_time) & other.to_expression(schema, event_time)
+        ))
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return Filter(lambda schema, event_time: (
+            self.to_expression(schema, event_time) | other.to_expression(schema, event_time)
+        ))
+
+
+class Feature:
+    """
+    A column reference; comparisons return a Filter. Comparisons on the event
+    time column also constrain the date partition so whole days are skipped.
+    """
+
+    __hash__ = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _compare(self, op, value) -> Filter:
+        name = self.name
+
+        def build(schema: pa.Schema, event_time: Optional[str]) -> pc.Expression:
+            scalar = _arrow_scalar(value, schema.field(name).type)
+            expression = op(pc.field(name), scalar)
+            if name == event_time and op in _PARTITION_OPS:
+                day = _event_dates(pd.Series([scalar.as_py()])).iloc[0]
+                partition_op = _PARTITION_OPS[op]
+                expression &= partition_op(pc.field(PARTITION_COLUMN), pa.scalar(day, pa.date32()))
+            return expression
+
+        return Filter(build)
+
+    def __eq__(self, value):
+        return self._compare(operator.eq, value)
+
+    def __ne__(self, value):
+        return self._compare(operator.ne, value)
+
+    def __lt__(self, value):
+        return self._compare(operator.lt, value)
+
+    def __le__(self, value):
+        return self._compare(operator.le, value)
+
+    def __gt__(self, value):
+        return self._compare(operator.gt, value)
+
+    def __ge__(self, value):
+        return self._compare(operator.ge, value)
+
+    def isin(self, values: Iterable) -> Filter:
+        name = self.name
+        values = list(values)
+
+        def build(schema: pa.Schema, event_time: Optional[str]) -> pc.Expression:
+            arrow_type = schema.field(name).type
+            return pc.field(name).isin(
+                pa.array([_arrow_scalar(v, arrow_type).as_py() for v in values], type=arrow_type)
+            )
+
+        return Filter(build)
+
+
+class Query:
+    def __init__(self, feature_group: "LocalFeatureGroup", columns: Optional[List[str]] = None,
+                 condition: Optional[Filter] = None):
+        self._fg = feature_group
+        self._columns = columns
+        self._condition = condition
+
+    def filter(self, condition: Filter) -> "Query":
+        if self._condition is not None:
+            condition = self._condition & condition
+        return Query(self._fg, self._columns, condition)
+
+    def read(self, **kwargs) -> pd.DataFrame:
+        return self._fg._scan(self._columns, self._condition)
+
+
+class LocalFeatureGroup:
+    def __init__(self, store: "LocalFeatureStore", name: str, version: int,
+                 primary_key: Optional[List[str]] = None, event_time: Optional[str] = None,
+                 description: str = ""):
+        self._store = store
+        self.name = name
+        self.version = version
+        self.primary_key = list(primary_key or [])
+        self.event_time = event_time
+        self.description = description
+
+    @property
+    def path(self) -> Path:
+        return self._store.root / f"{self.name}_{self.version}"
+
+    @property
+    def _metadata_path(self) -> Path:
+        return self.path / "_feature_group.json"
+
+    def __getattr__(self, name: str) -> Feature:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return Feature(name)
+
+    def select_all(self) -> Query:
+        return Query(self)
+
+    def select(self, columns: List[str]) -> Query:
+        return Query(self, list(columns))
+
+    def filter(self, condition: Filter) -> Query:
+        return Query(self).filter(condition)
+
+    def read(self, **kwargs) -> pd.DataFrame:
+        return self._scan(None, None)
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def _save_metadata(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._metadata_path.write_text(json.dumps({
+            "primary_key": self.primary_key,
+            "event_time": self.event_time,
+            "description": self.description,
+        }))
+
+    def _partition_file(self, day) -> Path:
+        if self.event_time is None:
+            return self.path / "part-0.parquet"
+        return self.path / f"{PARTITION_COLUMN}={day.isoformat()}" / "part-0.parquet"
+
+    def _write_partition(self, df: pd.DataFrame, file: Path) -> None:
+        # partitioning=None: don't add the hive path key (event_date) as a column
+        existing = pq.read_table(file, partitioning=None).to_pandas() if file.exists() else None
+        if existing is not None:
+            df = pd.concat([existing, df], ignore_index=True)
+            if self.primary_key:
+                df = df.drop_duplicates(subset=self.primary_key, keep="last")
+
+        sort_cols = [c for c in ["start_station_name", self.event_time] if c in df.columns]
+        if sort_cols:
+            df = df.sort_values(sort_cols, kind="stable")
+
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = file.parent / f".{file.name}.tmp"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp,
+                       row_group_size=self._store.row_group_size)
+        tmp.replace(file)
+
+    def insert(self, df: pd.DataFrame, write_options: Optional[dict] = None) -> None:
+        """
+        Upsert rows by primary key, rewriting only the day partitions they touch.
+        `write_options` is accepted for API compatibility and ignored.
+        """
+        if not self._metadata_path.exists():
+            self._save_metadata()
+        if df.empty:
+            return
+
+        if self.event_time is None:
+            self._write_partition(df, self._partition_file(None))
+            return
+
+        for day, part in df.groupby(_event_dates(df[self.event_time]).to_numpy()):
+            self._write_partition(part, self._partition_file(day))
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def _dataset(self) -> ds.Dataset:
+        partitioning = PARTITIONING if self.event_time else None
+        return ds.dataset(self.path, format="parquet", partitioning=partitioning)
+
+    def _scan(self, columns: Optional[List[str]], condition: Optional[Filter]) -> pd.DataFrame:
+        dataset = self._dataset()
+        files_total = len(dataset.files)
+        if not files_total:
+            self._store._record_scan(self, pa.table({}), 0, 0)
+            return pd.DataFrame(columns=columns)
+
+        expression = None
+        if condition is not None:
+            expression = condition.to_expression(dataset.schema, self.event_time)
+        columns = columns or [c for c in dataset.schema.names if c != PARTITION_COLUMN]
+
+        files_read = len(list(dataset.get_fragments(filter=expression)))
+        table = dataset.to_table(columns=columns, filter=expression)
+        self._store._record_scan(self, table, files_read, files_total)
+        return table.to_pandas()
+
+
+class LocalFeatureStore(FeatureStore):
+    """
+    Feature groups stored as partitioned Parquet under `root`.
+
+    Args:
+        root: Directory holding one `<name>_<version>/` directory per feature group
+        row_group_size: Rows per Parquet row group (smaller = finer pushdown)
+    """
+
+    def __init__(self, root: Path, row_group_size: int = 10_000):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.scan_stats: List[dict] = []
+
+    def get_feature_group(self, name: str, version: int = 1) -> LocalFeatureGroup:
+        fg = LocalFeatureGroup(self, name, version)
+        if not fg._metadata_path.exists():
+            raise LookupError(f"Feature group {name} v{version} not found in {self.root}")
+        return LocalFeatureGroup(self, name, version, **json.loads(fg._metadata_path.read_text()))
+
+    def get_or_create_feature_group(
+        self,
+        name: str,
+        version: int = 1,
+        primary_key: Optional[List[str]] = None,
+        event_time: Optional[str] = None,
+        description: str = "",
+    ) -> LocalFeatureGroup:
+        try:
+            return self.get_feature_group(name, version)
+        except LookupError:
+            fg = LocalFeatureGroup(self, name, version, primary_key, event_time, description)
+            fg._save_metadata()
+            return fg
+
+    def _record_scan(self, fg: LocalFeatureGroup, table: pa.Table, files_read: int, files_total: int) -> None:
+        self.scan_stats.append({
+            "feature_group": fg.name,
+            "columns": table.column_names,
+            "rows_read": table.num_rows,
+            "bytes_read": table.nbytes,
+            "files_read": files_read,
+            "files_total": files_total,
+        })
@@ -0,0 +1,59 @@
+"""
+Predicted-demand map over the station layer from src/stations.py.
+
+The GeoJSON layer is serialized once from the station table, so building a
+map costs the same however many trips the table was extracted from. New
+predictions only change the per-station colors.
+"""
+from typing import Dict
+
+import branca.colormap as cm
+import folium
+import pandas as pd
+
+# Midtown Manhattan
+MAP_CENTER = (40.7484, -73.9857)
+NO_PREDICTION_COLOR = "#9e9e9e"
+
+
+def demand_colormap(predictions: pd.DataFrame) -> cm.LinearColormap:
+    """
+    Yellow (low) to red (high) scale over `predicted_demand`.
+    """
+    demand = predictions["predicted_demand"]
+    low = float(demand.min())
+    colormap = cm.linear.YlOrRd_09.scale(low, max(float(demand.max()), low + 1))
+    colormap.caption = "Predicted rides"
+    return colormap
+
+
+def demand_map(layer: str, predictions: pd.DataFrame, zoom_start: int = 12) -> folium.Map:
+    """
+    Color the station layer by predicted demand.
+
+    Args:
+        layer: GeoJSON from stations.stations_geojson (feature id = station name)
+        predictions: Rows with start_station_name and predicted_demand
+        zoom_start: Initial zoom level
+
+    Returns:
+        folium.Map
+    """
+    fmap = folium.Map(location=MAP_CENTER, zoom_start=zoom_start)
+    colors: Dict[str, str] = {}
+    if not predictions.empty:
+        colormap = demand_colormap(predictions)
+        colors = dict(zip(predictions["start_station_name"], map(colormap, predictions["predicted_demand"])))
+        colormap.add_to(fmap)
+
+    folium.GeoJson(
+        layer,
+        name="Predicted demand",
+        marker=folium.CircleMarker(radius=6, weight=1, fill=True, fill_opacity=0.85),
+        style_function=lambda feature: {
+            "color": colors.get(feature["id"], NO_PREDICTION_COLOR),
+            "fillColor": colors.get(feature["id"], NO_PREDICTION_COLOR),
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["station_name"], labels=False),
+    ).add_to(fmap)
+    return fmap
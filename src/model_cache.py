@@ -0,0 +1,178 @@
+"""
+Versioned on-disk cache of registry models plus an in-memory LRU of loaded
+estimators.
+
+Registry model versions are immutable, so once a version's artifact is on
+disk under MODEL_CACHE_DIR it is never downloaded again. Each artifact of a
+version has its own manifest, so callers loading different artifacts of the
+same version do not invalidate each other. The only registry
+call left on the hot path is the "which version is latest" lookup, and that
+is throttled to once per MODEL_VERSION_CHECK_SECONDS.
+"""
+import hashlib
+import json
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import joblib
+
+import src.config as config
+from src.hopsworks_session import get_session
+
+
+def _sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """
+    Args:
+        cache_dir: Where downloaded artifacts are kept (`<name>/v<version>/<artifact>`
+            plus `<artifact>.manifest.json`)
+        max_in_memory: Number of loaded estimators kept in memory
+        version_ttl_seconds: How long a "latest version" lookup is trusted
+        registry: Callable returning the model registry (defaults to the
+            process-wide Hopsworks session's registry); only called on a
+            version check or a download
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_in_memory: int = config.MODEL_MEMORY_CACHE_SIZE,
+        version_ttl_seconds: float = config.MODEL_VERSION_CHECK_SECONDS,
+        registry: Optional[Callable[[], Any]] = None,
+    ):
+        self.cache_dir = Path(cache_dir or config.MODEL_CACHE_DIR)
+        self.max_in_memory = max_in_memory
+        self.version_ttl_seconds = version_ttl_seconds
+        self._registry = registry or (lambda: get_session().model_registry())
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[Tuple[str, int, str], Any]" = OrderedDict()
+        self._latest: Dict[str, Tuple[int, float]] = {}
+        self._metrics: Dict[Tuple[str, int], Optional[dict]] = {}
+        self._stats = {"version_checks": 0, "downloads": 0, "disk_hits": 0, "memory_hits": 0}
+
+    def latest_version(self, name: str) -> int:
+        """
+        Highest registered version of `name`, looked up at most once per TTL.
+        """
+        with self._lock:
+            cached = self._latest.get(name)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+
+            models = self._registry().get_models(name=name)
+            version = max(m.version for m in models)
+            self._stats["version_checks"] += 1
+            self._latest[name] = (version, time.monotonic() + self.version_ttl_seconds)
+            return version
+
+    def _entry_dir(self, name: str, version: int) -> Path:
+        return self.cache_dir / name / f"v{version}"
+
+    def _manifest_path(self, name: str, version: int, artifact: str) -> Path:
+        return self._entry_dir(name, version) / f"{artifact}.manifest.json"
+
+    def _manifest(self, name: str, version: int, artifact: str) -> dict:
+        """
+        Manifest of a cached artifact, downloading it first if needed.
+        """
+        entry_dir = self._entry_dir(name, version)
+        manifest_path = self._manifest_path(name, version, artifact)
+        if manifest_path.exists() and (entry_dir / artifact).exists():
+            return json.loads(manifest_path.read_text())
+
+        model = self._registry().get_model(name, version=version)
+        downloaded = Path(model.download()) / artifact
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        tmp = entry_dir / f".{artifact}.tmp"
+        shutil.copyfile(downloaded, tmp)
+        tmp.replace(entry_dir / artifact)
+
+        manifest = {
+            "name": name,
+            "version": version,
+            "artifact": artifact,
+            "checksum": _sha256(entry_dir / artifact),
+            "training_metrics": getattr(model, "training_metrics", None),
+        }
+        manifest_path.write_text(json.dumps(manifest, default=str))
+        self._metrics[(name, version)] = manifest["training_metrics"]
+        self._stats["downloads"] += 1
+        return manifest
+
+    def load(self, name: str, version: Optional[int] = None, artifact: str = config.MODEL_ARTIFACT):
+        """
+        Return the estimator for (name, version), latest version by default.
+
+        Keyed on (name, version, artifact checksum): an in-memory hit costs no
+        I/O, a disk hit costs one joblib.load, and only an unseen version is
+        downloaded.
+        """
+        with self._lock:
+            version = version or self.latest_version(name)
+            manifest = self._manifest(name, version, artifact)
+            key = (name, version, manifest["checksum"])
+
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key]
+
+            path = self._entry_dir(name, version) / artifact
+            if _sha256(path) != manifest["checksum"]:
+                self._manifest_path(name, version, artifact).unlink()
+                return self.load(name, version, artifact)
+
+            model = joblib.load(path)
+            self._stats["disk_hits"] += 1
+            self._memory[key] = model
+            while len(self._memory) > self.max_in_memory:
+                self._memory.popitem(last=False)
+            return model
+
+    def training_metrics(self, name: str, version: Optional[int] = None) -> Optional[dict]:
+        """
+        Training metrics recorded in the registry for (name, version).
+
+        Read from the registry's model metadata (or a cached manifest), never
+        by downloading an artifact; kept in memory since versions are immutable.
+        """
+        with self._lock:
+            version = version or self.latest_version(name)
+            if (name, version) not in self._metrics:
+                manifests = sorted(self._entry_dir(name, version).glob("*.manifest.json"))
+                if manifests:
+                    metrics = json.loads(manifests[0].read_text())["training_metrics"]
+                else:
+                    metrics = getattr(self._registry().get_model(name, version=version), "training_metrics", None)
+                self._metrics[(name, version)] = metrics
+            return self._metrics[(name, version)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_model_cache: Optional[ModelCache] = None
+_model_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelCache:
+    """
+    The process-wide model cache, created on first use.
+    """
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            _model_cache = ModelCache()
+        return _model_cache
@@ -0,0 +1,226 @@
+"""
+Rolling-origin cross-validation and parallel hyperparameter search for the
+LightGBM trip-count model.
+
+The data is sorted by time once into a TimeSeriesDataset and written to disk
+as float32 .npy files. Every fold is a pair of row ranges into it, and worker
+processes memory-map the files read-only, so one copy of the data is shared
+by all folds and workers regardless of pool size. Configurations
+are raced with successive halving: every rung trains the survivors with a
+larger tree budget (with early stopping on the validation fold) and keeps
+only the best 1/eta of them.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.data_utils import TimeSeriesDataset
+
+DEFAULT_SEARCH_SPACE: Dict[str, list] = {
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "num_leaves": [15, 31, 63, 127],
+    "min_child_samples": [10, 20, 50, 100],
+    "subsample": [0.7, 0.85, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "reg_lambda": [0.0, 0.1, 1.0],
+}
+
+
+# -----------------------------
+# Rolling-origin folds
+# -----------------------------
+def rolling_origin_cutoffs(dates: pd.Series, n_folds: int, horizon: pd.Timedelta) -> List[pd.Timestamp]:
+    """
+    The last `n_folds` origins, each `horizon` apart, placed just after a
+    timestamp so the final fold validates on exactly the last `horizon` of data.
+    """
+    last = pd.to_datetime(dates).max()
+    return [last - horizon * k + pd.Timedelta(1, "ns") for k in range(n_folds, 0, -1)]
+
+
+def build_folds(
+    df: pd.DataFrame,
+    feature_cols: Sequence[str],
+    cutoffs: Sequence[pd.Timestamp],
+    horizon: pd.Timedelta,
+    out_dir: Path,
+    target_col: str = "target",
+    time_col: str = "pickup_hour",
+) -> List[dict]:
+    """
+    Write the time-sorted dataset once and describe each rolling-origin fold
+    as row ranges into it.
+
+    Fold k trains on everything before cutoffs[k] and validates on
+    [cutoffs[k], cutoffs[k] + horizon).
+
+    Returns:
+        One dict per fold with the dataset directory and row ranges
+    """
+    dataset = TimeSeriesDataset.from_frame(df, target_col, time_col, list(feature_cols))
+    dataset.save(out_dir)
+
+    folds = []
+    for cutoff in cutoffs:
+        split_at = dataset.position(cutoff)
+        folds.append({
+            "cutoff": str(cutoff),
+            "dir": str(out_dir),
+            "train": (0, split_at),
+            "valid": (split_at, dataset.position(cutoff + horizon)),
+        })
+    return folds
+
+
+def _load_fold(fold: dict) -> Dict[str, np.ndarray]:
+    dataset = TimeSeriesDataset.load(fold["dir"])
+    train, valid = dataset.rows(*fold["train"]), dataset.rows(*fold["valid"])
+    return {"X_train": train.X, "y_train": train.y, "X_valid": valid.X, "y_valid": valid.y}
+
+
+# -----------------------------
+# Trials
+# -----------------------------
+def evaluate_config(
+    params: dict,
+    folds: List[dict],
+    n_estimators: int,
+    early_stopping_rounds: int = 20,
+    n_jobs: int = 1,
+) -> dict:
+    """
+    Cross-validated MAE of one configuration at a given tree budget.
+
+    Runs in a worker process; fold arrays are memory-mapped, not copied in.
+    """
+    start = time.perf_counter()
+    maes, iterations = [], []
+    for fold in folds:
+        data = _load_fold(fold)
+        model = lgb.LGBMRegressor(
+            n_estimators=n_estimators,
+            subsample_freq=1,
+            n_jobs=n_jobs,
+            random_state=42,
+            verbose=-1,
+            **params,
+        )
+        model.fit(
+            data["X_train"],
+            data["y_train"],
+            eval_set=[(data["X_valid"], data["y_valid"])],
+            eval_metric="l1",
+            callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)],
+        )
+        maes.append(model.best_score_["valid_0"]["l1"])
+        iterations.append(model.best_iteration_ or n_estimators)
+
+    return {
+        "params": params,
+        "n_estimators": n_estimators,
+        "mae": float(np.mean(maes)),
+        "fold_mae": [float(m) for m in maes],
+        "best_iteration": int(np.mean(iterations)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def sample_configs(space: Dict[str, list], n_trials: int, seed: int = 42) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    configs, seen = [], set()
+    for _ in range(n_trials * 20):
+        config = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append({k: v.item() if hasattr(v, "item") else v for k, v in config.items()})
+        if len(configs) == n_trials:
+            break
+    return configs
+
+
+def successive_halving_search(
+    folds: List[dict],
+    space: Optional[Dict[str, list]] = None,
+    n_trials: int = 27,
+    min_estimators: int = 50,
+    max_estimators: int = 800,
+    eta: int = 3,
+    n_workers: Optional[int] = None,
+    early_stopping_rounds: int = 20,
+    seed: int = 42,
+) -> Dict[str, object]:
+    """
+    Race `n_trials` sampled configurations over the CV folds.
+
+    Rung budgets grow by `eta` from min_estimators up to max_estimators, and
+    each rung keeps the best 1/eta configurations. Trials of a rung run in
+    parallel; LightGBM threads are split between the workers.
+
+    Returns:
+        {"best": best trial of the last rung, "trials": every trial evaluated}
+    """
+    space = space or DEFAULT_SEARCH_SPACE
+    n_workers = n_workers or os.cpu_count() or 1
+    n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+
+    budgets = []
+    budget = min_estimators
+    while budget < max_estimators:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_estimators)
+
+    survivors = sample_configs(space, n_trials, seed)
+    trials = []
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for rung, budget in enumerate(budgets):
+            futures = [
+                executor.submit(evaluate_config, params, folds, budget, early_stopping_rounds, n_jobs)
+                for params in survivors
+            ]
+            results = sorted((f.result() for f in futures), key=lambda r: r["mae"])
+            for result in results:
+                result["rung"] = rung
+            trials.extend(results)
+
+            if rung == len(budgets) - 1 or len(results) == 1:
+                break
+            survivors = [r["params"] for r in results[: max(1, len(results) // eta)]]
+
+    return {"best": results[0], "trials": trials}
+
+
+def search_hyperparameters(
+    df: pd.DataFrame,
+    feature_cols: Sequence[str],
+    target_col: str = "target",
+    time_col: str = "pickup_hour",
+    n_folds: int = 3,
+    horizon: pd.Timedelta = pd.Timedelta(days=14),
+    work_dir: Optional[Path] = None,
+    **search_kwargs,
+) -> Dict[str, object]:
+    """
+    Build rolling-origin folds once and run the successive-halving search.
+
+    Args:
+        work_dir: Where fold arrays are written (a temporary directory by default)
+        search_kwargs: Passed to `successive_halving_search`
+    """
+    cutoffs = rolling_origin_cutoffs(df[time_col], n_folds, horizon)
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        folds = build_folds(df, feature_cols, cutoffs, horizon, Path(tmp), target_col, time_col)
+        result = successive_halving_search(folds, **search_kwargs)
+    result["folds"] = [
+        {"cutoff": f["cutoff"], "train_rows": f["train"][1], "valid_rows": f["valid"][1] - f["valid"][0]}
+        for f in folds
+    ]
+    return result
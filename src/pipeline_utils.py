@@ -1,27 +1,80 @@
 import lightgbm as lgb
+import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import FunctionTransformer
 
+KEY_COLUMNS = ["pickup_hour", "start_station_name"]
+WEEKLY_LAG_COLUMNS = [
+    f"rides_t-{7*24}",   # 1 week ago
+    f"rides_t-{14*24}",  # 2 weeks ago
+    f"rides_t-{21*24}",  # 3 weeks ago
+    f"rides_t-{28*24}",  # 4 weeks ago
+]
+DERIVED_COLUMNS = ["average_rides_last_4_weeks", "hour", "day_of_week"]
+
+
+# -----------------------------
+# Feature stage: lags + 4-week average + temporal info in one matrix
+# -----------------------------
+class FeatureAssembler(BaseEstimator, TransformerMixin):
+    """
+    Build the model matrix for a batch of sliding-window rows.
+
+    The output has the same columns, in the same order, as the former
+    add_feature_average_rides_last_4_weeks -> add_temporal_features steps:
+    every non-key column, then average_rides_last_4_weeks, hour and
+    day_of_week. It is written into a single float32 block, which is the only
+    full-size allocation, and LightGBM reads that block without converting
+    it. The caller's frame is never modified.
+
+    Args:
+        chunk_rows: Rows copied per step while filling the matrix
+    """
+
+    def __init__(self, chunk_rows: int = 8192):
+        self.chunk_rows = chunk_rows
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        missing = [col for col in WEEKLY_LAG_COLUMNS if col not in X.columns]
+        if missing:
+            raise ValueError(f"Missing required column: {missing[0]}")
+
+        value_columns = [col for col in X.columns if col not in KEY_COLUMNS]
+        n_values = len(value_columns)
+
+        matrix = np.empty((len(X), n_values + len(DERIVED_COLUMNS)), dtype=np.float32)
+        # Copy in row chunks so the only temporary is one chunk of the lag block
+        for start in range(0, len(X), self.chunk_rows):
+            chunk = X.iloc[start:start + self.chunk_rows]
+            matrix[start:start + len(chunk), :n_values] = chunk[value_columns].to_numpy()
+
+        weekly = [value_columns.index(col) for col in WEEKLY_LAG_COLUMNS]
+        matrix[:, n_values] = matrix[:, weekly].mean(axis=1)
+
+        pickup_hour = X["pickup_hour"].dt
+        matrix[:, n_values + 1] = pickup_hour.hour.to_numpy()
+        matrix[:, n_values + 2] = pickup_hour.dayofweek.to_numpy()
+
+        return pd.DataFrame(
+            matrix, columns=value_columns + DERIVED_COLUMNS, index=X.index, copy=False
+        )
+
 
 # -----------------------------
 # Feature: Average Rides Last 4 Weeks
+# (kept so models pickled with the two-step pipeline still load)
 # -----------------------------
 def average_rides_last_4_weeks(X: pd.DataFrame) -> pd.DataFrame:
-    weekly_lag_cols = [
-        f"rides_t-{7*24}",   # 1 week ago
-        f"rides_t-{14*24}",  # 2 weeks ago
-        f"rides_t-{21*24}",  # 3 weeks ago
-        f"rides_t-{28*24}",  # 4 weeks ago
-    ]
-
-    for col in weekly_lag_cols:
+    for col in WEEKLY_LAG_COLUMNS:
         if col not in X.columns:
             raise ValueError(f"Missing required column: {col}")
 
-    X["average_rides_last_4_weeks"] = X[weekly_lag_cols].mean(axis=1)
-    return X
+    return X.assign(average_rides_last_4_weeks=X[WEEKLY_LAG_COLUMNS].mean(axis=1))
 
 
 add_feature_average_rides_last_4_weeks = FunctionTransformer(
@@ -37,10 +90,11 @@ class TemporalFeatureEngineer(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X, y=None):
-        X = X.copy()
-        X["hour"] = X["pickup_hour"].dt.hour
-        X["day_of_week"] = X["pickup_hour"].dt.dayofweek
-        return X.drop(columns=["pickup_hour", "start_station_name"])
+        # drop() already returns a new frame, so no extra copy is needed
+        X_out = X.drop(columns=KEY_COLUMNS)
+        X_out["hour"] = X["pickup_hour"].dt.hour
+        X_out["day_of_week"] = X["pickup_hour"].dt.dayofweek
+        return X_out
 
 
 add_temporal_features = TemporalFeatureEngineer()
@@ -60,7 +114,6 @@ def get_pipeline(**hyper_params):
         pipeline (Pipeline): scikit-learn pipeline
     """
     return make_pipeline(
-        add_feature_average_rides_last_4_weeks,
-        add_temporal_features,
+        FeatureAssembler(),
         lgb.LGBMRegressor(**hyper_params)
-    )
\ No newline at end of file
+    )
@@ -1,16 +1,197 @@
-from datetime import timedelta
-from typing import Optional
+from typing import Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
+# Points drawn per station line (lag windows are 672 hours long)
+MAX_POINTS = 200
+_MS_PER_HOUR = 3_600_000
+_MS_PER_DAY = 24 * _MS_PER_HOUR
+
+
+# -----------------------------
+# Downsampling
+# -----------------------------
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of evenly spaced series.
+
+    Every series keeps its first and last point, and from each bucket in
+    between the point forming the largest triangle with the previously kept
+    point and the next bucket's mean, so peaks and dips survive. All series
+    are processed together: the loop runs over buckets, not series.
+
+    Args:
+        y: (n_series, n_points) values sampled at the same evenly spaced x
+        n_out: Points kept per series
+
+    Returns:
+        (n_series, n_out) increasing indices into the point axis
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    n_series, n_points = y.shape
+    if n_out >= n_points or n_out < 3:
+        return np.tile(np.arange(n_points), (n_series, 1))
+
+    edges = (np.arange(n_out - 1) * (n_points - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n_points - 1
+    rows = np.arange(n_series)
+
+    out = np.empty((n_series, n_out), dtype=np.int64)
+    out[:, 0], out[:, -1] = 0, n_points - 1
+    prev = np.zeros(n_series, dtype=np.int64)
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n_points
+        next_x = (stop + next_stop - 1) / 2
+        next_y = y[:, stop:next_stop].mean(axis=1)
+
+        prev_y = y[rows, prev]
+        xs = np.arange(start, stop)
+        area = np.abs(
+            (prev - next_x)[:, None] * (y[:, start:stop] - prev_y[:, None])
+            - (prev[:, None] - xs) * (next_y - prev_y)[:, None]
+        )
+        prev = start + area.argmax(axis=1)
+        out[:, i + 1] = prev
+    return out
+
+
+# -----------------------------
+# Station lookup
+# -----------------------------
+class StationSeries:
+    """
+    Lag windows of a feature frame as one (stations x steps) float32 block,
+    oldest first, with the station -> row lookup built once.
+
+    Takes either the hourly layout (rides_t-* columns and pickup_hour) or the
+    daily one (lag_1..lag_k columns and date).
+
+    Stations that appear more than once keep their first row, as the
+    per-station filters this replaces did.
+
+    Args:
+        features: Rows with lag columns, start_station_name and pickup_hour or date
+        targets: Actual value per feature row (drawn as the last point of the line)
+        predictions: Predicted value per feature row (drawn as a marker)
+    """
+
+    def __init__(
+        self,
+        features: pd.DataFrame,
+        targets: Optional[Union[pd.Series, np.ndarray]] = None,
+        predictions: Optional[Union[pd.Series, np.ndarray]] = None,
+    ):
+        lag_cols = [col for col in features.columns if col.startswith("rides_t-")]
+        time_col, self.step_ms = "pickup_hour", _MS_PER_HOUR
+        if not lag_cols:
+            lags = sorted(
+                (int(col[len("lag_"):]) for col in features.columns
+                 if col.startswith("lag_") and col[len("lag_"):].isdigit()),
+                reverse=True,
+            )
+            lag_cols = [f"lag_{lag}" for lag in lags]
+            time_col, self.step_ms = "date", _MS_PER_DAY
+
+        names = features["start_station_name"].to_numpy()
+        first = np.flatnonzero(~pd.Index(names).duplicated())
+
+        self.stations = pd.Index(names[first])
+        self.n_lags = len(lag_cols)
+        self.values = features[lag_cols].to_numpy(dtype=np.float32)[first]
+
+        times = pd.DatetimeIndex(pd.to_datetime(features[time_col].to_numpy()[first]))
+        if times.tz is not None:
+            times = times.tz_localize(None)
+        self.time_ms = times.to_numpy().astype("datetime64[ms]").astype(np.float64)
+
+        self.targets = None if targets is None else np.asarray(targets, dtype=np.float32)[first]
+        self.predictions = None if predictions is None else np.asarray(predictions, dtype=np.float32)[first]
+
+    def positions(self, stations: Sequence[str]) -> np.ndarray:
+        rows = self.stations.get_indexer(list(stations))
+        if (rows < 0).any():
+            raise KeyError(f"Unknown station: {list(stations)[int(np.argmin(rows))]}")
+        return rows
+
+
+# -----------------------------
+# Figures
+# -----------------------------
+def plot_stations(
+    features: Union[pd.DataFrame, StationSeries],
+    stations: Sequence[str],
+    targets: Optional[Union[pd.Series, np.ndarray]] = None,
+    predictions: Optional[Union[pd.Series, np.ndarray]] = None,
+    max_points: Optional[int] = MAX_POINTS,
+    title: Optional[str] = None,
+) -> go.Figure:
+    """
+    Plots the lag windows of many stations in one figure.
+
+    Each station is one WebGL line downsampled with LTTB to `max_points`
+    points, and all prediction markers share a single trace. Times are sent
+    as epoch milliseconds, so every array goes into the figure JSON as a
+    compact binary block.
+
+    Args:
+        features: Feature rows, or a StationSeries to reuse across calls
+            (then targets and predictions come from it)
+        stations: Start station names to draw
+        targets, predictions: Per-row values when `features` is a DataFrame
+        max_points: Points per line (None draws every step)
+        title: Figure title
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    series = features if isinstance(features, StationSeries) else StationSeries(features, targets, predictions)
+    rows = series.positions(stations)
+
+    values = series.values[rows]
+    if series.targets is not None:
+        values = np.column_stack([values, series.targets[rows]])
+    if max_points is not None and values.shape[1] > max_points:
+        points = lttb_indices(values, max_points)
+        values = np.take_along_axis(values, points, axis=1)
+    else:
+        points = np.tile(np.arange(values.shape[1]), (len(rows), 1))
+
+    window_start = series.time_ms[rows] - series.n_lags * series.step_ms
+    times = window_start[:, None] + points * float(series.step_ms)
+
+    traces = [
+        go.Scattergl(x=times[i], y=values[i], mode="lines", name=str(station))
+        for i, station in enumerate(stations)
+    ]
+    if series.predictions is not None:
+        traces.append(go.Scattergl(
+            x=series.time_ms[rows],
+            y=series.predictions[rows],
+            text=[str(station) for station in stations],
+            mode="markers",
+            marker=dict(color="red", size=10, symbol="x"),
+            name="Prediction",
+        ))
+
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        title=title,
+        xaxis=dict(type="date", title="Time"),
+        yaxis_title="Ride Counts",
+        template="plotly_white",
+    )
+    return fig
+
 
 def plot_aggregated_time_series(
     features: pd.DataFrame,
     targets: pd.Series,
     row_id: str,
     predictions: Optional[pd.Series] = None,
+    max_points: Optional[int] = MAX_POINTS,
 ):
     """
     Plots time series for a specific station using historical features and actual/predicted values.
@@ -20,102 +201,48 @@ def plot_aggregated_time_series(
         targets (pd.Series): Actual target values (ride demand).
         row_id (str): Start station name for the plot.
         predictions (Optional[pd.Series]): Optional prediction series for the same station.
+        max_points (Optional[int]): Points drawn for the lag window (None draws every hour).
 
     Returns:
         plotly.graph_objects.Figure
     """
-    # Filter for the specific station
-    station_features = features[features["start_station_name"] == row_id].iloc[0]
-    actual_target = targets[features["start_station_name"] == row_id].values[0]
-
-    # Extract lag features
-    lag_cols = [col for col in features.columns if col.startswith("rides_t-")]
-    lag_values = station_features[lag_cols].values.tolist()
-
-    # Generate time range
-    pickup_hour = pd.to_datetime(station_features["pickup_hour"])
-    time_series_dates = pd.date_range(
-        start=pickup_hour - timedelta(hours=len(lag_cols)),
-        periods=len(lag_cols) + 1,
-        freq="H"
-    )
-
-    # Combine historical and target values
-    values = lag_values + [actual_target]
-
-    fig = go.Figure()
+    series = StationSeries(features, targets, predictions)
+    pickup_hour = pd.Timestamp(series.time_ms[series.positions([row_id])[0]], unit="ms")
 
-    # Historical + actual
-    fig.add_trace(go.Scatter(
-        x=time_series_dates,
-        y=values,
-        mode="lines+markers",
+    fig = plot_stations(
+        series, [row_id], max_points=max_points, title=f"⏱️ Station: {row_id} | Hour: {pickup_hour}"
+    )
+    fig.update_traces(
+        selector=dict(name=str(row_id)),
         name="Actual",
+        mode="lines+markers",
         line=dict(color="green"),
-        marker=dict(size=6)
-    ))
-
-    # Optional: prediction marker
-    if predictions is not None:
-        predicted_value = predictions[features["start_station_name"] == row_id].values[0]
-        fig.add_trace(go.Scatter(
-            x=[pickup_hour],
-            y=[predicted_value],
-            mode="markers",
-            marker=dict(color="red", size=10, symbol="x"),
-            name="Prediction"
-        ))
-
-    # Title and labels
-    fig.update_layout(
-        title=f"⏱️ Station: {row_id} | Hour: {pickup_hour}",
-        xaxis_title="Time",
-        yaxis_title="Ride Counts",
-        template="plotly_white"
+        marker=dict(size=4),
     )
-
     return fig
 
 
-def plot_prediction(features: pd.DataFrame, prediction: pd.DataFrame):
+def plot_prediction(features: pd.DataFrame, prediction: pd.DataFrame, max_points: Optional[int] = MAX_POINTS):
     """
     Plots past demand and next-hour prediction for a given station (row 0 assumed).
 
     Args:
         features (pd.DataFrame): Feature DataFrame with lag columns and pickup_hour
         prediction (pd.DataFrame): Prediction DataFrame with 'predicted_demand'
+        max_points (Optional[int]): Points drawn for the lag window (None draws every hour).
 
     Returns:
         plotly.graph_objects.Figure
     """
-    lag_cols = [col for col in features.columns if col.startswith("rides_t-")]
-    lag_values = features.iloc[0][lag_cols].values.tolist()
-    pickup_hour = pd.to_datetime(features["pickup_hour"].iloc[0])
-    station = features["start_station_name"].iloc[0]
-    predicted_value = prediction["predicted_demand"].iloc[0]
-
-    time_series_dates = pd.date_range(
-        start=pickup_hour - timedelta(hours=len(lag_cols)),
-        periods=len(lag_cols) + 1,
-        freq="H"
-    )
-    values = lag_values + [predicted_value]
-
-    fig = px.line(
-        x=time_series_dates,
-        y=values,
-        markers=True,
-        template="plotly_white",
+    first = features.iloc[:1]
+    predicted = prediction["predicted_demand"].to_numpy()[:1]
+    station = first["start_station_name"].iloc[0]
+    pickup_hour = pd.to_datetime(first["pickup_hour"].iloc[0])
+
+    # The line runs up to the predicted value, as before
+    return plot_stations(
+        StationSeries(first, targets=predicted, predictions=predicted),
+        [station],
+        max_points=max_points,
         title=f"📍 {station} | Prediction for {pickup_hour}",
-        labels={"x": "Time", "y": "Ride Counts"},
     )
-
-    fig.add_scatter(
-        x=[pickup_hour],
-        y=[predicted_value],
-        mode="markers",
-        marker=dict(color="red", size=10, symbol="x"),
-        name="Prediction"
-    )
-
-    return fig
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Warm-start retraining of the daily trip-count model.
+
+Instead of refitting on the whole citibike_daily_lagged history, the current
+model keeps boosting (LightGBM `init_model`) on the days that arrived since it
+was last trained. Only a bounded window of recent days is ever read. A full
+refit on that window happens when the new days drift away from the window,
+when the current model's error on them degrades past a threshold, or when the
+model has grown too many trees.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+import src.config as config
+
+TRAINING_STATE_PATH = config.MODELS_DIR / "training_state.json"
+
+# Days of lagged features kept for training and as the drift reference
+WINDOW_DAYS = 365
+# Days held out when refitting from scratch, as in the model pipeline
+HOLDOUT_DAYS = 14
+# Trees added per incremental update
+INCREMENTAL_TREES = 25
+# Refit from scratch once the model has grown past this many trees
+MAX_TREES = 400
+# Population stability index of trip_count above which the new days count as drifted
+PSI_THRESHOLD = 0.2
+# Fewest rows the PSI is computed on: the new days are pooled with the most
+# recent seen days up to this size (about 20 rows per bin for the default 10 bins)
+MIN_DRIFT_ROWS = 200
+# Relative MAE increase over the last full retrain that forces a full retrain
+MAX_DEGRADATION = 0.15
+
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+# -----------------------------
+# Training state (what the current model has seen)
+# -----------------------------
+def load_training_state(path: Path = TRAINING_STATE_PATH) -> Optional[dict]:
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def save_training_state(state: dict, path: Path = TRAINING_STATE_PATH) -> None:
+    Path(path).write_text(json.dumps(state, indent=2))
+
+
+def state_to_metrics(state: dict) -> Dict[str, float]:
+    """
+    Registry metrics must be numeric, so the date is stored as days since epoch.
+    The baseline MAE is kept apart from "mae", which holds the latest holdout MAE.
+    """
+    return {
+        "baseline_mae": float(state["mae"]),
+        "trained_through_days": float((pd.Timestamp(state["trained_through"]) - _EPOCH).days),
+        "n_trees": float(state["n_trees"]),
+    }
+
+
+def state_from_metrics(metrics: Optional[dict]) -> Optional[dict]:
+    if not metrics or "trained_through_days" not in metrics:
+        return None
+    return {
+        "mae": float(metrics["baseline_mae"]),
+        "trained_through": str((_EPOCH + pd.Timedelta(days=int(metrics["trained_through_days"]))).date()),
+        "n_trees": int(metrics["n_trees"]),
+    }
+
+
+# -----------------------------
+# Drift
+# -----------------------------
+def population_stability_index(reference: np.ndarray, current: np.ndarray, bins: int = 10) -> float:
+    """
+    PSI of `current` against `reference`, using reference quantiles as bins.
+    """
+    edges = np.unique(np.quantile(reference, np.linspace(0, 1, bins + 1)))
+    if len(edges) < 3:
+        return 0.0
+    edges[0], edges[-1] = -np.inf, np.inf
+    expected = np.histogram(reference, edges)[0] / len(reference)
+    actual = np.histogram(current, edges)[0] / len(current)
+    expected, actual = np.clip(expected, 1e-6, None), np.clip(actual, 1e-6, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_sample_start(dates: pd.Series, new_start: pd.Timestamp, min_rows: int = MIN_DRIFT_ROWS):
+    """
+    First day of the sample the drift check compares against the older days:
+    the new days, extended back over the most recent seen days until it holds
+    at least `min_rows` rows.
+
+    A daily run adds only a few rows (one per station), too few for a PSI:
+    most bins stay empty and each empty bin alone pushes it past the threshold.
+
+    Returns:
+        The start day, or None when the window is too short for a sample of
+        `min_rows` rows and a reference of as many before it
+    """
+    rows_per_day = dates.value_counts().sort_index(ascending=False)
+    enough = rows_per_day.cumsum() >= min_rows
+    if not enough.any():
+        return None
+    start = min(enough.idxmax(), new_start)
+    if (dates < start).sum() < min_rows:
+        return None
+    return start
+
+
+# -----------------------------
+# Retraining
+# -----------------------------
+def full_retrain(
+    window: pd.DataFrame,
+    feature_cols: Sequence[str],
+    target_col: str = "trip_count",
+    time_col: str = "date",
+    holdout_days: int = HOLDOUT_DAYS,
+    window_days: int = WINDOW_DAYS,
+    **hyper_params,
+) -> Tuple[lgb.LGBMRegressor, dict]:
+    """
+    Fit from scratch on the last `window_days` days of `window`, holding out
+    the final `holdout_days` of them.
+    """
+    window = window[window[time_col] > window[time_col].max() - pd.Timedelta(days=window_days)]
+    cutoff = window[time_col].max() - pd.Timedelta(days=holdout_days)
+    train, holdout = window[window[time_col] <= cutoff], window[window[time_col] > cutoff]
+
+    params = {"n_estimators": 100, "learning_rate": 0.1, "random_state": 42, **hyper_params}
+    model = lgb.LGBMRegressor(**params).fit(train[feature_cols], train[target_col])
+    state = {
+        "mae": float(mean_absolute_error(holdout[target_col], model.predict(holdout[feature_cols]))),
+        "trained_through": str(cutoff.date()),
+        "n_trees": model.booster_.num_trees(),
+    }
+    return model, state
+
+
+def retrain(
+    model: Optional[lgb.LGBMRegressor],
+    state: Optional[dict],
+    window: pd.DataFrame,
+    feature_cols: Sequence[str],
+    target_col: str = "trip_count",
+    time_col: str = "date",
+    incremental_trees: int = INCREMENTAL_TREES,
+    max_trees: int = MAX_TREES,
+    psi_threshold: float = PSI_THRESHOLD,
+    min_drift_rows: int = MIN_DRIFT_ROWS,
+    max_degradation: float = MAX_DEGRADATION,
+    **hyper_params,
+) -> Tuple[lgb.LGBMRegressor, dict, dict]:
+    """
+    Continue boosting `model` on the days after state["trained_through"], or
+    refit on `window` when that is not safe.
+
+    Args:
+        model, state: Current model and its training state (None forces a full retrain)
+        window: Lagged features from at least WINDOW_DAYS before
+            state["trained_through"] up to the newest day
+        min_drift_rows: Fewest rows the drift check runs on (see
+            drift_sample_start); it is skipped when the window is too short
+
+    Returns:
+        (model, new state, decision) where decision records the mode, reason
+        and the checks that were made
+    """
+    window = window.assign(**{time_col: pd.to_datetime(window[time_col])})
+    decision: dict = {"mode": "full"}
+
+    if model is None or state is None:
+        decision["reason"] = "no current model"
+        model, new_state = full_retrain(window, feature_cols, target_col, time_col, **hyper_params)
+        return model, new_state, decision
+
+    trained_through = pd.Timestamp(state["trained_through"])
+    new = window[window[time_col] > trained_through]
+    if new.empty:
+        return model, state, {"mode": "none", "reason": "no new days"}
+
+    # The new days are out-of-sample for the current model, so they are the holdout
+    new_mae = float(mean_absolute_error(new[target_col], model.predict(new[feature_cols])))
+    psi = None
+    sample_start = drift_sample_start(window[time_col], new[time_col].min(), min_drift_rows)
+    if sample_start is not None:
+        recent = window[time_col] >= sample_start
+        psi = population_stability_index(
+            window.loc[~recent, target_col].to_numpy(), window.loc[recent, target_col].to_numpy()
+        )
+    decision.update({"new_days": int(new[time_col].nunique()), "new_mae": new_mae, "psi": psi})
+
+    if psi is not None and psi > psi_threshold:
+        decision["reason"] = f"drift (psi {psi:.3f} > {psi_threshold})"
+    elif new_mae > state["mae"] * (1 + max_degradation):
+        decision["reason"] = f"holdout mae {new_mae:.3f} degraded past {state['mae']:.3f} + {max_degradation:.0%}"
+    elif state["n_trees"] + incremental_trees > max_trees:
+        decision["reason"] = f"model would exceed {max_trees} trees"
+    else:
+        params = {**model.get_params(), "n_estimators": incremental_trees}
+        updated = lgb.LGBMRegressor(**params).fit(
+            new[feature_cols], new[target_col], init_model=model.booster_
+        )
+        new_state = {
+            # Degradation is always measured against the last full retrain
+            "mae": state["mae"],
+            "last_mae": new_mae,
+            "trained_through": str(new[time_col].max().date()),
+            "n_trees": updated.booster_.num_trees(),
+        }
+        decision.update({"mode": "incremental", "reason": "within drift and error thresholds"})
+        return updated, new_state, decision
+
+    model, new_state = full_retrain(window, feature_cols, target_col, time_col, **hyper_params)
+    return model, new_state, decision
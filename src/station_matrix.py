@@ -0,0 +1,325 @@
+import json
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ONE_HOUR = pd.Timedelta(hours=1)
+
+
+def dense_rides_matrix(
+    df: pd.DataFrame,
+    hour_col: str,
+    station_col: str,
+    rides_col: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> Tuple[np.ndarray, pd.DatetimeIndex, pd.Index]:
+    """
+    Scatter long-format counts into a dense (hours x stations) int32 matrix.
+
+    Stations are factorized in order of first appearance and hours are
+    turned into integer offsets from the first hour, so building the grid
+    needs no per-cell Python work. Rows whose hour is not on the hourly grid
+    (or outside [start, end]) are ignored; duplicate (hour, station) rows
+    are summed.
+
+    Args:
+        df: Long-format counts
+        hour_col, station_col, rides_col: Column names in `df`
+        start, end: Hour range of the grid (defaults to the range of `df`)
+
+    Returns:
+        (matrix, all_hours, stations)
+    """
+    hours = pd.to_datetime(df[hour_col])
+    all_hours = pd.date_range(
+        hours.min() if start is None else start,
+        hours.max() if end is None else end,
+        freq="h",
+    )
+    station_codes, stations = pd.factorize(df[station_col])
+
+    offsets = (hours - all_hours[0]).to_numpy()
+    hour_codes = offsets // np.timedelta64(1, "h")
+    keep = (
+        (offsets % np.timedelta64(1, "h") == np.timedelta64(0))
+        & (hour_codes >= 0)
+        & (hour_codes < len(all_hours))
+    )
+
+    matrix = np.zeros((len(all_hours), len(stations)), dtype=np.int32)
+    values = df[rides_col].to_numpy()[keep].astype(np.int32)
+    np.add.at(matrix, (hour_codes[keep], station_codes[keep]), values)
+    return matrix, all_hours, pd.Index(stations)
+
+
+class StationHourMatrix:
+    """
+    Hourly ride counts for many stations held as one contiguous int32 array.
+
+    Rows are stations and columns are consecutive hours starting at `start`,
+    so a station's history is a contiguous row and both station lookups
+    (hash index) and hour lookups (offset arithmetic) are O(1). Appending
+    hours grows the buffer geometrically, so repeated appends are amortized
+    O(new hours).
+
+    Args:
+        values: (n_stations, n_hours) ride counts
+        stations: Station names, one per row
+        start: Timestamp of the first column
+    """
+
+    def __init__(self, values: np.ndarray, stations: Iterable, start: pd.Timestamp):
+        values = np.asarray(values)
+        if values.ndim != 2:
+            raise ValueError("values must be a 2-D (stations x hours) array")
+
+        self.stations = pd.Index(stations)
+        if isinstance(self.stations, pd.CategoricalIndex):
+            self.stations = self.stations.astype(object)
+        if len(self.stations) != values.shape[0]:
+            raise ValueError("Number of stations does not match the rows of values")
+        if not self.stations.is_unique:
+            raise ValueError("Station names must be unique")
+
+        self._data = values.astype(np.int32, copy=False)
+        self._n_hours = values.shape[1]
+        self.start = pd.Timestamp(start)
+
+    # -----------------------------
+    # Conversion to and from long format
+    # -----------------------------
+    @classmethod
+    def from_long(
+        cls,
+        df: pd.DataFrame,
+        hour_col: str = "pickup_hour",
+        station_col: str = "start_station_name",
+        rides_col: str = "rides",
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> "StationHourMatrix":
+        """
+        Build from long-format counts such as transform_to_hourly_ts output.
+        Missing (hour, station) cells are filled with 0.
+        """
+        matrix, all_hours, stations = dense_rides_matrix(
+            df, hour_col, station_col, rides_col, start, end
+        )
+        return cls(np.ascontiguousarray(matrix.T), stations, all_hours[0])
+
+    @classmethod
+    def from_trips(cls, df: pd.DataFrame) -> "StationHourMatrix":
+        """
+        Build from cleaned trips with ['starttime', 'start_station_name'].
+        """
+        pickup_hour = df["starttime"].dt.floor("h").rename("pickup_hour")
+        counts = df.groupby([pickup_hour, "start_station_name"], observed=True).size()
+        return cls.from_long(counts.reset_index(name="rides"))
+
+    def to_long(
+        self,
+        hour_col: str = "pickup_hour",
+        station_col: str = "start_station_name",
+        rides_col: str = "rides",
+    ) -> pd.DataFrame:
+        """
+        Convert to the long format produced by fill_missing_rides_full_range
+        (hours outermost, stations in row order).
+        """
+        n_stations, n_hours = self.shape
+        return pd.DataFrame({
+            hour_col: self.hours.repeat(n_stations),
+            station_col: self.stations.take(np.tile(np.arange(n_stations), n_hours)),
+            rides_col: self.values.T.ravel(),
+        })
+
+    # -----------------------------
+    # Access
+    # -----------------------------
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:, :self._n_hours]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (len(self.stations), self._n_hours)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    @property
+    def hours(self) -> pd.DatetimeIndex:
+        return pd.date_range(self.start, periods=self._n_hours, freq="h")
+
+    @property
+    def end(self) -> pd.Timestamp:
+        return self.start + (self._n_hours - 1) * ONE_HOUR
+
+    def hour_position(self, hour: Union[str, pd.Timestamp]) -> int:
+        """
+        Column of `hour`; raises KeyError if it is not on the grid.
+        """
+        offset = pd.Timestamp(hour) - self.start
+        position, remainder = divmod(offset, ONE_HOUR)
+        if remainder or not 0 <= position < self._n_hours:
+            raise KeyError(hour)
+        return int(position)
+
+    def station(self, name: str) -> np.ndarray:
+        """
+        Hourly counts of one station (a view, not a copy).
+        """
+        return self.values[self.stations.get_loc(name)]
+
+    def slice(
+        self,
+        stations: Optional[Iterable] = None,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> "StationHourMatrix":
+        """
+        Select stations and an hour range (both ends inclusive).
+
+        Hour slicing is a view; selecting stations copies only the chosen rows.
+        Bounds outside the grid are clipped.
+        """
+        first = 0 if start is None else max(0, -(-(pd.Timestamp(start) - self.start) // ONE_HOUR))
+        last = self._n_hours if end is None else (pd.Timestamp(end) - self.start) // ONE_HOUR + 1
+        last = min(max(last, first), self._n_hours)
+
+        values = self.values[:, first:last]
+        names = self.stations
+        if stations is not None:
+            rows = self.stations.get_indexer(pd.Index(stations))
+            if (rows < 0).any():
+                raise KeyError("Unknown stations requested")
+            values, names = values[rows], names[rows]
+
+        return StationHourMatrix(values, names, self.start + first * ONE_HOUR)
+
+    def window(self, end: pd.Timestamp, n_hours: int) -> "StationHourMatrix":
+        """
+        The `n_hours` hours ending at (and including) `end` for every station.
+        """
+        end = pd.Timestamp(end)
+        return self.slice(start=end - (n_hours - 1) * ONE_HOUR, end=end)
+
+    def next_hour_features(self, feature_col: str = "rides", n_lags: Optional[int] = None) -> pd.DataFrame:
+        """
+        Model input for the hour after `end`, one row per station, laid out
+        like transform_ts_data_info_features (oldest lag first, then station and hour).
+
+        Args:
+            feature_col: Prefix of the lag columns
+            n_lags: Hours of history per row (defaults to every hour of the matrix)
+        """
+        n_lags = self._n_hours if n_lags is None else n_lags
+        if n_lags > self._n_hours:
+            raise ValueError(f"Need {n_lags} hours of history, the matrix has {self._n_hours}")
+
+        columns = [f"{feature_col}_t-{n_lags - i}" for i in range(n_lags)]
+        features = pd.DataFrame(self.values[:, self._n_hours - n_lags:], columns=columns)
+        features["start_station_name"] = self.stations.to_numpy()
+        features["pickup_hour"] = self.end + ONE_HOUR
+        return features
+
+    # -----------------------------
+    # Appends
+    # -----------------------------
+    def append(self, other: "StationHourMatrix") -> "StationHourMatrix":
+        """
+        Append the hours of `other`, which must start right after `self.end`.
+
+        Stations only present in `other` are added with zero history, and
+        stations missing from `other` get zero rides for the new hours.
+        Returns self.
+        """
+        if other.start != self.end + ONE_HOUR:
+            raise ValueError(
+                f"Appended hours must start at {self.end + ONE_HOUR}, got {other.start}"
+            )
+
+        new_stations = other.stations.difference(self.stations, sort=False)
+        if len(new_stations):
+            padding = np.zeros((len(new_stations), self._data.shape[1]), dtype=np.int32)
+            self._data = np.vstack([self._data, padding])
+            self.stations = self.stations.append(new_stations)
+
+        n_hours = self._n_hours + other.shape[1]
+        if n_hours > self._data.shape[1] or not self._data.flags.writeable:
+            capacity = max(n_hours, 2 * self._data.shape[1])
+            data = np.zeros((len(self.stations), capacity), dtype=np.int32)
+            data[:, :self._n_hours] = self.values
+            self._data = data
+
+        rows = self.stations.get_indexer(other.stations)
+        self._data[rows, self._n_hours:n_hours] = other.values
+        self._n_hours = n_hours
+        return self
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _metadata(self) -> dict:
+        return {
+            "start": self.start.tz_localize(None).isoformat(),
+            "tz": str(self.start.tz) if self.start.tz is not None else None,
+            "stations": self.stations.astype(str).tolist(),
+        }
+
+    @staticmethod
+    def _start_from_metadata(meta: dict) -> pd.Timestamp:
+        start = pd.Timestamp(meta["start"])
+        return start.tz_localize(meta["tz"]) if meta["tz"] else start
+
+    def save(self, directory: Path) -> None:
+        """
+        Save as `values.npy` plus a small `index.json` in `directory`.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "values.npy", np.ascontiguousarray(self.values))
+        (directory / "index.json").write_text(json.dumps(self._metadata()))
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = "r") -> "StationHourMatrix":
+        """
+        Load a matrix written by save(), memory-mapped by default.
+        """
+        directory = Path(directory)
+        meta = json.loads((directory / "index.json").read_text())
+        values = np.load(directory / "values.npy", mmap_mode=mmap_mode)
+        return cls(values, meta["stations"], cls._start_from_metadata(meta))
+
+    def to_parquet(self, path: Path) -> None:
+        """
+        Save as a wide Parquet table: one int32 column per station, one row per hour.
+        """
+        table = pa.Table.from_arrays(
+            [pa.array(row) for row in self.values],
+            names=self.stations.astype(str).tolist(),
+        )
+        table = table.replace_schema_metadata(
+            {b"station_hour_matrix": json.dumps(self._metadata()).encode()}
+        )
+        pq.write_table(table, path)
+
+    @classmethod
+    def from_parquet(cls, path: Path) -> "StationHourMatrix":
+        table = pq.read_table(path)
+        meta = json.loads(table.schema.metadata[b"station_hour_matrix"])
+        if table.num_columns:
+            values = np.vstack([column.to_numpy() for column in table.columns])
+        else:
+            values = np.zeros((0, table.num_rows), dtype=np.int32)
+        return cls(values, meta["stations"], cls._start_from_metadata(meta))
+
+    def __repr__(self) -> str:
+        n_stations, n_hours = self.shape
+        return f"StationHourMatrix({n_stations} stations x {n_hours} hours from {self.start})"
@@ -0,0 +1,213 @@
+"""
+Station dimension table: one row per station with id, name and coordinates.
+
+The table is collected from the raw trip CSVs during ingest (see the
+`stations` argument of data_utils.load_and_process_citibike_data) and kept as
+a small Parquet file at config.STATIONS_PATH. Rows are sorted by a Z-order
+key of the coordinates, so nearby stations share row groups and bounding-box
+reads skip the rest from the row group statistics; StationIndex answers
+nearest-station queries in memory.
+"""
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.neighbors import BallTree
+
+import src.config as config
+
+STATION_COLUMNS = ["station_id", "station_name", "latitude", "longitude"]
+# Normalized raw trip columns the stations are read from
+RAW_STATION_COLUMNS = {
+    "start_station_id": "station_id",
+    "start_station_name": "station_name",
+    "start_station_latitude": "latitude",
+    "start_station_longitude": "longitude",
+}
+# Stations per Parquet row group (the unit bounding-box reads skip)
+ROW_GROUP_SIZE = 64
+EARTH_RADIUS_M = 6_371_000
+
+_SCHEMA = pa.schema([
+    ("station_id", pa.int32()),
+    ("station_name", pa.string()),
+    ("latitude", pa.float32()),
+    ("longitude", pa.float32()),
+    ("zkey", pa.uint32()),
+])
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Put a zero bit between each of the low 16 bits.
+    """
+    v = values.astype(np.uint32)
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def z_order_key(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """
+    Morton code of coordinates quantized to 16 bits each.
+    """
+    y = np.round((np.asarray(latitude, dtype=np.float64) + 90) / 180 * 0xFFFF)
+    x = np.round((np.asarray(longitude, dtype=np.float64) + 180) / 360 * 0xFFFF)
+    return _spread_bits(x) | (_spread_bits(y) << 1)
+
+
+def clean_stations(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deduplicate station rows (the last row per id, then per name, wins) and
+    drop rows without usable coordinates.
+    """
+    rows = rows[STATION_COLUMNS].dropna()
+    rows = rows[(rows["latitude"] != 0) & (rows["longitude"] != 0)]
+    rows = rows.astype({"station_id": np.int32, "station_name": str, "latitude": np.float32, "longitude": np.float32})
+    rows = rows.drop_duplicates("station_id", keep="last").drop_duplicates("station_name", keep="last")
+    return rows.reset_index(drop=True)
+
+
+# -----------------------------
+# Persistence
+# -----------------------------
+def write_stations(stations: pd.DataFrame, path: Path = config.STATIONS_PATH) -> Path:
+    """
+    Write the table sorted by Z-order key (atomically).
+    """
+    stations = clean_stations(stations)
+    stations = stations.assign(zkey=z_order_key(stations["latitude"], stations["longitude"]))
+    stations = stations.sort_values(["zkey", "station_id"], kind="stable")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    table = pa.Table.from_pandas(stations, schema=_SCHEMA, preserve_index=False)
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, use_dictionary=["station_name"])
+    tmp.replace(path)
+    return path
+
+
+def read_stations(
+    path: Path = config.STATIONS_PATH,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+) -> pd.DataFrame:
+    """
+    Read the station table.
+
+    Args:
+        path: Parquet file written by write_stations
+        bbox: Optional (min_lat, min_lon, max_lat, max_lon); row groups
+            outside it are not read
+
+    Returns:
+        pd.DataFrame with STATION_COLUMNS
+    """
+    filters = None
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        filters = [
+            ("latitude", ">=", min_lat), ("latitude", "<=", max_lat),
+            ("longitude", ">=", min_lon), ("longitude", "<=", max_lon),
+        ]
+    return pq.read_table(path, columns=STATION_COLUMNS, filters=filters).to_pandas()
+
+
+class StationCollector:
+    """
+    Collects the unique stations of raw trip chunks while they are parsed.
+
+    Only the first row per station id of each chunk is kept, so the memory
+    used grows with the number of stations, not trips.
+    """
+
+    def __init__(self):
+        self._parts: List[pd.DataFrame] = []
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """
+        Args:
+            chunk: Raw trips with normalized column names (see RAW_STATION_COLUMNS)
+        """
+        rows = chunk.drop_duplicates("start_station_id")[list(RAW_STATION_COLUMNS)]
+        self._parts.append(rows.rename(columns=RAW_STATION_COLUMNS))
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self._parts:
+            return pd.DataFrame(columns=STATION_COLUMNS)
+        return clean_stations(pd.concat(self._parts, ignore_index=True))
+
+    def save(self, path: Path = config.STATIONS_PATH, replace: bool = False) -> pd.DataFrame:
+        """
+        Upsert the collected stations into the table at `path` (or replace it).
+
+        Returns:
+            The full table as written
+        """
+        stations = self.to_frame()
+        if not replace and Path(path).exists():
+            stations = pd.concat([read_stations(path), stations], ignore_index=True)
+        write_stations(stations, path)
+        return read_stations(path)
+
+
+# -----------------------------
+# Spatial queries
+# -----------------------------
+class StationIndex:
+    """
+    Haversine ball tree over the station coordinates.
+
+    Args:
+        stations: Table with STATION_COLUMNS (e.g. read_stations())
+    """
+
+    def __init__(self, stations: pd.DataFrame):
+        self.stations = stations.reset_index(drop=True)
+        coords = np.radians(self.stations[["latitude", "longitude"]].to_numpy(dtype=np.float64))
+        self._tree = BallTree(coords, metric="haversine")
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> pd.DataFrame:
+        """
+        The `k` stations closest to a point, with `distance_m`.
+        """
+        k = min(k, len(self.stations))
+        distance, rows = self._tree.query(np.radians([[latitude, longitude]]), k=k)
+        return self.stations.iloc[rows[0]].assign(distance_m=distance[0] * EARTH_RADIUS_M)
+
+    def within(self, latitude: float, longitude: float, radius_m: float) -> pd.DataFrame:
+        """
+        Stations within `radius_m` meters of a point, closest first.
+        """
+        rows, distance = self._tree.query_radius(
+            np.radians([[latitude, longitude]]), r=radius_m / EARTH_RADIUS_M,
+            return_distance=True, sort_results=True,
+        )
+        return self.stations.iloc[rows[0]].assign(distance_m=distance[0] * EARTH_RADIUS_M)
+
+
+# -----------------------------
+# Map layer
+# -----------------------------
+def stations_geojson(stations: pd.DataFrame) -> str:
+    """
+    Serialize stations as a GeoJSON FeatureCollection of points, with the
+    station name as feature id, so a map layer built from it once can be
+    re-styled per station without touching the geometry.
+    """
+    features = [
+        {
+            "type": "Feature",
+            "id": name,
+            "geometry": {"type": "Point", "coordinates": [round(float(lon), 5), round(float(lat), 5)]},
+            "properties": {"station_name": name, "station_id": int(station_id)},
+        }
+        for station_id, name, lat, lon in stations[STATION_COLUMNS].itertuples(index=False)
+    ]
+    return json.dumps({"type": "FeatureCollection", "features": features}, separators=(",", ":"))
@@ -0,0 +1,575 @@
+"""
+Streaming ingest of trip-start events into live hourly counts.
+
+Trip-start events (JSON with `starttime` and `start_station_name`, the
+columns of the raw trip feature group) are consumed from Kafka, or from the
+in-process InProcessBroker when testing. LiveHourlyCounts keeps per-station
+counts for the hours still open plus a ring buffer of the last N_LAGS closed
+hours. An hour closes once the newest event time, minus ALLOWED_LATENESS, is
+past its end. Every closed hour is written to the hourly feature group and,
+when a model is given, the next hour is predicted with get_model_predictions
+from the rolling lags. Both writes go through FeatureGroupSink, so the store
+is written in batches off the consume loop.
+
+Offsets are committed only after the sinks are flushed, and never past the
+first event of an hour that is still open. After a restart, the state is
+seeded from the hourly feature group, events of hours that were already
+written count as late, and the open hours are recounted from the start.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import src.config as config
+from src.feature_sink import FeatureGroupSink
+from src.inference import get_model_predictions
+from src.station_matrix import StationHourMatrix
+
+try:
+    from confluent_kafka import Consumer, TopicPartition
+except ImportError:  # only needed against a real broker
+    Consumer, TopicPartition = None, None
+
+logger = logging.getLogger(__name__)
+
+# Hours of history kept per station, as in the hourly model's sliding windows
+N_LAGS = 24 * 28
+# How long after an hour ends its events are still counted
+ALLOWED_LATENESS = pd.Timedelta(minutes=5)
+# Messages per consume() call
+BATCH_SIZE = 10_000
+# Minimum seconds between offset commits (each commit flushes the sinks first)
+COMMIT_INTERVAL_SECONDS = 30.0
+EVENT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_ONE_HOUR = np.timedelta64(1, "h")
+
+
+# -----------------------------
+# In-process broker (tests, benchmarks and local replays)
+# -----------------------------
+class InProcessTopicPartition:
+    """
+    Same attributes as confluent_kafka.TopicPartition.
+    """
+
+    def __init__(self, topic: str, partition: int = 0, offset: int = -1001):
+        self.topic = topic
+        self.partition = partition
+        self.offset = offset
+
+
+class InProcessMessage:
+    __slots__ = ("_topic", "_offset", "_value")
+
+    def __init__(self, topic: str, offset: int, value: bytes):
+        self._topic = topic
+        self._offset = offset
+        self._value = value
+
+    def value(self) -> bytes:
+        return self._value
+
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return 0
+
+    def offset(self) -> int:
+        return self._offset
+
+    def error(self):
+        return None
+
+
+class InProcessBroker:
+    """
+    Single-process stand-in for a Kafka cluster: one partition per topic and
+    committed offsets per consumer group. `produce`, `poll` and `flush`
+    mirror confluent_kafka.Producer, and `consumer()` returns an object with
+    the subset of the confluent_kafka.Consumer API used here. Messages are
+    kept until `trim` drops the ones every group has committed.
+    """
+
+    def __init__(self):
+        self._topics: Dict[str, List[bytes]] = defaultdict(list)
+        self._base: Dict[str, int] = defaultdict(int)  # offset of the first retained message
+        self._committed: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def produce(self, topic: str, value: bytes, key: Optional[bytes] = None) -> None:
+        with self._lock:
+            self._topics[topic].append(value)
+
+    def poll(self, timeout: float = 0) -> int:
+        return 0
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        return 0
+
+    def consumer(self, group_id: str) -> "InProcessConsumer":
+        return InProcessConsumer(self, group_id)
+
+    def trim(self, topic: str) -> int:
+        """
+        Drop the messages of `topic` committed by every consumer group; returns how many.
+        """
+        with self._lock:
+            committed = [offset for (_, t), offset in self._committed.items() if t == topic]
+            if not committed:
+                return 0
+            n_dropped = min(committed) - self._base[topic]
+            if n_dropped > 0:
+                del self._topics[topic][:n_dropped]
+                self._base[topic] += n_dropped
+            return max(n_dropped, 0)
+
+
+class InProcessConsumer:
+    def __init__(self, broker: InProcessBroker, group_id: str):
+        self.broker = broker
+        self.group_id = group_id
+        self._positions: Dict[str, int] = {}
+
+    def subscribe(self, topics: Sequence[str]) -> None:
+        with self.broker._lock:
+            self._positions = {
+                topic: self.broker._committed.get((self.group_id, topic), 0) for topic in topics
+            }
+
+    def consume(self, num_messages: int = 1, timeout: float = -1) -> List[InProcessMessage]:
+        messages: List[InProcessMessage] = []
+        with self.broker._lock:
+            for topic, position in self._positions.items():
+                first = position - self.broker._base[topic]
+                values = self.broker._topics[topic][first:first + num_messages - len(messages)]
+                messages.extend(InProcessMessage(topic, position + i, v) for i, v in enumerate(values))
+                self._positions[topic] = position + len(values)
+        if not messages and timeout and timeout > 0:
+            time.sleep(min(timeout, 0.01))
+        return messages
+
+    def commit(self, offsets: Optional[List[InProcessTopicPartition]] = None, asynchronous: bool = True):
+        with self.broker._lock:
+            if offsets is None:
+                offsets = [InProcessTopicPartition(t, 0, p) for t, p in self._positions.items()]
+            for tp in offsets:
+                self.broker._committed[(self.group_id, tp.topic)] = tp.offset
+
+    def close(self) -> None:
+        self._positions = {}
+
+
+# -----------------------------
+# Kafka helpers
+# -----------------------------
+def create_consumer(
+    group_id: str,
+    topics: Sequence[str] = (config.TRIP_EVENTS_TOPIC,),
+    bootstrap_servers: str = config.KAFKA_BOOTSTRAP_SERVERS,
+):
+    """
+    Subscribed confluent_kafka.Consumer with auto-commit off; TripStreamProcessor
+    commits offsets itself.
+    """
+    if Consumer is None:
+        raise ImportError("confluent-kafka is required to consume from Kafka (pip install confluent-kafka)")
+    consumer = Consumer({
+        "bootstrap.servers": bootstrap_servers,
+        "group.id": group_id,
+        "enable.auto.commit": False,
+        "auto.offset.reset": "earliest",
+    })
+    consumer.subscribe(list(topics))
+    return consumer
+
+
+def publish_trips(producer, trips: pd.DataFrame, topic: str = config.TRIP_EVENTS_TOPIC) -> int:
+    """
+    Publish cleaned trips (['starttime', 'start_station_name']) as trip-start
+    events; works with a confluent_kafka.Producer or an InProcessBroker.
+    """
+    starts = trips["starttime"].dt.strftime(EVENT_TIME_FORMAT)
+    for start, station in zip(starts, trips["start_station_name"].astype(str)):
+        value = json.dumps({"starttime": start, "start_station_name": station}).encode()
+        try:
+            producer.produce(topic, value)
+        except BufferError:  # local queue full: let deliveries drain, then retry once
+            producer.poll(1)
+            producer.produce(topic, value)
+    producer.flush()
+    return len(trips)
+
+
+def decode_trip_events(payloads: List[bytes]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Parse a batch of JSON trip-start events in one pass.
+
+    The payloads are joined into a single JSON array, so the whole batch is
+    one json.loads call, and start times are parsed by NumPy in bulk. A batch
+    with a malformed event falls back to decoding events one by one.
+
+    Returns:
+        (start times as datetime64[s], station names, indices of the valid payloads)
+    """
+    try:
+        events = json.loads(b"[" + b",".join(payloads) + b"]")
+        starts = [event["starttime"] for event in events]
+        stations = [event["start_station_name"] for event in events]
+        return np.array(starts, dtype="datetime64[s]"), stations, np.arange(len(payloads))
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    starts, stations, valid = [], [], []
+    for i, payload in enumerate(payloads):
+        try:
+            event = json.loads(payload)
+            start = np.datetime64(event["starttime"], "s")
+            station = event["start_station_name"]
+        except (ValueError, KeyError, TypeError):
+            continue
+        starts.append(start)
+        stations.append(station)
+        valid.append(i)
+    return np.array(starts, dtype="datetime64[s]"), stations, np.array(valid, dtype=np.intp)
+
+
+# -----------------------------
+# Live state
+# -----------------------------
+class LiveHourlyCounts:
+    """
+    Per-station counts of the open hours plus the last `n_lags` closed hours.
+
+    Closed hours live in a (stations x n_lags) int32 ring buffer, so closing
+    an hour writes one column and the lag features of the next hour are one
+    gather. Hours without any events are closed with zero rides.
+
+    Args:
+        n_lags: Closed hours kept per station
+        allowed_lateness: Events are counted until this long after their hour ends
+    """
+
+    def __init__(self, n_lags: int = N_LAGS, allowed_lateness: pd.Timedelta = ALLOWED_LATENESS):
+        self.n_lags = n_lags
+        self.allowed_lateness = np.timedelta64(int(pd.Timedelta(allowed_lateness).total_seconds()), "s")
+        self.stations: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._history = np.zeros((0, n_lags), dtype=np.int32)
+        self._head = 0  # ring slot of the oldest closed hour (the next one overwritten)
+        self._open: Dict[np.datetime64, np.ndarray] = {}
+        self.last_closed: Optional[np.datetime64] = None
+        self.max_event_time: Optional[np.datetime64] = None
+        self.late_events = 0
+
+    @classmethod
+    def from_history(cls, hourly: pd.DataFrame, **kwargs) -> "LiveHourlyCounts":
+        """
+        Seed from long-format hourly counts (['pickup_hour', 'start_station_name',
+        'rides']) that end at the last closed hour.
+        """
+        state = cls(**kwargs)
+        if hourly.empty:
+            return state
+        matrix = StationHourMatrix.from_long(hourly)
+        window = matrix.window(matrix.end, min(state.n_lags, matrix.shape[1]))
+        state.station_rows(window.stations)
+        state._history[:, state.n_lags - window.shape[1]:] = window.values
+        state.last_closed = np.datetime64(window.end.tz_localize(None), "h")
+        return state
+
+    @property
+    def open_hours(self) -> List[np.datetime64]:
+        return sorted(self._open)
+
+    def station_rows(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Row of every name, adding unseen stations with zero history.
+        """
+        codes, uniques = pd.factorize(np.asarray(names, dtype=object))
+        rows = np.empty(len(uniques), dtype=np.intp)
+        for i, name in enumerate(uniques):
+            row = self._rows.get(name)
+            if row is None:
+                row = self._rows[name] = len(self.stations)
+                self.stations.append(name)
+            rows[i] = row
+
+        n_new = len(self.stations) - self._history.shape[0]
+        if n_new:
+            self._history = np.vstack([self._history, np.zeros((n_new, self.n_lags), dtype=np.int32)])
+        return rows[codes]
+
+    def add(self, times: np.ndarray, rows: np.ndarray) -> int:
+        """
+        Count events (start times as datetime64 and station rows). Events of
+        already closed hours are dropped; returns the number counted.
+        """
+        if not len(times):
+            return 0
+        times = times.astype("datetime64[s]", copy=False)
+        batch_max = times.max()
+        if self.max_event_time is None or batch_max > self.max_event_time:
+            self.max_event_time = batch_max
+
+        hours = times.astype("datetime64[h]")
+        if self.last_closed is not None:
+            on_time = hours > self.last_closed
+            self.late_events += int(len(hours) - on_time.sum())
+            hours, rows = hours[on_time], rows[on_time]
+
+        n_stations = len(self.stations)
+        unique_hours, hour_codes = np.unique(hours, return_inverse=True)
+        counts = np.bincount(
+            hour_codes * n_stations + rows, minlength=len(unique_hours) * n_stations
+        ).reshape(len(unique_hours), n_stations)
+        for hour, hour_counts in zip(unique_hours, counts):
+            current = self._open.get(hour)
+            if current is None:
+                self._open[hour] = hour_counts.astype(np.int32)
+            else:
+                self._open[hour] = self._padded(current) + hour_counts
+        return len(hours)
+
+    def close_ready(self) -> Iterator[Tuple[np.datetime64, np.ndarray]]:
+        """
+        Close every hour the watermark has passed, oldest first, yielding
+        (hour, counts per station). The ring buffer already includes the
+        yielded hour, so `next_hour_features()` is its next-hour input.
+        """
+        if self.max_event_time is None:
+            return
+        close_through = (self.max_event_time - self.allowed_lateness - _ONE_HOUR).astype("datetime64[h]")
+        if self.last_closed is not None:
+            hour = self.last_closed + _ONE_HOUR
+        elif self._open:
+            hour = min(self._open)
+        else:
+            return
+
+        while hour <= close_through:
+            counts = self._open.pop(hour, None)
+            counts = np.zeros(len(self.stations), dtype=np.int32) if counts is None else self._padded(counts)
+            self._history[:, self._head] = counts
+            self._head = (self._head + 1) % self.n_lags
+            self.last_closed = hour
+            yield hour, counts
+            hour = hour + _ONE_HOUR
+
+    def next_hour_features(self, feature_col: str = "rides") -> pd.DataFrame:
+        """
+        Inference rows for the hour after `last_closed`, laid out like
+        transform_ts_data_info_features (oldest lag first, then station and hour).
+        """
+        order = (self._head + np.arange(self.n_lags)) % self.n_lags
+        columns = [f"{feature_col}_t-{self.n_lags - i}" for i in range(self.n_lags)]
+        features = pd.DataFrame(self._history[:, order], columns=columns)
+        features["start_station_name"] = self.stations
+        features["pickup_hour"] = pd.Timestamp((self.last_closed + _ONE_HOUR).astype("datetime64[ns]"))
+        return features
+
+    def hour_rows(self, hour: np.datetime64, counts: np.ndarray) -> pd.DataFrame:
+        """
+        Long-format rows of one closed hour for the hourly feature group.
+        """
+        return pd.DataFrame({
+            "pickup_hour": pd.Timestamp(hour.astype("datetime64[ns]")),
+            "start_station_name": self.stations,
+            "rides": counts,
+        })
+
+    def _padded(self, counts: np.ndarray) -> np.ndarray:
+        if len(counts) == len(self.stations):
+            return counts
+        return np.concatenate([counts, np.zeros(len(self.stations) - len(counts), dtype=counts.dtype)])
+
+
+# -----------------------------
+# Consumer loop
+# -----------------------------
+class TripStreamProcessor:
+    """
+    Args:
+        consumer: Subscribed confluent_kafka.Consumer (see create_consumer) or InProcessConsumer
+        state: Live counts (seed with LiveHourlyCounts.from_history after a restart)
+        model: Hourly model; when given, the next hour is predicted as each hour closes
+        hourly_sink: Sink for closed hours (pickup_hour, start_station_name, rides)
+        prediction_sink: Sink for next-hour predictions
+        batch_size: Messages per consume() call
+        poll_timeout: Seconds consume() waits for messages
+        commit_interval_seconds: Minimum time between offset commits
+    """
+
+    def __init__(
+        self,
+        consumer,
+        state: Optional[LiveHourlyCounts] = None,
+        model=None,
+        hourly_sink: Optional[FeatureGroupSink] = None,
+        prediction_sink: Optional[FeatureGroupSink] = None,
+        batch_size: int = BATCH_SIZE,
+        poll_timeout: float = 1.0,
+        commit_interval_seconds: float = COMMIT_INTERVAL_SECONDS,
+    ):
+        self.consumer = consumer
+        self.state = state or LiveHourlyCounts()
+        self.model = model
+        self.hourly_sink = hourly_sink
+        self.prediction_sink = prediction_sink
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.commit_interval_seconds = commit_interval_seconds
+
+        # Offsets: next to read per (topic, partition), and first offset of each open hour
+        self._next_offsets: Dict[Tuple[str, int], int] = {}
+        self._first_offsets: Dict[np.datetime64, Dict[Tuple[str, int], int]] = {}
+        self._committed: Dict[Tuple[str, int], int] = {}
+        self._last_commit = time.monotonic()
+        self._metrics = {
+            "events": 0,
+            "malformed_events": 0,
+            "hours_closed": 0,
+            "predictions": 0,
+            "commits": 0,
+            "busy_seconds": 0.0,
+        }
+
+    def run(self, max_events: Optional[int] = None, max_idle_polls: Optional[int] = None) -> dict:
+        """
+        Consume until `max_events` messages were read or `max_idle_polls`
+        consecutive polls came back empty (both unbounded by default).
+        """
+        idle = 0
+        while max_events is None or self._metrics["events"] < max_events:
+            limit = self.batch_size if max_events is None else min(self.batch_size, max_events - self._metrics["events"])
+            messages = self.consumer.consume(num_messages=limit, timeout=self.poll_timeout)
+            if not messages:
+                idle += 1
+                if max_idle_polls is not None and idle >= max_idle_polls:
+                    break
+                continue
+            idle = 0
+            self.process(messages)
+        return self.metrics()
+
+    def process(self, messages: List) -> None:
+        """
+        Count one batch of messages, then handle every hour it closed.
+        """
+        start = time.perf_counter()
+        payloads, partitions, offsets = [], [], []
+        for msg in messages:
+            error = msg.error()
+            if error is not None:
+                if error.fatal():
+                    raise RuntimeError(f"Kafka consumer failed: {error}")
+                logger.warning(f"Kafka consumer error: {error}")
+                continue
+            payloads.append(msg.value())
+            partitions.append((msg.topic(), msg.partition()))
+            offsets.append(msg.offset())
+        self._metrics["events"] += len(messages)
+        if not payloads:
+            return
+
+        for tp, offset in zip(partitions, offsets):
+            self._next_offsets[tp] = max(self._next_offsets.get(tp, 0), offset + 1)
+
+        times, stations, valid = decode_trip_events(payloads)
+        self._metrics["malformed_events"] += len(payloads) - len(valid)
+        rows = self.state.station_rows(stations)
+        self.state.add(times, rows)
+        self._track_open_hours(times, [partitions[i] for i in valid], np.asarray(offsets)[valid])
+
+        closed = 0
+        for hour, counts in self.state.close_ready():
+            self._on_hour_closed(hour, counts)
+            closed += 1
+        self._metrics["busy_seconds"] += time.perf_counter() - start
+
+        if closed and time.monotonic() - self._last_commit >= self.commit_interval_seconds:
+            self.commit()
+
+    def _track_open_hours(self, times: np.ndarray, partitions: List[Tuple[str, int]], offsets: np.ndarray) -> None:
+        """
+        Remember the first offset of every hour that is still open, per partition.
+        """
+        if not len(times):
+            return
+        hours = times.astype("datetime64[h]")
+        open_hours = set(self.state.open_hours)
+        tp_codes, tps = pd.factorize(pd.Series(partitions, dtype=object))
+        for hour in np.unique(hours):
+            if hour not in open_hours:
+                continue
+            in_hour = hours == hour
+            first = self._first_offsets.setdefault(hour, {})
+            for code in np.unique(tp_codes[in_hour]):
+                offset = int(offsets[in_hour & (tp_codes == code)].min())
+                first[tps[code]] = min(first.get(tps[code], offset), offset)
+
+    def _on_hour_closed(self, hour: np.datetime64, counts: np.ndarray) -> None:
+        self._first_offsets.pop(hour, None)
+        self._metrics["hours_closed"] += 1
+        if self.hourly_sink is not None:
+            self.hourly_sink.write(self.state.hour_rows(hour, counts))
+
+        if self.model is not None:
+            features = self.state.next_hour_features()
+            predictions = get_model_predictions(self.model, features)
+            predictions["pickup_hour"] = features["pickup_hour"].values
+            self._metrics["predictions"] += len(predictions)
+            if self.prediction_sink is not None:
+                self.prediction_sink.write(predictions)
+
+    def commit(self) -> None:
+        """
+        Flush the sinks, then commit up to the first event of the oldest open hour.
+        """
+        for sink in (self.hourly_sink, self.prediction_sink):
+            if sink is not None:
+                sink.flush()
+
+        positions = dict(self._next_offsets)
+        for first in self._first_offsets.values():
+            for tp, offset in first.items():
+                positions[tp] = min(positions.get(tp, offset), offset)
+        changed = {tp: offset for tp, offset in positions.items() if self._committed.get(tp) != offset}
+        if changed:
+            make_tp = TopicPartition or InProcessTopicPartition
+            self.consumer.commit(
+                offsets=[make_tp(topic, partition, offset) for (topic, partition), offset in changed.items()],
+                asynchronous=False,
+            )
+            self._committed.update(changed)
+            self._metrics["commits"] += 1
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Flush and close the sinks, commit, and close the consumer. Open hours stay unwritten.
+        """
+        try:
+            self.commit()
+        finally:
+            for sink in (self.hourly_sink, self.prediction_sink):
+                if sink is not None:
+                    sink.close()
+            self.consumer.close()
+
+    def metrics(self) -> dict:
+        busy = self._metrics["busy_seconds"]
+        return {
+            **self._metrics,
+            "late_events": self.state.late_events,
+            "open_hours": len(self.state.open_hours),
+            "stations": len(self.state.stations),
+            "events_per_second": self._metrics["events"] / busy if busy else 0.0,
+        }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The pipelines and src modules import each other as `src.*`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.forecasting import MAX_HOURLY_HORIZON, forecast_daily, forecast_hourly
+from src.lag_features import LAG_COLUMNS
+
+
+class MeanOfLastTwo:
+    """Predicts the mean of the two newest lags, so each step depends on the previous prediction."""
+
+    def __init__(self, newest, second):
+        self.newest, self.second = newest, second
+
+    def predict(self, features: pd.DataFrame) -> np.ndarray:
+        return (features[self.newest].to_numpy() + features[self.second].to_numpy()) / 2
+
+
+def hourly_features(last_two):
+    columns = [f"rides_t-{lag}" for lag in range(4, 0, -1)]
+    features = pd.DataFrame([[0, 0, *pair] for pair in last_two], columns=columns)
+    features["start_station_name"] = [f"S{i}" for i in range(len(last_two))]
+    features["pickup_hour"] = pd.Timestamp("2014-03-01 10:00")
+    return features
+
+
+def test_forecast_hourly_feeds_predictions_back():
+    features = hourly_features([(2, 4), (10, 0)])
+
+    forecasts = forecast_hourly(MeanOfLastTwo("rides_t-1", "rides_t-2"), features, horizon=3)
+
+    assert list(forecasts.columns) == ["pickup_hour", "start_station_name", "horizon", "predicted_trip_count"]
+    s0 = forecasts[forecasts["start_station_name"] == "S0"]
+    np.testing.assert_allclose(s0["predicted_trip_count"], [3, 3.5, 3.25])
+    assert list(s0["pickup_hour"]) == list(pd.date_range("2014-03-01 10:00", periods=3, freq="h"))
+
+
+def test_forecast_hourly_rejects_long_horizons():
+    with pytest.raises(ValueError):
+        forecast_hourly(MeanOfLastTwo("rides_t-1", "rides_t-2"), hourly_features([(1, 1)]), MAX_HOURLY_HORIZON + 1)
+
+
+def test_forecast_daily_starts_after_each_stations_latest_day():
+    lagged = pd.DataFrame(
+        [[station, pd.Timestamp(day), count] + [1.0] * len(LAG_COLUMNS)
+         for station, day, count in [("A", "2014-03-01", 5), ("A", "2014-03-02", 7), ("B", "2014-02-20", 3)]],
+        columns=["start_station_name", "date", "trip_count"] + LAG_COLUMNS,
+    )
+
+    forecasts = forecast_daily(MeanOfLastTwo("lag_1", "lag_2"), lagged, horizon=2)
+
+    a = forecasts[forecasts["start_station_name"] == "A"]
+    assert list(a["date"]) == [pd.Timestamp("2014-03-03"), pd.Timestamp("2014-03-04")]
+    np.testing.assert_allclose(a["predicted_trip_count"], [4, 5.5])
+    b = forecasts[forecasts["start_station_name"] == "B"]
+    assert b["date"].iloc[0] == pd.Timestamp("2014-02-21")
@@ -0,0 +1,235 @@
+"""
+Run every src.inference loader, and the dashboard, against a local feature
+store filled by the real pipelines: the feature pipeline (daily lags), the
+inference pipeline (daily forecasts) and the streaming processor (hourly
+rides and predictions).
+"""
+import runpy
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyRegressor
+from streamlit.testing.v1 import AppTest
+
+import src.config as config
+from src import inference
+from src.feature_sink import FeatureGroupSink
+from src.lag_features import LAG_COLUMNS, daily_trip_counts
+from src.local_feature_store import LocalFeatureStore
+from src.retraining import full_retrain
+from src.streaming import InProcessBroker, TripStreamProcessor, publish_trips
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+PIPELINES_DIR = REPO_DIR / "pipelines"
+STATIONS = ["W 21 St & 6 Ave", "Broadway & E 22 St", "E 17 St & Broadway"]
+
+
+class LastHourModel:
+    """Hourly stand-in model: predicts the previous hour's rides."""
+
+    def predict(self, features: pd.DataFrame) -> np.ndarray:
+        return features["rides_t-1"].to_numpy()
+
+
+def make_trips(start: pd.Timestamp, end: pd.Timestamp, per_hour: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_seconds = int((end - start).total_seconds())
+    n_trips = per_hour * n_seconds // 3600
+    seconds = np.sort(rng.choice(n_seconds, size=n_trips, replace=False))
+    return pd.DataFrame({
+        "starttime": start + pd.to_timedelta(seconds, unit="s"),
+        "start_station_name": rng.choice(STATIONS, size=n_trips),
+    })
+
+
+def run_pipeline(name: str, *argv: str) -> None:
+    saved = sys.argv
+    sys.argv = [name, *argv]
+    try:
+        runpy.run_path(str(PIPELINES_DIR / name), run_name="__main__")
+    finally:
+        sys.argv = saved
+
+
+def stream(fs: LocalFeatureStore, trips: pd.DataFrame) -> None:
+    broker = InProcessBroker()
+    consumer = broker.consumer("test")
+    consumer.subscribe([config.TRIP_EVENTS_TOPIC])
+    fg_hourly = fs.get_or_create_feature_group(
+        config.HOURLY_FEATURE_GROUP_NAME, config.HOURLY_FEATURE_GROUP_VERSION,
+        primary_key=["pickup_hour", "start_station_name"], event_time="pickup_hour",
+    )
+    fg_pred = fs.get_or_create_feature_group(
+        config.HOURLY_PREDICTION_GROUP_NAME, config.HOURLY_PREDICTION_GROUP_VERSION,
+        primary_key=["pickup_hour", "start_station_name"], event_time="pickup_hour",
+    )
+    processor = TripStreamProcessor(
+        consumer,
+        model=LastHourModel(),
+        hourly_sink=FeatureGroupSink(fg_hourly),
+        prediction_sink=FeatureGroupSink(fg_pred),
+        poll_timeout=0,
+    )
+    publish_trips(broker, trips)
+    processor.run(max_idle_polls=1)
+    processor.close()
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    root = tmp_path_factory.mktemp("feature_store")
+    models_dir = tmp_path_factory.mktemp("models")
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    today = now.normalize()
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config, "FEATURE_STORE_BACKEND", "local")
+        mp.setattr(config, "LOCAL_FEATURE_STORE_DIR", root)
+        mp.setattr(config, "MODELS_DIR", models_dir)
+        mp.setattr(config, "PIPELINE_METRICS_DIR", "")
+        mp.setattr(config, "STATIONS_PATH", models_dir / "stations.parquet")
+        mp.setattr(inference, "LOCAL_MODEL_PATH", models_dir / config.MODEL_ARTIFACT)
+        fs = LocalFeatureStore(root)
+
+        # Daily path: raw trips -> feature pipeline -> model (fit as by the model pipeline) -> inference pipeline
+        trips = make_trips(today - pd.Timedelta(days=60), today, per_hour=4, seed=1)
+        fs.get_or_create_feature_group(
+            "citibike_2014_top3", 1, primary_key=["starttime", "start_station_name"], event_time="starttime",
+        ).insert(trips)
+        run_pipeline("feature_pipeline.py", "--full")
+
+        lagged = fs.get_feature_group(config.FEATURE_GROUP_NAME, config.FEATURE_GROUP_VERSION).read()
+        model, _ = full_retrain(lagged, LAG_COLUMNS, n_estimators=5, min_child_samples=2, verbose=-1)
+        joblib.dump(model, models_dir / config.MODEL_ARTIFACT)
+
+        # Hourly path: a day a year ago (fetch_days_data) and the hours around now
+        stream(fs, make_trips(today - pd.Timedelta(days=366), today - pd.Timedelta(days=364), 20, seed=2))
+        hour = now.floor("h")
+        stream(fs, make_trips(hour - pd.Timedelta(hours=6), hour + pd.Timedelta(hours=3), 20, seed=3))
+
+        joblib.dump(LastHourModel(), models_dir / "hourly_model.pkl")
+        run_pipeline(
+            "inference_pipeline.py", "--horizon", "3",
+            "--hourly-model", str(models_dir / "hourly_model.pkl"), "--hourly-horizon", "4",
+        )
+
+        yield {"fs": fs, "model": model, "trips": trips, "today": today, "model_path": models_dir / config.MODEL_ARTIFACT}
+
+
+def test_load_batch_of_features_from_store_builds_next_day_lags(store):
+    features = inference.load_batch_of_features_from_store(pd.Timestamp.now(tz="UTC"), fs=store["fs"])
+
+    assert sorted(features["start_station_name"]) == sorted(STATIONS)
+    assert list(features.columns) == ["start_station_name", "date"] + LAG_COLUMNS
+    assert (features["date"] == store["today"]).all()
+
+    counts = daily_trip_counts(store["trips"])
+    for _, row in features.iterrows():
+        for lag in (1, 2, 28):
+            day = store["today"] - pd.Timedelta(days=lag)
+            assert row[f"lag_{lag}"] == counts.get((row["start_station_name"], day), 0)
+
+    predictions = inference.get_model_predictions(store["model"], features)
+    assert list(predictions.columns) == ["start_station_name", "predicted_demand"]
+    assert len(predictions) == len(STATIONS)
+
+
+def test_load_batch_of_features_from_store_filters_stations(store):
+    features = inference.load_batch_of_features_from_store(
+        pd.Timestamp.now(tz="UTC"), stations=STATIONS[:1], fs=store["fs"]
+    )
+
+    assert list(features["start_station_name"]) == STATIONS[:1]
+
+
+def test_fetch_latest_daily_predictions(store):
+    predictions = inference.fetch_latest_daily_predictions(fs=store["fs"])
+
+    assert list(predictions.columns) == ["start_station_name", "predicted_demand"]
+    assert sorted(predictions["start_station_name"]) == sorted(STATIONS)
+
+
+def test_hourly_rides_loaders(store):
+    recent = inference.fetch_hourly_rides(hours=6, fs=store["fs"])
+    year_ago = inference.fetch_days_data(days=1, fs=store["fs"])
+
+    for rides in (recent, year_ago):
+        assert {"pickup_hour", "start_station_name", "rides"} <= set(rides.columns)
+        assert rides["rides"].sum() > 0
+
+
+def test_load_hourly_features_from_store_fills_missing_hours(store):
+    hour = pd.Timestamp.now(tz="UTC").floor("h")
+    features = inference.load_hourly_features_from_store(hour, fs=store["fs"])
+
+    assert sorted(features["start_station_name"]) == sorted(STATIONS)
+    assert features.shape[1] == inference.HOURLY_WINDOW + 2
+    assert (features["pickup_hour"] == hour.tz_localize(None)).all()
+
+    rides = inference.fetch_hourly_rides(hours=inference.HOURLY_WINDOW, fs=store["fs"])
+    last_hour = rides[rides["pickup_hour"] == hour.tz_localize(None) - pd.Timedelta(hours=1)]
+    expected = last_hour.set_index("start_station_name")["rides"]
+    assert (features.set_index("start_station_name")["rides_t-1"] == expected).all()
+    # Only 6 hours were streamed: the rest of the window is zero-filled
+    assert features["rides_t-672"].sum() == 0
+
+
+def test_load_hourly_features_from_store_without_rows(store):
+    features = inference.load_hourly_features_from_store(pd.Timestamp("2000-01-01"), fs=store["fs"])
+
+    assert features.empty
+    assert features.shape[1] == inference.HOURLY_WINDOW + 2
+
+
+def test_inference_pipeline_writes_hourly_forecasts(store):
+    hour = pd.Timestamp.now(tz="UTC").floor("h")
+    features = inference.load_hourly_features_from_store(hour, fs=store["fs"])
+    forecasts = store["fs"].get_feature_group(
+        config.HOURLY_FORECAST_GROUP_NAME, config.HOURLY_FORECAST_GROUP_VERSION
+    ).read()
+
+    assert len(forecasts) == 4 * len(STATIONS)
+    assert sorted(forecasts["horizon"].unique()) == [1, 2, 3, 4]
+    assert (forecasts["pickup_hour"] == hour.tz_localize(None) + (forecasts["horizon"] - 1) * pd.Timedelta(hours=1)).all()
+    # LastHourModel carries the last observed hour forward
+    last_hour = features.set_index("start_station_name")["rides_t-1"]
+    assert (forecasts["predicted_trip_count"].to_numpy() == forecasts["start_station_name"].map(last_hour).to_numpy()).all()
+
+
+def test_hourly_prediction_loaders(store):
+    recent = inference.fetch_predictions(hours=6, fs=store["fs"])
+    next_hour = inference.fetch_next_hour_predictions(fs=store["fs"])
+
+    assert {"pickup_hour", "start_station_name", "predicted_demand"} <= set(recent.columns)
+    assert sorted(next_hour["start_station_name"]) == sorted(STATIONS)
+
+
+@pytest.mark.parametrize("precomputed", [False, True])
+def test_dashboard_runs_on_the_local_backend(store, precomputed):
+    app = AppTest.from_file(str(REPO_DIR / "src" / "frontend_v1.py"), default_timeout=60).run()
+    if precomputed:
+        app.sidebar.checkbox[0].check().run()
+
+    assert not app.exception
+    assert not app.warning
+    top10 = app.dataframe[0].value
+    assert sorted(top10["start_station_name"]) == sorted(STATIONS)
+
+
+def test_dashboard_predicts_with_a_new_model_version_in_the_same_hour(store):
+    app = AppTest.from_file(str(REPO_DIR / "src" / "frontend_v1.py"), default_timeout=60).run()
+    before = app.dataframe[0].value
+
+    saved = store["model_path"].read_bytes()
+    joblib.dump(DummyRegressor(strategy="constant", constant=12345).fit([[0]], [0]), store["model_path"])
+    try:
+        after = AppTest.from_file(str(REPO_DIR / "src" / "frontend_v1.py"), default_timeout=60).run().dataframe[0].value
+    finally:
+        store["model_path"].write_bytes(saved)
+
+    assert not (before["predicted_demand"] == 12345).any()
+    assert (after["predicted_demand"] == 12345).all()
@@ -0,0 +1,28 @@
+import json
+
+import src.config as config
+from src import instrumentation
+from src.instrumentation import Run, Stage
+
+
+def test_stage_records_peak_rss_growth_and_prometheus_labels(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PIPELINE_METRICS_DIR", str(tmp_path))
+    peaks = iter([100, 150, 150, 150])
+    monkeypatch.setattr(instrumentation, "_peak_rss_bytes", lambda: next(peaks))
+    run = Run("feature_pipeline", tmp_path)
+
+    with Stage(run, "build_lags", {"mode": "full"}) as s:
+        s.rows = 3
+    with Stage(run, "write_features", {}):
+        pass
+    prom = run.write_prometheus().read_text()
+
+    records = [json.loads(line) for line in (tmp_path / "runs.jsonl").read_text().splitlines()]
+    assert [r["peak_rss_growth_bytes"] for r in records] == [50, 0]
+    assert [r["process_peak_rss_bytes"] for r in records] == [150, 150]
+    assert 'citibike_stage_rows{pipeline="feature_pipeline",mode="full",stage="build_lags"} 3' in prom
+    assert 'citibike_stage_peak_rss_growth_bytes{pipeline="feature_pipeline",stage="write_features"} 0' in prom
+
+
+def test_prometheus_label_values_are_escaped():
+    assert instrumentation._prometheus_labels({"path": 'a\\b"c\nd'}) == 'path="a\\\\b\\"c\\nd"'
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from src.data_utils import fill_missing_rides_full_range
+from src.station_matrix import StationHourMatrix, dense_rides_matrix
+
+
+def long_counts(rows):
+    return pd.DataFrame(rows, columns=["pickup_hour", "start_station_name", "rides"]).assign(
+        pickup_hour=lambda df: pd.to_datetime(df["pickup_hour"])
+    )
+
+
+def test_dense_rides_matrix_sums_duplicate_rows():
+    df = long_counts([
+        ("2014-01-01 00:00", "A", 2),
+        ("2014-01-01 00:00", "A", 3),
+        ("2014-01-01 02:00", "B", 1),
+        ("2014-01-01 02:00", "B", 4),
+        ("2014-01-01 02:00", "A", 1),
+    ])
+
+    matrix, hours, stations = dense_rides_matrix(df, "pickup_hour", "start_station_name", "rides")
+
+    assert list(stations) == ["A", "B"]
+    assert len(hours) == 3
+    np.testing.assert_array_equal(matrix, [[5, 0], [0, 0], [1, 5]])
+
+
+def test_fill_missing_rides_full_range_keeps_total_with_duplicates():
+    df = long_counts([
+        ("2014-01-01 00:00", "A", 2),
+        ("2014-01-01 00:00", "A", 3),
+        ("2014-01-01 01:00", "B", 1),
+    ])
+
+    filled = fill_missing_rides_full_range(df, "pickup_hour", "start_station_name", "rides")
+
+    assert len(filled) == 4
+    assert filled["rides"].sum() == 6
+    assert filled.set_index(["pickup_hour", "start_station_name"]).loc[("2014-01-01 00:00", "A"), "rides"] == 5
+
+
+def test_from_long_round_trip_fills_gaps():
+    df = long_counts([
+        ("2014-01-01 00:00", "A", 1),
+        ("2014-01-01 03:00", "B", 2),
+    ])
+
+    matrix = StationHourMatrix.from_long(df)
+
+    assert matrix.shape == (2, 4)
+    np.testing.assert_array_equal(matrix.station("A"), [1, 0, 0, 0])
+    long = matrix.to_long()
+    assert len(long) == 8
+    assert long["rides"].sum() == 3
+
+
+def test_next_hour_features_takes_the_newest_hours():
+    matrix = StationHourMatrix(np.arange(8).reshape(2, 4), ["A", "B"], pd.Timestamp("2014-01-01"))
+
+    features = matrix.next_hour_features(n_lags=3)
+
+    assert list(features.columns) == ["rides_t-3", "rides_t-2", "rides_t-1", "start_station_name", "pickup_hour"]
+    np.testing.assert_array_equal(features[["rides_t-3", "rides_t-2", "rides_t-1"]], [[1, 2, 3], [5, 6, 7]])
+    assert (features["pickup_hour"] == pd.Timestamp("2014-01-01 04:00")).all()